@@ -0,0 +1,124 @@
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+def setup_django(
+	db_path: Optional[str] = None,
+	database: Optional[Dict[str, Any]] = None,
+	migrate: bool = True,
+) -> str:
+	"""Configure Django against a scratch SQLite database and migrate it."""
+	sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+	os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pedidos_site.settings")
+
+	import django
+	from django.conf import settings
+
+	if db_path is None:
+		handle, db_path = tempfile.mkstemp(prefix="pedidos-bench-", suffix=".sqlite3")
+		os.close(handle)
+	settings.DATABASES["default"].update(database or {})
+	settings.DATABASES["default"]["NAME"] = db_path
+	django.setup()
+
+	if migrate:
+		from django.core.management import call_command
+
+		call_command("migrate", verbosity=0)
+	return db_path
+
+
+def remove_database(db_path: str) -> None:
+	"""Delete a scratch SQLite database and its journal, WAL and shared-memory files."""
+	for suffix in ("", "-wal", "-shm", "-journal"):
+		if os.path.exists(db_path + suffix):
+			os.unlink(db_path + suffix)
+
+
+def seed(
+	orders: int,
+	items_per_order: int,
+	distinct_skus: int,
+	batch_size: int = 2000,
+	seed_value: int = 1,
+) -> None:
+	from orders.models import Order, OrderItem, Product
+
+	rng = random.Random(seed_value)
+	skus = [f"P{index:05d}" for index in range(1, distinct_skus + 1)]
+	prices = {sku: round(rng.uniform(1, 500), 2) for sku in skus}
+	Product.objects.bulk_create(
+		[
+			Product(
+				sku=sku,
+				price=price,
+				title=f"Product {sku}",
+				description=f"Description for {sku}",
+				category="General",
+			)
+			for sku, price in prices.items()
+		],
+		batch_size=batch_size,
+		ignore_conflicts=True,
+	)
+
+	per_order = min(items_per_order, distinct_skus)
+	for start in range(0, orders, batch_size):
+		count = min(batch_size, orders - start)
+		created = Order.objects.bulk_create(
+			[Order(client=f"Client {rng.randrange(500)}") for _ in range(count)]
+		)
+		items = []
+		for order in created:
+			for sku in rng.sample(skus, per_order):
+				quantity = rng.randint(1, 10)
+				items.append(
+					OrderItem(
+						order=order,
+						product_id=sku,
+						quantity=quantity,
+						amount=quantity * prices[sku],
+					)
+				)
+		OrderItem.objects.bulk_create(items, batch_size=batch_size)
+		Order.objects.filter(pk__in=[order.pk for order in created]).refresh_totals()
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+	if not samples:
+		return {}
+	ordered = sorted(samples)
+
+	def pick(fraction: float) -> float:
+		index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+		return ordered[index]
+
+	return {
+		"min": ordered[0],
+		"p50": pick(0.50),
+		"p95": pick(0.95),
+		"p99": pick(0.99),
+		"max": ordered[-1],
+		"mean": statistics.fmean(ordered),
+	}
+
+
+def timed(callable_, *args: Any, **kwargs: Any) -> tuple:
+	started = time.perf_counter()
+	result = callable_(*args, **kwargs)
+	return time.perf_counter() - started, result
+
+
+def emit(report: Dict[str, Any], output: Optional[str]) -> None:
+	text = json.dumps(report, indent=2, default=str)
+	if output:
+		Path(output).write_text(text + "\n")
+	print(text)
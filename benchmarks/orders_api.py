@@ -0,0 +1,238 @@
+"""Latency, throughput and query counts for GET and POST /orders/.
+
+    python -m benchmarks.orders_api --orders 10000 --catalog-latency-ms 20
+
+Requests go through the Django test client against a scratch database seeded
+with --orders orders. Catalog lookups are answered by a local HTTP stand-in
+that waits --catalog-latency-ms before replying, so POST timings include a
+realistic (and repeatable) network round trip without leaving the machine.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .common import emit, percentiles, remove_database, seed, setup_django
+
+
+class CatalogStandIn(ThreadingHTTPServer):
+	daemon_threads = True
+
+	def __init__(self, prices, latency, jitter):
+		super().__init__(("127.0.0.1", 0), _CatalogHandler)
+		self.prices = prices
+		self.latency = latency
+		self.jitter = jitter
+		self.requests = 0
+
+	@property
+	def url(self):
+		host, port = self.server_address
+		return f"http://{host}:{port}"
+
+
+class _CatalogHandler(BaseHTTPRequestHandler):
+	protocol_version = "HTTP/1.1"
+	# Headers and body are written separately; without this, Nagle's algorithm
+	# and delayed ACKs add ~40ms to every keep-alive response.
+	disable_nagle_algorithm = True
+
+	def do_GET(self):
+		server = self.server
+		server.requests += 1
+		time.sleep(server.latency + random.uniform(0, server.jitter))
+		product_id = self.path.rstrip("/").rsplit("/", 1)[-1]
+		if product_id == "products":
+			body = [self._product(pid) for pid in sorted(server.prices)]
+		elif product_id.isdigit() and int(product_id) in server.prices:
+			body = self._product(int(product_id))
+		else:
+			self._reply(404, {"detail": "Not found"})
+			return
+		self._reply(200, body)
+
+	def _product(self, product_id):
+		return {
+			"id": product_id,
+			"title": f"Product {product_id}",
+			"price": self.server.prices[product_id],
+			"description": f"Description for {product_id}",
+			"category": "General",
+		}
+
+	def _reply(self, status, body):
+		data = json.dumps(body).encode()
+		self.send_response(status)
+		self.send_header("Content-Type", "application/json")
+		self.send_header("Content-Length", str(len(data)))
+		self.end_headers()
+		self.wfile.write(data)
+
+	def log_message(self, format, *args):
+		pass
+
+
+def _measure(name, requests, send):
+	from django.db import connection
+	from django.test.utils import CaptureQueriesContext
+
+	latencies = []
+	queries = []
+	statuses = {}
+	started = time.perf_counter()
+	for index in range(requests):
+		with CaptureQueriesContext(connection) as context:
+			request_started = time.perf_counter()
+			response = send(index)
+			latencies.append(time.perf_counter() - request_started)
+		queries.append(len(context))
+		statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+	elapsed = time.perf_counter() - started
+	return {
+		"scenario": name,
+		"requests": requests,
+		"status_codes": statuses,
+		"requests_per_second": requests / elapsed,
+		"latency_seconds": percentiles(latencies),
+		"queries": {
+			"min": min(queries),
+			"mean": sum(queries) / len(queries),
+			"max": max(queries),
+		},
+	}
+
+
+def run(args, catalog):
+	from django.test import Client
+	from django.urls import reverse
+
+	from orders.models import Order, Product
+
+	client = Client()
+	url = reverse("orders:orders")
+	rng = random.Random(args.seed)
+	clients = list(Order.objects.values_list("client", flat=True).distinct()[:50])
+	products = list(Product.objects.values_list("sku", "price"))
+
+	def order_payload(index):
+		return {
+			"cliente": rng.choice(clients) if clients else f"Client {index}",
+			"productos": [
+				{"sku": sku, "cantidad": rng.randint(1, 5), "precio_unitario": price}
+				for sku, price in rng.sample(products, args.lines_per_post)
+			],
+		}
+
+	scenarios = {
+		"get_list": lambda index: client.get(url),
+		"get_summary": lambda index: client.get(url, {"summary": "true"}),
+		"get_by_client": lambda index: client.get(url, {"client": rng.choice(clients)}),
+		"get_by_sku": lambda index: client.get(url, {"sku": rng.choice(products)[0]}),
+		"get_by_total": lambda index: client.get(url, {"ordering": "-total_amount"}),
+		"post": lambda index: client.post(
+			url,
+			data=json.dumps(order_payload(index)),
+			content_type="application/json",
+		),
+	}
+
+	results = []
+	for name in args.scenarios:
+		send = scenarios[name]
+		for index in range(args.warmup):
+			send(index)
+		catalog_before = catalog.requests
+		result = _measure(name, args.requests, send)
+		result["catalog_requests"] = catalog.requests - catalog_before
+		results.append(result)
+	return results
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__)
+	parser.add_argument("--orders", type=int, default=10_000)
+	parser.add_argument("--items-per-order", type=int, default=3)
+	parser.add_argument("--distinct-skus", type=int, default=200)
+	parser.add_argument("--requests", type=int, default=200)
+	parser.add_argument("--warmup", type=int, default=10)
+	parser.add_argument("--lines-per-post", type=int, default=3)
+	parser.add_argument("--catalog-latency-ms", type=float, default=20.0)
+	parser.add_argument("--catalog-jitter-ms", type=float, default=0.0)
+	parser.add_argument(
+		"--catalog-cache",
+		action="store_true",
+		help="Keep the in-process catalog cache enabled (default: disabled).",
+	)
+	parser.add_argument(
+		"--response-cache",
+		action="store_true",
+		help="Keep the GET /orders/ response cache enabled (default: disabled).",
+	)
+	parser.add_argument(
+		"--scenarios",
+		nargs="+",
+		default=[
+			"get_list",
+			"get_summary",
+			"get_by_client",
+			"get_by_sku",
+			"get_by_total",
+			"post",
+		],
+	)
+	parser.add_argument("--seed", type=int, default=1)
+	parser.add_argument("--db", help="SQLite file to use (default: a new temp file).")
+	parser.add_argument("--output", help="Also write the JSON report to this file.")
+	args = parser.parse_args()
+
+	db_path = setup_django(args.db)
+
+	from django.conf import settings
+	from django.test.utils import setup_test_environment
+
+	from orders.models import Product
+
+	setup_test_environment()
+	seed(args.orders, args.items_per_order, args.distinct_skus, seed_value=args.seed)
+	prices = {
+		int(sku[1:]): price for sku, price in Product.objects.values_list("sku", "price")
+	}
+	catalog = CatalogStandIn(
+		prices,
+		latency=args.catalog_latency_ms / 1000,
+		jitter=args.catalog_jitter_ms / 1000,
+	)
+	threading.Thread(target=catalog.serve_forever, daemon=True).start()
+	settings.CATALOG_CLIENT = {
+		"PRODUCT_URL": f"{catalog.url}/products/{{product_id}}",
+		"PRODUCTS_URL": f"{catalog.url}/products",
+	}
+	settings.CATALOG_CACHE = {"ENABLED": args.catalog_cache}
+	settings.ORDERS_RESPONSE_CACHE = {"ENABLED": args.response_cache}
+
+	try:
+		results = run(args, catalog)
+	finally:
+		catalog.shutdown()
+		catalog.server_close()
+		if args.db is None:
+			remove_database(db_path)
+	emit(
+		{
+			"benchmark": "orders_api",
+			"config": {
+				key: value
+				for key, value in vars(args).items()
+				if key not in ("db", "output")
+			},
+			"results": results,
+		},
+		args.output,
+	)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,112 @@
+"""Compare OrderSerializer with the values()-based listing path.
+
+    python -m benchmarks.serialization --orders 10000 100000
+"""
+import argparse
+import tracemalloc
+
+from itertools import islice
+
+from .common import emit, remove_database, seed, setup_django, timed
+
+
+def _batches(iterable, size):
+	iterator = iter(iterable)
+	while batch := list(islice(iterator, size)):
+		yield batch
+
+
+def run(order_counts, items_per_order, distinct_skus, repeat, chunk_size):
+	from django.db import connection
+	from django.db.models import Prefetch
+	from django.test.utils import CaptureQueriesContext
+
+	from orders.listing import ORDER_LIST_FIELDS, serialize_orders
+	from orders.models import Order, OrderItem
+	from orders.serializers import OrderSerializer
+
+	def with_serializer():
+		queryset = Order.objects.order_by("-created_at", "-id").prefetch_related(
+			Prefetch(
+				"orderitem_set",
+				queryset=OrderItem.objects.select_related("product"),
+			)
+		)
+		data = []
+		for batch in _batches(queryset.iterator(chunk_size=chunk_size), chunk_size):
+			data.extend(OrderSerializer(batch, many=True).data)
+		return data
+
+	def with_values():
+		queryset = Order.objects.order_by("-created_at", "-id").values(
+			*ORDER_LIST_FIELDS
+		)
+		data = []
+		for batch in _batches(queryset.iterator(chunk_size=chunk_size), chunk_size):
+			data.extend(serialize_orders(batch))
+		return data
+
+	results = []
+	seeded = 0
+	for count in sorted(order_counts):
+		seed(count - seeded, items_per_order, distinct_skus, seed_value=count)
+		seeded = count
+		for name, implementation in (
+			("serializer", with_serializer),
+			("values", with_values),
+		):
+			timings = []
+			for _ in range(repeat):
+				with CaptureQueriesContext(connection) as queries:
+					elapsed, data = timed(implementation)
+				assert len(data) == count
+				timings.append(elapsed)
+			del data
+			tracemalloc.start()
+			implementation()
+			_, peak = tracemalloc.get_traced_memory()
+			tracemalloc.stop()
+			results.append(
+				{
+					"orders": count,
+					"items_per_order": items_per_order,
+					"chunk_size": chunk_size,
+					"implementation": name,
+					"best_seconds": min(timings),
+					"timings_seconds": timings,
+					"orders_per_second": count / min(timings),
+					"queries": len(queries),
+					"peak_memory_bytes": peak,
+				}
+			)
+	return results
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__)
+	parser.add_argument("--orders", type=int, nargs="+", default=[10_000, 100_000])
+	parser.add_argument("--items-per-order", type=int, default=3)
+	parser.add_argument("--distinct-skus", type=int, default=200)
+	parser.add_argument("--repeat", type=int, default=3)
+	parser.add_argument("--chunk-size", type=int, default=1000)
+	parser.add_argument("--db", help="SQLite file to use (default: a new temp file).")
+	parser.add_argument("--output", help="Also write the JSON report to this file.")
+	args = parser.parse_args()
+
+	db_path = setup_django(args.db)
+	try:
+		results = run(
+			args.orders,
+			args.items_per_order,
+			args.distinct_skus,
+			args.repeat,
+			args.chunk_size,
+		)
+	finally:
+		if args.db is None:
+			remove_database(db_path)
+	emit({"benchmark": "serialization", "results": results}, args.output)
+
+
+if __name__ == "__main__":
+	main()
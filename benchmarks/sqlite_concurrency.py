@@ -0,0 +1,139 @@
+"""Sustained order-write throughput on SQLite across worker processes.
+
+    python -m benchmarks.sqlite_concurrency --workers 1 2 4 8 --duration 5
+
+Each worker process creates orders through
+OrderItem.create_or_update_order_with_items (catalog lookups are served from
+local products, so no network is involved) as fast as it can. The Django
+defaults are compared with the profile configured in pedidos_site/settings.py.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from .common import emit, percentiles, remove_database, seed, setup_django
+
+
+PROFILES = {
+	# Django's defaults: rollback journal, DEFERRED transactions, 5s timeout.
+	"default": {"OPTIONS": {}, "CONN_MAX_AGE": 0},
+	# Whatever pedidos_site/settings.py configures.
+	"configured": None,
+}
+
+
+def _prepare(db_path, profile, distinct_skus):
+	setup_django(db_path, database=PROFILES[profile])
+
+	from django.utils import timezone
+
+	from orders.models import Product
+
+	seed(0, 0, distinct_skus)
+	Product.objects.update(synced_at=timezone.now())
+
+
+def _worker(db_path, profile, duration, lines, barrier, results):
+	setup_django(db_path, database=PROFILES[profile], migrate=False)
+
+	from django.conf import settings
+	from django.db import OperationalError, connection
+
+	from orders.models import OrderItem, Product
+
+	settings.CATALOG_SYNC = {"LOCAL_MAX_AGE": 10**9}
+	prices = dict(Product.objects.values_list("sku", "price"))
+	skus = list(prices)
+	rng = random.Random(os.getpid())
+
+	latencies = []
+	errors = 0
+	barrier.wait()
+	deadline = time.perf_counter() + duration
+	while time.perf_counter() < deadline:
+		payload = {
+			"cliente": f"Client {rng.randrange(500)}",
+			"productos": [
+				{"sku": sku, "cantidad": rng.randint(1, 5), "precio_unitario": prices[sku]}
+				for sku in rng.sample(skus, lines)
+			],
+		}
+		started = time.perf_counter()
+		try:
+			OrderItem.create_or_update_order_with_items(payload)
+		except OperationalError:
+			errors += 1
+			continue
+		latencies.append(time.perf_counter() - started)
+	connection.close()
+	results.put({"latencies": latencies, "errors": errors})
+
+
+def run(profile, workers, duration, lines, distinct_skus):
+	context = multiprocessing.get_context("spawn")
+	db_path = os.path.join(
+		tempfile.gettempdir(),
+		f"pedidos-bench-{profile}-{workers}-{os.getpid()}.sqlite3",
+	)
+	preparer = context.Process(target=_prepare, args=(db_path, profile, distinct_skus))
+	preparer.start()
+	preparer.join()
+
+	barrier = context.Barrier(workers)
+	results = context.Queue()
+	processes = [
+		context.Process(
+			target=_worker,
+			args=(db_path, profile, duration, lines, barrier, results),
+		)
+		for _ in range(workers)
+	]
+	for process in processes:
+		process.start()
+	outcomes = [results.get() for _ in processes]
+	for process in processes:
+		process.join()
+	remove_database(db_path)
+
+	latencies = [value for outcome in outcomes for value in outcome["latencies"]]
+	errors = sum(outcome["errors"] for outcome in outcomes)
+	return {
+		"profile": profile,
+		"workers": workers,
+		"duration_seconds": duration,
+		"lines_per_order": lines,
+		"orders": len(latencies),
+		"locked_errors": errors,
+		"orders_per_second": len(latencies) / duration,
+		"latency_seconds": percentiles(latencies),
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__)
+	parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+	parser.add_argument("--duration", type=float, default=5.0)
+	parser.add_argument("--lines", type=int, default=3)
+	parser.add_argument("--distinct-skus", type=int, default=200)
+	parser.add_argument(
+		"--profiles",
+		nargs="+",
+		choices=sorted(PROFILES),
+		default=["default", "configured"],
+	)
+	parser.add_argument("--output", help="Also write the JSON report to this file.")
+	args = parser.parse_args()
+
+	results = [
+		run(profile, workers, args.duration, args.lines, args.distinct_skus)
+		for profile in args.profiles
+		for workers in args.workers
+	]
+	emit({"benchmark": "sqlite_concurrency", "results": results}, args.output)
+
+
+if __name__ == "__main__":
+	main()
@@ -1,12 +1,20 @@
 from django.contrib import admin
 
-from .models import Order, OrderItem, Product
+from .models import (
+	ClientDailySales,
+	IdempotencyKey,
+	Order,
+	OrderItem,
+	OrderJob,
+	Product,
+)
 
 
 class OrderItemInline(admin.TabularInline):
 	model = OrderItem
 	extra = 1
 	min_num = 0
+	readonly_fields = ("amount",)
 
 
 @admin.register(Order)
@@ -14,6 +22,7 @@ class OrderAdmin(admin.ModelAdmin):
 	list_display = ("id", "client", "created_at")
 	search_fields = ("client",)
 	ordering = ("-created_at",)
+	readonly_fields = ("total_amount", "item_count")
 	inlines = (OrderItemInline,)
 
 
@@ -21,3 +30,32 @@ class OrderAdmin(admin.ModelAdmin):
 class ProductAdmin(admin.ModelAdmin):
 	list_display = ("sku", "title", "category", "price")
 	search_fields = ("sku", "title", "category")
+
+
+@admin.register(OrderJob)
+class OrderJobAdmin(admin.ModelAdmin):
+	list_display = ("id", "status", "attempts", "order", "created_at", "updated_at")
+	list_filter = ("status",)
+	readonly_fields = ("payload", "errors", "order", "attempts", "created_at", "updated_at")
+
+
+@admin.register(ClientDailySales)
+class ClientDailySalesAdmin(admin.ModelAdmin):
+	list_display = ("day", "client", "order_count", "item_count", "revenue")
+	list_filter = ("day",)
+	search_fields = ("client",)
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+	list_display = ("key", "status", "response_status", "created_at", "expires_at")
+	list_filter = ("status",)
+	search_fields = ("key",)
+	readonly_fields = (
+		"fingerprint",
+		"response_status",
+		"response_body",
+		"response_headers",
+		"created_at",
+		"updated_at",
+	)
@@ -0,0 +1,142 @@
+import logging
+
+from typing import Any, Dict, List
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+
+from .cache import invalidate_orders_cache
+from .catalog import CatalogUnavailable
+from .listing import ORDER_LIST_FIELDS, serialize_orders
+from .models import Order, OrderItem, Product
+from .retry import is_transient
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ORDERS_BULK_BATCH_SIZE = 100
+
+
+def submit_orders(order_payloads: List[Any]) -> List[Dict[str, Any]]:
+	results: List[Dict[str, Any]] = [
+		{"index": index} for index in range(len(order_payloads))
+	]
+
+	parsed: Dict[int, Dict[str, Any]] = {}
+	for index, payload in enumerate(order_payloads):
+		try:
+			parsed[index] = OrderItem._parse_order_payload(payload)
+		except ValidationError as error:
+			_fail(results[index], error)
+
+	catalog = Product.resolve_catalog_results(
+		{
+			line["product_id"]: line["sku"]
+			for order_data in parsed.values()
+			for line in order_data["lines"]
+		}
+	)
+
+	ready: Dict[int, Dict[str, Any]] = {}
+	for index, order_data in parsed.items():
+		try:
+			for line in order_data["lines"]:
+				payload = catalog[line["product_id"]]
+				if isinstance(payload, ValidationError):
+					raise payload
+				Product._check_price(line["sku"], line["unit_price"], payload)
+		except ValidationError as error:
+			_fail(results[index], error)
+		else:
+			ready[index] = order_data
+
+	batch_size = getattr(
+		settings, "ORDERS_BULK_BATCH_SIZE", DEFAULT_ORDERS_BULK_BATCH_SIZE
+	)
+	indexes = list(ready)
+	order_ids: Dict[int, int] = {}
+	for start in range(0, len(indexes), batch_size):
+		batch = {index: ready[index] for index in indexes[start : start + batch_size]}
+		try:
+			order_ids.update(_write_batch(batch, catalog, results))
+		except Exception as error:
+			# The whole batch rolled back, but earlier batches are committed:
+			# report this batch's orders as failed instead of failing the request.
+			logger.exception(f"Failed to write order batch at index {start}: {error}")
+			for index in batch:
+				if "status" not in results[index]:
+					_error(results[index], error)
+
+	_attach_orders(results, order_ids)
+	return results
+
+
+def _write_batch(
+	batch: Dict[int, Dict[str, Any]],
+	catalog: Dict[int, Any],
+	results: List[Dict[str, Any]],
+) -> Dict[int, int]:
+	order_ids: Dict[int, int] = {}
+	with transaction.atomic():
+		Product.sync_many(
+			{
+				line["sku"]: catalog[line["product_id"]]
+				for order_data in batch.values()
+				for line in order_data["lines"]
+			}
+		)
+		for index, order_data in batch.items():
+			try:
+				with transaction.atomic():
+					order = OrderItem._write_order(
+						order_data,
+						catalog,
+						sync_products=False,
+					)
+			except ValidationError as error:
+				_fail(results[index], error)
+			except Exception as error:
+				logger.exception(f"Failed to write order at index {index}: {error}")
+				_error(results[index], error)
+			else:
+				order_ids[index] = order.pk
+		invalidate_orders_cache()
+	return order_ids
+
+
+def _attach_orders(results: List[Dict[str, Any]], order_ids: Dict[int, int]) -> None:
+	distinct_ids = list(dict.fromkeys(order_ids.values()))
+	orders: Dict[int, Dict[str, Any]] = {}
+	chunk_size = getattr(settings, "ORDERS_MAX_PAGE_SIZE", 500)
+	for start in range(0, len(distinct_ids), chunk_size):
+		rows = (
+			Order.objects.filter(
+				pk__in=distinct_ids[start : start + chunk_size]
+			).values(*ORDER_LIST_FIELDS)
+		)
+		orders.update((order["id"], order) for order in serialize_orders(rows))
+
+	for index, order_id in order_ids.items():
+		results[index].update(status=status.HTTP_201_CREATED, order=orders[order_id])
+
+
+def _fail(result: Dict[str, Any], error: ValidationError) -> None:
+	if isinstance(error, CatalogUnavailable):
+		result.update(status=status.HTTP_503_SERVICE_UNAVAILABLE, errors=error.detail)
+	else:
+		result.update(status=status.HTTP_400_BAD_REQUEST, errors=error.detail)
+
+
+def _error(result: Dict[str, Any], error: Exception) -> None:
+	if is_transient(error):
+		result.update(
+			status=status.HTTP_503_SERVICE_UNAVAILABLE,
+			error="Database is busy.",
+		)
+	else:
+		result.update(
+			status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+			error="Error creating order.",
+		)
@@ -0,0 +1,115 @@
+import hashlib
+import time
+
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.http import parse_etags, quote_etag
+
+
+ORDERS_VERSION_KEY = "orders:list:version"
+
+DEFAULT_ORDERS_RESPONSE_CACHE = {
+	"ENABLED": True,
+	"ALIAS": "default",
+	"TIMEOUT": 30,
+}
+
+
+def _config() -> Dict[str, Any]:
+	return {
+		**DEFAULT_ORDERS_RESPONSE_CACHE,
+		**getattr(settings, "ORDERS_RESPONSE_CACHE", {}),
+	}
+
+
+def _cache():
+	return caches[_config()["ALIAS"]]
+
+
+def orders_version() -> int:
+	cache = _cache()
+	version = cache.get(ORDERS_VERSION_KEY)
+	if version is None:
+		# Seed from the clock so a lost counter never reuses an old version.
+		cache.add(ORDERS_VERSION_KEY, time.time_ns(), timeout=None)
+		version = cache.get(ORDERS_VERSION_KEY)
+	return version
+
+
+def bump_orders_version() -> None:
+	cache = _cache()
+	try:
+		cache.incr(ORDERS_VERSION_KEY)
+	except ValueError:
+		cache.add(ORDERS_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def invalidate_orders_cache() -> None:
+	transaction.on_commit(bump_orders_version)
+
+
+def orders_fingerprint() -> str:
+	from .models import Order, Product
+
+	quote = connection.ops.quote_name
+	parts = []
+	for model in (Order, Product):
+		table = quote(model._meta.db_table)
+		updated_at = quote(model._meta.get_field("updated_at").column)
+		parts.append(f"(SELECT MAX({updated_at}) FROM {table})")
+		parts.append(f"(SELECT COUNT(*) FROM {table})")
+	with connection.cursor() as cursor:
+		cursor.execute(f"SELECT {', '.join(parts)}")
+		row = cursor.fetchone()
+	return "|".join(str(value) for value in row)
+
+
+def orders_etag(request, fingerprint: Optional[str] = None) -> str:
+	if fingerprint is None:
+		fingerprint = orders_fingerprint()
+	params = sorted(request.query_params.lists())
+	media_type = getattr(request.accepted_renderer, "media_type", "")
+	raw = repr((fingerprint, request.path, media_type, params)).encode()
+	return quote_etag(hashlib.sha1(raw).hexdigest())
+
+
+def etag_matches(request, etag: str) -> bool:
+	candidates = parse_etags(request.headers.get("If-None-Match", ""))
+	return "*" in candidates or etag in candidates
+
+
+def orders_response_key(request) -> Optional[str]:
+	# Read the version once, before querying: a write that commits while the
+	# response is built bumps it, so the stale result lands under the old key.
+	if not _config()["ENABLED"]:
+		return None
+	params = sorted(request.query_params.lists())
+	media_type = getattr(request.accepted_renderer, "media_type", "")
+	raw = repr((request.get_host(), media_type, params)).encode()
+	digest = hashlib.sha1(raw).hexdigest()
+	return f"orders:list:{orders_version()}:{digest}"
+
+
+def get_cached_orders_response(key: Optional[str]) -> Optional[Dict[str, Any]]:
+	if key is None:
+		return None
+	return _cache().get(key)
+
+
+def cache_orders_response(key: Optional[str], data: Dict[str, Any], etag: str) -> None:
+	if key is not None:
+		entry = {"etag": etag, "data": data}
+		_cache().set(key, entry, timeout=_config()["TIMEOUT"])
+
+
+def _invalidate_on_change(**kwargs: Any) -> None:
+	invalidate_orders_cache()
+
+
+for _sender in ("orders.Order", "orders.OrderItem", "orders.Product"):
+	post_save.connect(_invalidate_on_change, sender=_sender, weak=False)
+	post_delete.connect(_invalidate_on_change, sender=_sender, weak=False)
@@ -0,0 +1,491 @@
+import asyncio
+import json
+import threading
+import time
+import weakref
+import httpx
+import requests
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, Optional
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from requests.adapters import HTTPAdapter
+from rest_framework.exceptions import ValidationError
+from urllib3.util.retry import Retry
+
+from .instrumentation import catalog_call
+
+
+FAKESTORE_PRODUCT_URL = "https://fakestoreapi.com/products/{product_id}"
+FAKESTORE_PRODUCTS_URL = "https://fakestoreapi.com/products"
+
+DEFAULT_CATALOG_CLIENT = {
+	"PRODUCT_URL": FAKESTORE_PRODUCT_URL,
+	"PRODUCTS_URL": FAKESTORE_PRODUCTS_URL,
+	"POOL_SIZE": 16,
+	"CONNECT_TIMEOUT": 3.05,
+	"READ_TIMEOUT": 5,
+	"RETRIES": 2,
+	"BACKOFF_FACTOR": 0.1,
+}
+
+DEFAULT_CATALOG_CIRCUIT_BREAKER = {
+	"FAILURE_THRESHOLD": 5,
+	"RESET_TIMEOUT": 30,
+}
+
+DEFAULT_CATALOG_FALLBACK = {
+	"ENABLED": False,
+	"MAX_STALENESS": 3600,
+	"TOUCH_INTERVAL": 300,
+}
+
+DEFAULT_CATALOG_SYNC = {
+	"SKU_FORMAT": "P{product_id:03d}",
+	"BATCH_SIZE": 500,
+	"LOCAL_MAX_AGE": 0,
+}
+
+DEFAULT_CATALOG_CACHE = {
+	"ENABLED": True,
+	"TTL": 60,
+	"MAX_SIZE": 1024,
+}
+
+
+class CatalogUnavailable(ValidationError):
+	pass
+
+
+class CatalogCircuitOpen(CatalogUnavailable):
+	pass
+
+
+def iter_json_array(chunks: Iterable[str]) -> Iterator[Any]:
+	decoder = json.JSONDecoder()
+	chunks = iter(chunks)
+	buffer = ""
+	position = 0
+	exhausted = False
+	started = False
+
+	def read() -> bool:
+		nonlocal buffer, position, exhausted
+		for chunk in chunks:
+			if chunk:
+				buffer = buffer[position:] + chunk
+				position = 0
+				return True
+		exhausted = True
+		return False
+
+	while True:
+		while position < len(buffer) and buffer[position] in " \t\r\n":
+			position += 1
+		if position == len(buffer):
+			if exhausted or not read():
+				raise ValueError("Unexpected end of JSON array.")
+			continue
+
+		char = buffer[position]
+		if not started:
+			if char != "[":
+				raise ValueError("Expected a JSON array.")
+			started = True
+			position += 1
+			continue
+		if char == "]":
+			return
+		if char == ",":
+			position += 1
+			continue
+
+		try:
+			item, end = decoder.raw_decode(buffer, position)
+		except json.JSONDecodeError:
+			if exhausted or not read():
+				raise
+			continue
+		# A value ending exactly at the buffer edge (e.g. a number) may continue
+		# in the next chunk.
+		if end == len(buffer) and not exhausted and read():
+			continue
+		position = end
+		yield item
+
+
+class CatalogCache:
+	def __init__(
+		self,
+		ttl: float,
+		max_size: int,
+		enabled: bool = True,
+		clock: Callable[[], float] = time.monotonic,
+	) -> None:
+		self.ttl = ttl
+		self.max_size = max_size
+		self.enabled = enabled and ttl > 0 and max_size > 0
+		self._clock = clock
+		self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self.expirations = 0
+
+	def get(self, key: Hashable) -> Optional[Any]:
+		if not self.enabled:
+			return None
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is None:
+				self.misses += 1
+				return None
+			expires_at, value = entry
+			if expires_at <= self._clock():
+				del self._entries[key]
+				self.expirations += 1
+				self.misses += 1
+				return None
+			self._entries.move_to_end(key)
+			self.hits += 1
+			return value
+
+	def set(self, key: Hashable, value: Any) -> None:
+		if not self.enabled:
+			return
+		with self._lock:
+			self._entries[key] = (self._clock() + self.ttl, value)
+			self._entries.move_to_end(key)
+			while len(self._entries) > self.max_size:
+				self._entries.popitem(last=False)
+				self.evictions += 1
+
+	def invalidate(self, key: Hashable) -> None:
+		with self._lock:
+			self._entries.pop(key, None)
+
+	def clear(self) -> None:
+		with self._lock:
+			self._entries.clear()
+			self.hits = self.misses = self.evictions = self.expirations = 0
+
+	def stats(self) -> Dict[str, int]:
+		with self._lock:
+			return {
+				"enabled": int(self.enabled),
+				"size": len(self._entries),
+				"max_size": self.max_size,
+				"hits": self.hits,
+				"misses": self.misses,
+				"evictions": self.evictions,
+				"expirations": self.expirations,
+			}
+
+
+class CircuitBreaker:
+	CLOSED = "closed"
+	OPEN = "open"
+	HALF_OPEN = "half_open"
+
+	def __init__(
+		self,
+		failure_threshold: int = 5,
+		reset_timeout: float = 30,
+		clock: Callable[[], float] = time.monotonic,
+	) -> None:
+		self.failure_threshold = max(1, failure_threshold)
+		self.reset_timeout = reset_timeout
+		self._clock = clock
+		self._lock = threading.Lock()
+		self.state = self.CLOSED
+		self.failures = 0
+		self.opened_at = 0.0
+		self._trial_in_flight = False
+		self._trial_started_at = 0.0
+		self.times_opened = 0
+		self.rejected = 0
+
+	def allow(self) -> bool:
+		with self._lock:
+			if self.state == self.CLOSED:
+				return True
+			if self.state == self.OPEN:
+				if self._clock() - self.opened_at < self.reset_timeout:
+					self.rejected += 1
+					return False
+				self.state = self.HALF_OPEN
+				self._trial_in_flight = False
+			# A trial that never reported back expires like an open circuit.
+			if (
+				self._trial_in_flight
+				and self._clock() - self._trial_started_at < self.reset_timeout
+			):
+				self.rejected += 1
+				return False
+			self._trial_in_flight = True
+			self._trial_started_at = self._clock()
+			return True
+
+	def record_success(self) -> None:
+		with self._lock:
+			self.state = self.CLOSED
+			self.failures = 0
+			self._trial_in_flight = False
+
+	def record_failure(self) -> None:
+		with self._lock:
+			self.failures += 1
+			self._trial_in_flight = False
+			if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+				if self.state != self.OPEN:
+					self.times_opened += 1
+				self.state = self.OPEN
+				self.opened_at = self._clock()
+
+	def retry_after(self) -> float:
+		with self._lock:
+			if self.state != self.OPEN:
+				return 0.0
+			return max(0.0, self.reset_timeout - (self._clock() - self.opened_at))
+
+	def record_response(self, status_code: int) -> None:
+		if status_code >= 500:
+			self.record_failure()
+		else:
+			self.record_success()
+
+	def stats(self) -> Dict[str, Any]:
+		with self._lock:
+			return {
+				"state": self.state,
+				"failures": self.failures,
+				"times_opened": self.times_opened,
+				"rejected": self.rejected,
+			}
+
+
+class CatalogClient:
+	def __init__(
+		self,
+		product_url: str = FAKESTORE_PRODUCT_URL,
+		products_url: str = FAKESTORE_PRODUCTS_URL,
+		pool_size: int = 16,
+		connect_timeout: float = 3.05,
+		read_timeout: float = 5,
+		retries: int = 2,
+		backoff_factor: float = 0.1,
+	) -> None:
+		self.product_url = product_url
+		self.products_url = products_url
+		self.timeout = (connect_timeout, read_timeout)
+		# Single-product lookups are not retried here: order creation retries
+		# them through RetryPolicy and the circuit breaker has to see every
+		# failed attempt. Only the bulk download used by sync_catalog is.
+		self._adapter = HTTPAdapter(
+			pool_connections=pool_size,
+			pool_maxsize=pool_size,
+			max_retries=0,
+		)
+		self.session = requests.Session()
+		self.session.mount("https://", self._adapter)
+		self.session.mount("http://", self._adapter)
+		retry = Retry(
+			total=retries,
+			connect=retries,
+			read=retries,
+			status=retries,
+			backoff_factor=backoff_factor,
+			status_forcelist=(502, 503, 504),
+			allowed_methods=frozenset({"GET"}),
+			raise_on_status=False,
+		)
+		self.sync_session = requests.Session()
+		self.sync_session.mount("https://", HTTPAdapter(max_retries=retry))
+		self.sync_session.mount("http://", HTTPAdapter(max_retries=retry))
+
+	def get_product(self, product_id: int) -> requests.Response:
+		with catalog_call():
+			return self.session.get(
+				self.product_url.format(product_id=product_id),
+				timeout=self.timeout,
+			)
+
+	def iter_products(self, chunk_size: int = 65536) -> Iterator[Dict[str, Any]]:
+		with self.sync_session.get(
+			self.products_url,
+			timeout=self.timeout,
+			stream=True,
+		) as response:
+			response.raise_for_status()
+			response.encoding = response.encoding or "utf-8"
+			yield from iter_json_array(
+				response.iter_content(chunk_size=chunk_size, decode_unicode=True)
+			)
+
+	def stats(self) -> Dict[str, int]:
+		pools = self._adapter.poolmanager.pools
+		requests_sent = connections_opened = 0
+		for key in pools.keys():
+			pool = pools.get(key)
+			if pool is None:
+				continue
+			requests_sent += pool.num_requests
+			connections_opened += pool.num_connections
+		return {
+			"pools": len(pools),
+			"requests": requests_sent,
+			"connections_opened": connections_opened,
+			"connections_reused": max(requests_sent - connections_opened, 0),
+		}
+
+	def close(self) -> None:
+		self.session.close()
+		self.sync_session.close()
+
+
+class AsyncCatalogClient:
+	def __init__(
+		self,
+		product_url: str = FAKESTORE_PRODUCT_URL,
+		pool_size: int = 16,
+		connect_timeout: float = 3.05,
+		read_timeout: float = 5,
+	) -> None:
+		self.product_url = product_url
+		limits = httpx.Limits(
+			max_connections=pool_size,
+			max_keepalive_connections=pool_size,
+		)
+		self.client = httpx.AsyncClient(
+			timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+			transport=httpx.AsyncHTTPTransport(limits=limits),
+		)
+
+	async def get_product(self, product_id: int) -> httpx.Response:
+		with catalog_call():
+			return await self.client.get(self.product_url.format(product_id=product_id))
+
+	async def aclose(self) -> None:
+		await self.client.aclose()
+
+
+_catalog_client: Optional[CatalogClient] = None
+_catalog_client_lock = threading.Lock()
+_async_catalog_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_catalog_cache: Optional[CatalogCache] = None
+_catalog_cache_lock = threading.Lock()
+_catalog_breaker: Optional[CircuitBreaker] = None
+_catalog_breaker_lock = threading.Lock()
+
+
+def get_catalog_cache() -> CatalogCache:
+	global _catalog_cache
+	if _catalog_cache is None:
+		with _catalog_cache_lock:
+			if _catalog_cache is None:
+				config = {
+					**DEFAULT_CATALOG_CACHE,
+					**getattr(settings, "CATALOG_CACHE", {}),
+				}
+				_catalog_cache = CatalogCache(
+					ttl=config["TTL"],
+					max_size=config["MAX_SIZE"],
+					enabled=config["ENABLED"],
+				)
+	return _catalog_cache
+
+
+def get_catalog_client() -> CatalogClient:
+	global _catalog_client
+	if _catalog_client is None:
+		with _catalog_client_lock:
+			if _catalog_client is None:
+				config = {
+					**DEFAULT_CATALOG_CLIENT,
+					**getattr(settings, "CATALOG_CLIENT", {}),
+				}
+				_catalog_client = CatalogClient(
+					product_url=config["PRODUCT_URL"],
+					products_url=config["PRODUCTS_URL"],
+					pool_size=config["POOL_SIZE"],
+					connect_timeout=config["CONNECT_TIMEOUT"],
+					read_timeout=config["READ_TIMEOUT"],
+					retries=config["RETRIES"],
+					backoff_factor=config["BACKOFF_FACTOR"],
+				)
+	return _catalog_client
+
+
+def get_catalog_breaker() -> CircuitBreaker:
+	global _catalog_breaker
+	if _catalog_breaker is None:
+		with _catalog_breaker_lock:
+			if _catalog_breaker is None:
+				config = {
+					**DEFAULT_CATALOG_CIRCUIT_BREAKER,
+					**getattr(settings, "CATALOG_CIRCUIT_BREAKER", {}),
+				}
+				_catalog_breaker = CircuitBreaker(
+					failure_threshold=config["FAILURE_THRESHOLD"],
+					reset_timeout=config["RESET_TIMEOUT"],
+				)
+	return _catalog_breaker
+
+
+def get_catalog_fallback_config() -> Dict[str, Any]:
+	return {
+		**DEFAULT_CATALOG_FALLBACK,
+		**getattr(settings, "CATALOG_FALLBACK", {}),
+	}
+
+
+def get_catalog_sync_config() -> Dict[str, Any]:
+	return {
+		**DEFAULT_CATALOG_SYNC,
+		**getattr(settings, "CATALOG_SYNC", {}),
+	}
+
+
+def get_async_catalog_client() -> AsyncCatalogClient:
+	# httpx clients are bound to the event loop they were first used on, so
+	# keep one per running loop. Under ASGI that is one per worker; loops that
+	# end sooner must call close_async_catalog_client() before they do.
+	loop = asyncio.get_running_loop()
+	client = _async_catalog_clients.get(loop)
+	if client is None:
+		config = {
+			**DEFAULT_CATALOG_CLIENT,
+			**getattr(settings, "CATALOG_CLIENT", {}),
+		}
+		client = AsyncCatalogClient(
+			product_url=config["PRODUCT_URL"],
+			pool_size=config["POOL_SIZE"],
+			connect_timeout=config["CONNECT_TIMEOUT"],
+			read_timeout=config["READ_TIMEOUT"],
+		)
+		_async_catalog_clients[loop] = client
+	return client
+
+
+async def close_async_catalog_client() -> None:
+	client = _async_catalog_clients.pop(asyncio.get_running_loop(), None)
+	if client is not None:
+		await client.aclose()
+
+
+@receiver(setting_changed)
+def _reset_catalog(*, setting: str, **kwargs: Any) -> None:
+	global _catalog_breaker, _catalog_cache, _catalog_client
+	if setting == "CATALOG_CACHE":
+		_catalog_cache = None
+	elif setting == "CATALOG_CIRCUIT_BREAKER":
+		_catalog_breaker = None
+	elif setting == "CATALOG_CLIENT":
+		if _catalog_client is not None:
+			_catalog_client.close()
+		_catalog_client = None
+		_async_catalog_clients.clear()
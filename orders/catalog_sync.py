@@ -0,0 +1,87 @@
+import logging
+import time
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from django.db import transaction
+
+from .cache import invalidate_orders_cache
+from .catalog import get_catalog_client, get_catalog_sync_config
+from .models import PRODUCT_CATALOG_FIELDS, Product
+
+
+logger = logging.getLogger(__name__)
+
+
+def sync_catalog(
+	since: Optional[datetime] = None,
+	batch_size: Optional[int] = None,
+) -> Dict[str, Any]:
+	config = get_catalog_sync_config()
+	batch_size = batch_size or config["BATCH_SIZE"]
+	stats = {
+		"fetched": 0,
+		"created": 0,
+		"updated": 0,
+		"unchanged": 0,
+		"skipped": 0,
+		"invalid": 0,
+		"write_seconds": 0.0,
+	}
+
+	started = time.perf_counter()
+	batch: Dict[str, Dict[str, Any]] = {}
+	for item in get_catalog_client().iter_products():
+		stats["fetched"] += 1
+		sku = _sku_for(item, config["SKU_FORMAT"])
+		if sku is None:
+			stats["invalid"] += 1
+			continue
+		batch[sku] = item
+		if len(batch) >= batch_size:
+			_write_batch(batch, since, stats)
+			batch = {}
+	if batch:
+		_write_batch(batch, since, stats)
+
+	if stats["created"] or stats["updated"]:
+		invalidate_orders_cache()
+	stats["total_seconds"] = time.perf_counter() - started
+	return stats
+
+
+def _sku_for(item: Any, sku_format: str) -> Optional[str]:
+	if not isinstance(item, dict) or not isinstance(item.get("id"), int):
+		logger.warning(f"Skipping catalog item without an integer id: {item!r}")
+		return None
+	if any(field not in item for field in PRODUCT_CATALOG_FIELDS):
+		logger.warning(f"Skipping incomplete catalog item {item['id']}.")
+		return None
+	return sku_format.format(product_id=item["id"])
+
+
+def _write_batch(
+	batch: Dict[str, Dict[str, Any]],
+	since: Optional[datetime],
+	stats: Dict[str, Any],
+) -> None:
+	started = time.perf_counter()
+	if since is not None:
+		fresh: List[str] = list(
+			Product.objects.filter(
+				sku__in=list(batch),
+				synced_at__gte=since,
+			).values_list("sku", flat=True)
+		)
+		for sku in fresh:
+			del batch[sku]
+		stats["skipped"] += len(fresh)
+
+	if batch:
+		with transaction.atomic():
+			_, created, updated = Product.sync_batch(batch)
+		stats["created"] += len(created)
+		stats["updated"] += len(updated)
+		stats["unchanged"] += len(batch) - len(created) - len(updated)
+	stats["write_seconds"] += time.perf_counter() - started
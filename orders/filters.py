@@ -0,0 +1,93 @@
+from datetime import date, datetime, time
+from typing import Optional
+
+from django.db.models import QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .models import OrderItem
+
+
+ORDER_ORDERINGS = {
+	"-created_at": ("-created_at", "-id"),
+	"created_at": ("created_at", "id"),
+	"-total_amount": ("-total_amount", "-id"),
+	"total_amount": ("total_amount", "id"),
+}
+
+
+def filter_orders(queryset: QuerySet, query_params) -> QuerySet:
+	client = query_params.get("client")
+	if client:
+		queryset = queryset.filter(client=client)
+
+	created_after = _parse_moment(query_params, "created_after")
+	if created_after is not None:
+		queryset = queryset.filter(created_at__gte=created_after)
+	created_before = _parse_moment(query_params, "created_before")
+	if created_before is not None:
+		queryset = queryset.filter(created_at__lt=created_before)
+
+	sku = query_params.get("sku")
+	if sku:
+		# A subquery rather than a join keeps the per-order totals computed
+		# over every line item, not only the matching one.
+		queryset = queryset.filter(
+			pk__in=OrderItem.objects.filter(product_id=sku).values("order_id")
+		)
+	return queryset
+
+
+def order_ordering(query_params) -> tuple:
+	value = query_params.get("ordering") or "-created_at"
+	if value not in ORDER_ORDERINGS:
+		choices = ", ".join(ORDER_ORDERINGS)
+		raise ValidationError({"ordering": f"Must be one of: {choices}."})
+	return ORDER_ORDERINGS[value]
+
+
+def filter_sales(queryset: QuerySet, query_params) -> QuerySet:
+	client = query_params.get("client")
+	if client:
+		queryset = queryset.filter(client=client)
+
+	start = _parse_day(query_params, "start")
+	if start is not None:
+		queryset = queryset.filter(day__gte=start)
+	end = _parse_day(query_params, "end")
+	if end is not None:
+		queryset = queryset.filter(day__lte=end)
+	return queryset
+
+
+def _parse_day(query_params, name: str) -> Optional[date]:
+	value = query_params.get(name)
+	if not value:
+		return None
+	try:
+		day = parse_date(value)
+	except ValueError:
+		day = None
+	if day is None:
+		raise ValidationError({name: "Invalid date format."})
+	return day
+
+
+def _parse_moment(query_params, name: str) -> Optional[datetime]:
+	value = query_params.get(name)
+	if not value:
+		return None
+	try:
+		moment = parse_datetime(value)
+		if moment is None:
+			day = parse_date(value)
+			if day is not None:
+				moment = datetime.combine(day, time.min)
+	except ValueError:
+		moment = None
+	if moment is None:
+		raise ValidationError({name: "Invalid date format."})
+	if timezone.is_naive(moment):
+		moment = timezone.make_aware(moment, timezone.get_current_timezone())
+	return moment
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import logging
+import time
+
+from datetime import timedelta
+from typing import Any, Callable, Dict, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from . import metrics
+from .models import IdempotencyKey
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ORDERS_IDEMPOTENCY = {
+	"TTL": 24 * 60 * 60,
+	"WAIT_TIMEOUT": 10.0,
+	"POLL_INTERVAL": 0.05,
+	"LOCK_TIMEOUT": 60.0,
+}
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+STORED_HEADERS = ("Location", "Preference-Applied")
+MAX_KEY_LENGTH = 255
+RETRYABLE_STATUSES = (
+	status.HTTP_408_REQUEST_TIMEOUT,
+	status.HTTP_409_CONFLICT,
+	status.HTTP_429_TOO_MANY_REQUESTS,
+)
+
+
+def get_idempotency_config() -> Dict[str, Any]:
+	return {
+		**DEFAULT_ORDERS_IDEMPOTENCY,
+		**getattr(settings, "ORDERS_IDEMPOTENCY", {}),
+	}
+
+
+def request_fingerprint(payload: Any) -> str:
+	encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+	return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def run_idempotent(key: str, payload: Any, handler: Callable[[], Response]) -> Response:
+	if not key or len(key) > MAX_KEY_LENGTH:
+		return Response(
+			{"errors": {IDEMPOTENCY_HEADER: f"Must be 1 to {MAX_KEY_LENGTH} characters."}},
+			status=status.HTTP_400_BAD_REQUEST,
+		)
+
+	config = get_idempotency_config()
+	fingerprint = request_fingerprint(payload)
+	deadline = time.monotonic() + config["WAIT_TIMEOUT"]
+	while True:
+		record, created = _claim(key, fingerprint, config)
+		if created:
+			return _execute(record, handler)
+		if record.fingerprint != fingerprint:
+			metrics.increment("orders_idempotency_total", outcome="mismatch")
+			return Response(
+				{
+					"errors": {
+						IDEMPOTENCY_HEADER: "Key was already used with a different request body."
+					}
+				},
+				status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+			)
+		if record.status == IdempotencyKey.Status.COMPLETED:
+			metrics.increment("orders_idempotency_total", outcome="replayed")
+			return _replay(record)
+		if time.monotonic() >= deadline:
+			metrics.increment("orders_idempotency_total", outcome="conflict")
+			return Response(
+				{"error": "A request with this Idempotency-Key is still being processed."},
+				status=status.HTTP_409_CONFLICT,
+				headers={"Retry-After": "1"},
+			)
+		time.sleep(config["POLL_INTERVAL"])
+
+
+def purge_expired() -> int:
+	deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+	return deleted
+
+
+def _claim(
+	key: str,
+	fingerprint: str,
+	config: Dict[str, Any],
+) -> Tuple[IdempotencyKey, bool]:
+	while True:
+		now = timezone.now()
+		try:
+			with transaction.atomic():
+				record = IdempotencyKey.objects.create(
+					key=key,
+					fingerprint=fingerprint,
+					expires_at=now + timedelta(seconds=config["TTL"]),
+				)
+			return record, True
+		except IntegrityError:
+			pass
+
+		try:
+			record = IdempotencyKey.objects.get(key=key)
+		except IdempotencyKey.DoesNotExist:
+			# The in-flight request failed and released the key; claim it.
+			continue
+
+		stale = (
+			record.status == IdempotencyKey.Status.IN_PROGRESS
+			and record.updated_at < now - timedelta(seconds=config["LOCK_TIMEOUT"])
+		)
+		if record.expires_at <= now or stale:
+			logger.info(f"Reclaiming {'stale' if stale else 'expired'} idempotency key {key}.")
+			IdempotencyKey.objects.filter(
+				key=key,
+				updated_at=record.updated_at,
+			).delete()
+			continue
+		return record, False
+
+
+def _execute(record: IdempotencyKey, handler: Callable[[], Response]) -> Response:
+	try:
+		response = handler()
+	except BaseException:
+		_release(record)
+		raise
+
+	if not _is_final(response.status_code):
+		# Outages (503 once retries run out), timeouts and server errors say
+		# nothing about the request itself; let a retry run it again.
+		_release(record)
+		return response
+
+	stored = _owned(record).update(
+		status=IdempotencyKey.Status.COMPLETED,
+		response_status=response.status_code,
+		response_body=(
+			json.loads(JSONRenderer().render(response.data))
+			if response.data is not None
+			else None
+		),
+		response_headers={
+			name: response[name] for name in STORED_HEADERS if response.has_header(name)
+		},
+		updated_at=timezone.now(),
+	)
+	if not stored:
+		logger.warning(
+			f"Idempotency key {record.key} was reclaimed while its request ran; "
+			"response not stored."
+		)
+		metrics.increment("orders_idempotency_total", outcome="reclaimed")
+		return response
+	metrics.increment("orders_idempotency_total", outcome="executed")
+	return response
+
+
+def _owned(record: IdempotencyKey) -> QuerySet:
+	# After LOCK_TIMEOUT a waiter may delete this claim and create its own;
+	# only touch the row if it is still the one this request created.
+	return IdempotencyKey.objects.filter(
+		key=record.key,
+		fingerprint=record.fingerprint,
+		updated_at=record.updated_at,
+		status=IdempotencyKey.Status.IN_PROGRESS,
+	)
+
+
+def _release(record: IdempotencyKey) -> None:
+	_owned(record).delete()
+
+
+def _is_final(status_code: int) -> bool:
+	return status_code < 500 and status_code not in RETRYABLE_STATUSES
+
+
+def _replay(record: IdempotencyKey) -> Response:
+	return Response(
+		data=record.response_body,
+		status=record.response_status,
+		headers={**record.response_headers, REPLAYED_HEADER: "true"},
+	)
@@ -0,0 +1,107 @@
+import contextvars
+import threading
+import time
+
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from . import metrics
+
+
+class RequestStats:
+	def __init__(self) -> None:
+		self._lock = threading.Lock()
+		self.db_queries = 0
+		self.db_seconds = 0.0
+		self.catalog_calls = 0
+		self.catalog_seconds = 0.0
+		self.serialization_seconds = 0.0
+
+	def add(self, **values: float) -> None:
+		# Catalog lookups run on worker threads that share this object.
+		with self._lock:
+			for name, value in values.items():
+				setattr(self, name, getattr(self, name) + value)
+
+
+_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+	"orders_request_stats",
+	default=None,
+)
+
+
+def current_stats() -> Optional[RequestStats]:
+	return _request_stats.get()
+
+
+def start_request() -> contextvars.Token:
+	return _request_stats.set(RequestStats())
+
+
+def end_request(token: contextvars.Token) -> None:
+	_request_stats.reset(token)
+
+
+def _record_query(
+	execute: Callable[..., Any],
+	sql: str,
+	params: Any,
+	many: bool,
+	context: Any,
+) -> Any:
+	stats = _request_stats.get()
+	if stats is None:
+		return execute(sql, params, many, context)
+	started = time.perf_counter()
+	try:
+		return execute(sql, params, many, context)
+	finally:
+		stats.add(db_queries=1, db_seconds=time.perf_counter() - started)
+
+
+@receiver(connection_created)
+def _instrument_connection(*, connection: Any, **kwargs: Any) -> None:
+	if _record_query not in connection.execute_wrappers:
+		connection.execute_wrappers.append(_record_query)
+
+
+@contextmanager
+def catalog_call() -> Iterator[None]:
+	started = time.perf_counter()
+	outcome = "error"
+	try:
+		yield
+		outcome = "ok"
+	finally:
+		elapsed = time.perf_counter() - started
+		metrics.observe("catalog_request_duration_seconds", elapsed, outcome=outcome)
+		stats = _request_stats.get()
+		if stats is not None:
+			stats.add(catalog_calls=1, catalog_seconds=elapsed)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+	started = time.perf_counter()
+	try:
+		yield
+	finally:
+		metrics.observe(
+			"orders_phase_duration_seconds",
+			time.perf_counter() - started,
+			phase=name,
+		)
+
+
+@contextmanager
+def serialization() -> Iterator[None]:
+	started = time.perf_counter()
+	try:
+		yield
+	finally:
+		stats = _request_stats.get()
+		if stats is not None:
+			stats.add(serialization_seconds=time.perf_counter() - started)
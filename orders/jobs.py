@@ -0,0 +1,80 @@
+import logging
+
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import OrderItem, OrderJob
+from .retry import is_transient
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ORDERS_JOB_MAX_ATTEMPTS = 3
+
+
+def enqueue_order(order_payload: Dict[str, Any]) -> OrderJob:
+	OrderItem._parse_order_payload(order_payload)
+	return OrderJob.objects.create(payload=order_payload)
+
+
+def claim_job(batch_size: int = 10) -> Optional[OrderJob]:
+	candidates = (
+		OrderJob.objects.filter(status=OrderJob.Status.PENDING)
+		.order_by("created_at")
+		.values_list("pk", flat=True)[:batch_size]
+	)
+	for job_id in candidates:
+		claimed = OrderJob.objects.filter(
+			pk=job_id,
+			status=OrderJob.Status.PENDING,
+		).update(
+			status=OrderJob.Status.PROCESSING,
+			attempts=F("attempts") + 1,
+			updated_at=timezone.now(),
+		)
+		if claimed:
+			return OrderJob.objects.get(pk=job_id)
+	return None
+
+
+def run_job(job: OrderJob) -> OrderJob:
+	max_attempts = getattr(
+		settings, "ORDERS_JOB_MAX_ATTEMPTS", DEFAULT_ORDERS_JOB_MAX_ATTEMPTS
+	)
+	try:
+		order = OrderItem.create_or_update_order_with_items(job.payload)
+	except Exception as error:
+		transient = is_transient(error) or not isinstance(error, ValidationError)
+		if transient and job.attempts < max_attempts:
+			logger.warning(f"Job {job.pk} attempt {job.attempts} failed: {error}. Requeued.")
+			job.status = OrderJob.Status.PENDING
+		elif transient:
+			logger.error(f"Job {job.pk} failed after {job.attempts} attempts: {error}")
+			job.status = OrderJob.Status.FAILED
+		else:
+			logger.warning(f"Job {job.pk} rejected: {error}")
+			job.status = OrderJob.Status.FAILED
+		if isinstance(error, ValidationError):
+			job.errors = error.detail
+		else:
+			job.errors = {"error": str(error)}
+	else:
+		logger.info(f"Job {job.pk} created order {order.pk}.")
+		job.status = OrderJob.Status.SUCCEEDED
+		job.order = order
+		job.errors = None
+	job.save(update_fields=["status", "order", "errors", "updated_at"])
+	return job
+
+
+def requeue_stale_jobs(stale_after: float) -> int:
+	cutoff = timezone.now() - timedelta(seconds=stale_after)
+	return OrderJob.objects.filter(
+		status=OrderJob.Status.PROCESSING,
+		updated_at__lt=cutoff,
+	).update(status=OrderJob.Status.PENDING, updated_at=timezone.now())
@@ -0,0 +1,67 @@
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List
+
+from rest_framework import serializers
+
+from .instrumentation import serialization
+from .models import OrderItem
+
+
+ORDER_LIST_FIELDS = ("id", "client", "created_at", "total_amount", "item_count")
+
+
+def serialize_orders(
+	rows: Iterable[Dict[str, Any]],
+	include_products: bool = True,
+) -> List[Dict[str, Any]]:
+	rows = list(rows)
+
+	items = []
+	if include_products and rows:
+		items = list(
+			OrderItem.objects.filter(
+				order_id__in=[row["id"] for row in rows]
+			).values_list(
+				"order_id",
+				"product__sku",
+				"product__title",
+				"product__price",
+				"quantity",
+			)
+		)
+
+	with serialization():
+		return _build_orders(rows, items, include_products)
+
+
+def _build_orders(
+	rows: List[Dict[str, Any]],
+	items: List[tuple],
+	include_products: bool,
+) -> List[Dict[str, Any]]:
+	created_at_field = serializers.DateTimeField()
+	products_by_order: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+	if include_products:
+		for order_id, sku, title, price, quantity in items:
+			products_by_order[order_id].append(
+				{
+					"sku": sku,
+					"title": title,
+					"price": price,
+					"quantity": quantity,
+				}
+			)
+
+	orders = []
+	for row in rows:
+		order = {
+			"id": row["id"],
+			"client": row["client"],
+			"created_at": created_at_field.to_representation(row["created_at"]),
+		}
+		if include_products:
+			order["products"] = products_by_order.get(row["id"], [])
+		order["total_amount"] = round(float(row["total_amount"]), 2)
+		order["item_count"] = row["item_count"]
+		orders.append(order)
+	return orders
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F, Q
+
+from orders.models import Order
+
+
+class Command(BaseCommand):
+	help = "Compare the stored order totals with their line items."
+
+	def add_arguments(self, parser):
+		parser.add_argument(
+			"--fix",
+			action="store_true",
+			help="Recompute the totals of every order that does not match.",
+		)
+		parser.add_argument(
+			"--tolerance",
+			type=float,
+			default=0.005,
+			help="Allowed difference in total_amount (default: 0.005).",
+		)
+
+	def handle(self, *args, **options):
+		mismatched = (
+			Order.objects.with_expected_totals()
+			.filter(
+				~Q(item_count=F("expected_item_count"))
+				| Q(
+					total_amount__gt=F("expected_total_amount") + options["tolerance"]
+				)
+				| Q(
+					total_amount__lt=F("expected_total_amount") - options["tolerance"]
+				)
+			)
+			.values_list(
+				"pk",
+				"total_amount",
+				"expected_total_amount",
+				"item_count",
+				"expected_item_count",
+			)
+		)
+		ids = []
+		for pk, total, expected_total, items, expected_items in mismatched.iterator():
+			ids.append(pk)
+			self.stdout.write(
+				f"Order {pk}: total_amount {total} (expected {expected_total}), "
+				f"item_count {items} (expected {expected_items})"
+			)
+
+		if not ids:
+			self.stdout.write(self.style.SUCCESS("All order totals match."))
+			return
+		if not options["fix"]:
+			raise CommandError(f"{len(ids)} order(s) have stale totals.")
+		fixed = 0
+		for start in range(0, len(ids), 500):
+			fixed += Order.objects.filter(pk__in=ids[start : start + 500]).refresh_totals()
+		self.stdout.write(self.style.SUCCESS(f"Fixed {fixed} order(s)."))
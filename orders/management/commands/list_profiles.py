@@ -0,0 +1,68 @@
+import pstats
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.profiling import iter_profiles, profile_directory, profile_path
+
+
+class Command(BaseCommand):
+	help = "List request profiles captured by ProfilerMiddleware, or show one."
+
+	def add_arguments(self, parser):
+		parser.add_argument("profile_id", nargs="?", help="Profile to summarize.")
+		parser.add_argument(
+			"--sort",
+			default="cumulative",
+			help="pstats sort key used when summarizing (default: cumulative).",
+		)
+		parser.add_argument(
+			"--limit",
+			type=int,
+			default=25,
+			help="Number of functions shown when summarizing (default: 25).",
+		)
+		parser.add_argument(
+			"--queries",
+			action="store_true",
+			help="Also print the captured SQL when summarizing.",
+		)
+
+	def handle(self, *args, **options):
+		if options["profile_id"]:
+			self._summarize(options)
+			return
+
+		profiles = list(iter_profiles())
+		if not profiles:
+			self.stdout.write(f"No profiles in {profile_directory()}.")
+			return
+		for profile in profiles:
+			self.stdout.write(
+				f"{profile['id']}  {profile['method']} {profile['url']}  "
+				f"status={profile['status']}  {profile['duration_seconds'] * 1000:.1f}ms  "
+				f"queries={profile['queries']['count']}  "
+				f"payload={profile['payload_bytes']}B"
+			)
+
+	def _summarize(self, options):
+		profile_id = options["profile_id"]
+		metadata = next(
+			(profile for profile in iter_profiles() if profile["id"] == profile_id),
+			None,
+		)
+		path = profile_path(profile_id)
+		if metadata is None or not path.exists():
+			raise CommandError(f"Profile {profile_id} not found in {profile_directory()}.")
+
+		self.stdout.write(f"{metadata['method']} {metadata['url']}")
+		self.stdout.write(
+			f"Status {metadata['status']} in {metadata['duration_seconds'] * 1000:.1f}ms, "
+			f"{metadata['queries']['count']} queries "
+			f"({metadata['queries']['seconds'] * 1000:.1f}ms), "
+			f"payload {metadata['payload_bytes']} bytes"
+		)
+		if options["queries"]:
+			for query in metadata["queries"]["log"]:
+				self.stdout.write(f"  [{query['time']}s] {query['sql']}")
+		stats = pstats.Stats(str(path), stream=self.stdout)
+		stats.sort_stats(options["sort"]).print_stats(options["limit"])
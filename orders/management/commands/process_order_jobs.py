@@ -0,0 +1,91 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from orders.jobs import claim_job, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+	help = "Process queued orders submitted with `Prefer: respond-async`."
+
+	def add_arguments(self, parser):
+		parser.add_argument(
+			"--concurrency",
+			type=int,
+			default=1,
+			help="Number of worker threads (default: 1).",
+		)
+		parser.add_argument(
+			"--poll-interval",
+			type=float,
+			default=1.0,
+			help="Seconds to wait when the queue is empty (default: 1).",
+		)
+		parser.add_argument(
+			"--stale-after",
+			type=float,
+			default=300.0,
+			help="Requeue jobs stuck in processing for this many seconds (default: 300).",
+		)
+		parser.add_argument(
+			"--once",
+			action="store_true",
+			help="Exit once the queue is empty instead of polling.",
+		)
+
+	def handle(self, *args, **options):
+		self.stop = threading.Event()
+		self.processed = 0
+		self.lock = threading.Lock()
+		concurrency = max(1, options["concurrency"])
+
+		requeued = requeue_stale_jobs(options["stale_after"])
+		if requeued:
+			self.stdout.write(f"Requeued {requeued} stale job(s).")
+
+		if concurrency == 1:
+			self._work(options)
+		else:
+			workers = [
+				threading.Thread(target=self._work_in_thread, args=(options,))
+				for _ in range(concurrency)
+			]
+			for worker in workers:
+				worker.start()
+			try:
+				while any(worker.is_alive() for worker in workers):
+					for worker in workers:
+						worker.join(timeout=0.5)
+			except KeyboardInterrupt:
+				self.stop.set()
+				for worker in workers:
+					worker.join()
+
+		self.stdout.write(self.style.SUCCESS(f"Processed {self.processed} job(s)."))
+
+	def _work_in_thread(self, options):
+		try:
+			self._work(options)
+		finally:
+			connection.close()
+
+	def _work(self, options):
+		last_requeue = time.monotonic()
+		while not self.stop.is_set():
+			close_old_connections()
+			job = claim_job()
+			if job is None:
+				if options["once"]:
+					return
+				if time.monotonic() - last_requeue >= options["stale_after"]:
+					requeue_stale_jobs(options["stale_after"])
+					last_requeue = time.monotonic()
+				self.stop.wait(options["poll_interval"])
+				continue
+
+			job = run_job(job)
+			with self.lock:
+				self.processed += 1
+			self.stdout.write(f"Job {job.pk}: {job.status}")
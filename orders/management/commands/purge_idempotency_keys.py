@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from orders.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+	help = "Delete stored Idempotency-Key responses whose TTL has passed."
+
+	def handle(self, *args, **options):
+		deleted = purge_expired()
+		self.stdout.write(self.style.SUCCESS(f"Purged {deleted} expired key(s)."))
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from orders.models import ClientDailySales
+
+
+class Command(BaseCommand):
+	help = "Rebuild the per-client daily sales rollup from every order."
+
+	def add_arguments(self, parser):
+		parser.add_argument(
+			"--batch-size",
+			type=int,
+			default=1000,
+			help="Rollup rows written per INSERT (default: 1000).",
+		)
+
+	def handle(self, *args, **options):
+		started = time.perf_counter()
+		rows = ClientDailySales.rebuild(batch_size=max(1, options["batch_size"]))
+		elapsed = time.perf_counter() - started
+		self.stdout.write(
+			self.style.SUCCESS(f"Rebuilt {rows} rollup row(s) in {elapsed:.2f}s.")
+		)
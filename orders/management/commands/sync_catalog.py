@@ -0,0 +1,55 @@
+import requests
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime, parse_duration
+
+from orders.catalog_sync import sync_catalog
+
+
+class Command(BaseCommand):
+	help = "Fetch the whole product catalog and upsert every Product in batches."
+
+	def add_arguments(self, parser):
+		parser.add_argument(
+			"--since",
+			help=(
+				"Skip products already synced at or after this point: an ISO 8601 "
+				"datetime or a duration ago such as 01:00:00 or P1D."
+			),
+		)
+		parser.add_argument(
+			"--batch-size",
+			type=int,
+			help="Products written per transaction (default: CATALOG_SYNC BATCH_SIZE).",
+		)
+
+	def handle(self, *args, **options):
+		since = self._parse_since(options["since"]) if options["since"] else None
+		try:
+			stats = sync_catalog(since=since, batch_size=options["batch_size"])
+		except (requests.RequestException, ValueError) as exc:
+			raise CommandError(f"Catalog sync failed: {exc}") from exc
+
+		self.stdout.write(
+			f"Fetched {stats['fetched']} product(s): {stats['created']} created, "
+			f"{stats['updated']} updated, {stats['unchanged']} unchanged, "
+			f"{stats['skipped']} skipped, {stats['invalid']} invalid."
+		)
+		self.stdout.write(
+			self.style.SUCCESS(
+				f"Synced in {stats['total_seconds']:.2f}s "
+				f"({stats['write_seconds']:.2f}s writing)."
+			)
+		)
+
+	def _parse_since(self, value):
+		moment = parse_datetime(value)
+		if moment is not None:
+			if timezone.is_naive(moment):
+				moment = timezone.make_aware(moment)
+			return moment
+		duration = parse_duration(value)
+		if duration is not None:
+			return timezone.now() - duration
+		raise CommandError(f"Invalid --since value: {value}")
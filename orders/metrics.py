@@ -0,0 +1,156 @@
+import bisect
+import math
+import threading
+
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+
+Labels = Tuple[Tuple[str, str], ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+_lock = threading.Lock()
+_counters: Dict[Tuple[str, Labels], float] = defaultdict(float)
+_gauges: Dict[Tuple[str, Labels], float] = {}
+_histograms: Dict[Tuple[str, Labels], "Histogram"] = {}
+
+
+class Histogram:
+	def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+		self.buckets = tuple(sorted(buckets))
+		self.counts = [0] * (len(self.buckets) + 1)
+		self.sum = 0.0
+		self.count = 0
+
+	def observe(self, value: float) -> None:
+		self.counts[bisect.bisect_left(self.buckets, value)] += 1
+		self.sum += value
+		self.count += 1
+
+	def cumulative(self) -> List[Tuple[float, int]]:
+		total = 0
+		rows = []
+		for bound, count in zip((*self.buckets, math.inf), self.counts):
+			total += count
+			rows.append((bound, total))
+		return rows
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+	return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def increment(name: str, value: float = 1, **labels: object) -> None:
+	with _lock:
+		_counters[(name, _labels(labels))] += value
+
+
+def set_counter(name: str, value: float, **labels: object) -> None:
+	# For counters kept elsewhere (cache hits, pool requests) and mirrored here.
+	with _lock:
+		_counters[(name, _labels(labels))] = value
+
+
+def counter_value(name: str, **labels: object) -> float:
+	with _lock:
+		return _counters.get((name, _labels(labels)), 0)
+
+
+def counters() -> Dict[Tuple[str, Labels], float]:
+	with _lock:
+		return dict(_counters)
+
+
+def set_gauge(name: str, value: float, **labels: object) -> None:
+	with _lock:
+		_gauges[(name, _labels(labels))] = value
+
+
+def observe(
+	name: str,
+	value: float,
+	buckets: Sequence[float] = DEFAULT_BUCKETS,
+	**labels: object,
+) -> None:
+	key = (name, _labels(labels))
+	with _lock:
+		histogram = _histograms.get(key)
+		if histogram is None:
+			histogram = _histograms[key] = Histogram(buckets)
+		histogram.observe(value)
+
+
+def histogram(name: str, **labels: object) -> Dict[str, object]:
+	with _lock:
+		found = _histograms.get((name, _labels(labels)))
+		if found is None:
+			return {"count": 0, "sum": 0.0, "buckets": []}
+		return {
+			"count": found.count,
+			"sum": found.sum,
+			"buckets": found.cumulative(),
+		}
+
+
+def reset() -> None:
+	with _lock:
+		_counters.clear()
+		_gauges.clear()
+		_histograms.clear()
+
+
+def render_prometheus() -> str:
+	with _lock:
+		counters_ = sorted(_counters.items())
+		gauges = sorted(_gauges.items())
+		histograms = sorted(
+			(key, value.cumulative(), value.sum, value.count)
+			for key, value in _histograms.items()
+		)
+
+	lines: List[str] = []
+	typed = set()
+
+	def declare(name: str, kind: str) -> None:
+		if name not in typed:
+			typed.add(name)
+			lines.append(f"# TYPE {name} {kind}")
+
+	for (name, labels), value in counters_:
+		declare(name, "counter")
+		lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+	for (name, labels), value in gauges:
+		declare(name, "gauge")
+		lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+	for (name, labels), buckets, total, count in histograms:
+		declare(name, "histogram")
+		for bound, cumulative in buckets:
+			le = "+Inf" if bound == math.inf else _format_value(bound)
+			bucket_labels = _format_labels((*labels, ("le", le)))
+			lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+		lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+		lines.append(f"{name}_count{_format_labels(labels)} {count}")
+	return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Labels) -> str:
+	if not labels:
+		return ""
+	pairs = ",".join(
+		'{}="{}"'.format(
+			key,
+			value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+		)
+		for key, value in labels
+	)
+	return f"{{{pairs}}}"
+
+
+def _format_value(value: float) -> str:
+	if isinstance(value, bool):
+		return str(int(value))
+	if isinstance(value, float) and value.is_integer():
+		return str(int(value))
+	return repr(value)
@@ -0,0 +1,186 @@
+import cProfile
+import time
+
+from typing import Any, Callable, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import HttpRequest, HttpResponse
+from django.urls import Resolver404, resolve
+from django.test.utils import CaptureQueriesContext
+
+from . import metrics
+from .instrumentation import RequestStats, current_stats, end_request, start_request
+from .profiling import get_profiler_config, save_profile, summarize_queries
+
+
+class RequestMetricsMiddleware:
+	sync_capable = True
+	async_capable = True
+
+	def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+		self.get_response = get_response
+		# Stay on the event loop under ASGI; a sync-only middleware would push
+		# every async view back onto a worker thread.
+		if iscoroutinefunction(get_response):
+			markcoroutinefunction(self)
+
+	def __call__(self, request: HttpRequest) -> Any:
+		if iscoroutinefunction(self):
+			return self.__acall__(request)
+		token = start_request()
+		stats = current_stats()
+		started = time.perf_counter()
+		try:
+			response = self.get_response(request)
+		finally:
+			end_request(token)
+		return self._record(request, response, stats, time.perf_counter() - started)
+
+	async def __acall__(self, request: HttpRequest) -> HttpResponse:
+		token = start_request()
+		stats = current_stats()
+		started = time.perf_counter()
+		try:
+			response = await self.get_response(request)
+		finally:
+			end_request(token)
+		return self._record(request, response, stats, time.perf_counter() - started)
+
+	@staticmethod
+	def _record(
+		request: HttpRequest,
+		response: HttpResponse,
+		stats: RequestStats,
+		elapsed: float,
+	) -> HttpResponse:
+		match = getattr(request, "resolver_match", None)
+		labels = {
+			"method": request.method,
+			"route": getattr(match, "route", None) or "unmatched",
+		}
+		metrics.observe(
+			"http_request_duration_seconds",
+			elapsed,
+			status=response.status_code,
+			**labels,
+		)
+		metrics.observe(
+			"http_request_db_queries",
+			stats.db_queries,
+			buckets=metrics.COUNT_BUCKETS,
+			**labels,
+		)
+		metrics.observe("http_request_db_duration_seconds", stats.db_seconds, **labels)
+		metrics.observe(
+			"http_request_catalog_calls",
+			stats.catalog_calls,
+			buckets=metrics.COUNT_BUCKETS,
+			**labels,
+		)
+		metrics.observe(
+			"http_request_catalog_duration_seconds",
+			stats.catalog_seconds,
+			**labels,
+		)
+		metrics.observe(
+			"http_request_serialization_duration_seconds",
+			stats.serialization_seconds,
+			**labels,
+		)
+		response["Server-Timing"] = ", ".join(
+			(
+				f'db;desc="{stats.db_queries} queries";dur={stats.db_seconds * 1000:.1f}',
+				f'catalog;desc="{stats.catalog_calls} calls"'
+				f";dur={stats.catalog_seconds * 1000:.1f}",
+				f"serialize;dur={stats.serialization_seconds * 1000:.1f}",
+				f"total;dur={elapsed * 1000:.1f}",
+			)
+		)
+		return response
+
+	def process_template_response(self, request: HttpRequest, response: Any) -> Any:
+		# DRF responses are rendered after the view returns; count that as
+		# serialization too.
+		stats = current_stats()
+		if stats is not None:
+			started = time.perf_counter()
+
+			def rendered(response: Any) -> None:
+				stats.add(serialization_seconds=time.perf_counter() - started)
+
+			response.add_post_render_callback(rendered)
+		return response
+
+
+class ProfilerMiddleware:
+	sync_capable = True
+	async_capable = True
+
+	def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+		config = get_profiler_config()
+		if not config["ENABLED"]:
+			raise MiddlewareNotUsed
+		self.get_response = get_response
+		self.header = config["HEADER"]
+		self.query_param = config["QUERY_PARAM"]
+		if iscoroutinefunction(get_response):
+			markcoroutinefunction(self)
+
+	def __call__(self, request: HttpRequest) -> Any:
+		if iscoroutinefunction(self):
+			# cProfile only follows one thread of execution; async requests
+			# pass straight through so they stay on the event loop.
+			return self.get_response(request)
+		if not self._requested(request):
+			return self.get_response(request)
+		return self._profile(request)
+
+	def _profile(self, request: HttpRequest) -> HttpResponse:
+		profile = cProfile.Profile()
+		started = time.perf_counter()
+		with CaptureQueriesContext(connection) as queries:
+			# Rendering happens inside get_response, so serialization is
+			# part of the profile.
+			response = profile.runcall(self.get_response, request)
+		duration = time.perf_counter() - started
+		profile_id = save_profile(
+			profile,
+			{
+				"method": request.method,
+				"path": request.path,
+				"url": request.get_full_path(),
+				"status": response.status_code,
+				"request_bytes": int(request.META.get("CONTENT_LENGTH") or 0),
+				"payload_bytes": self._payload_bytes(response),
+				"duration_seconds": duration,
+				"user": str(request.user) if hasattr(request, "user") else None,
+				"queries": {
+					**summarize_queries(queries.captured_queries),
+					"log": queries.captured_queries,
+				},
+			},
+		)
+		response["X-Profile-Id"] = profile_id
+		return response
+
+	def _requested(self, request: HttpRequest) -> bool:
+		if self.header not in request.headers and self.query_param not in request.GET:
+			return False
+		if not settings.DEBUG:
+			user = getattr(request, "user", None)
+			if user is None or not user.is_staff:
+				return False
+		try:
+			match = resolve(request.path_info, getattr(request, "urlconf", None))
+		except Resolver404:
+			return True
+		return not iscoroutinefunction(match.func)
+
+	@staticmethod
+	def _payload_bytes(response: HttpResponse) -> Optional[int]:
+		if getattr(response, "streaming", False):
+			return None
+		return len(response.content)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 02:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_orderjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='synced_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-17 02:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0010_order_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('client', models.CharField(max_length=128)),
+                ('day', models.DateField()),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('item_count', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'ordering': ['day', 'client'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'client'), name='clientdailysales_day_client_uniq')],
+            },
+        ),
+    ]
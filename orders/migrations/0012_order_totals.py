@@ -0,0 +1,50 @@
+# Generated by Django 5.2.6 on 2026-10-17 02:19
+
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, F, FloatField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_order_totals(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    items = OrderItem.objects.filter(order=OuterRef('pk')).order_by().values('order')
+    line_total = ExpressionWrapper(
+        F('quantity') * F('product__price'),
+        output_field=FloatField(),
+    )
+    Order.objects.update(
+        total_amount=Coalesce(
+            Subquery(items.annotate(total=Sum(line_total)).values('total')),
+            Value(0.0),
+        ),
+        item_count=Coalesce(
+            Subquery(items.annotate(count=Sum('quantity')).values('count')),
+            Value(0),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0011_clientdailysales'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='total_amount',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['-total_amount', '-id'], name='order_total_amount_id_idx'),
+        ),
+        migrations.RunPython(backfill_order_totals, migrations.RunPython.noop),
+    ]
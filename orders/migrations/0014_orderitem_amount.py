@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-17 02:37
+
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, F, FloatField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_item_amounts(apps, schema_editor):
+    # The accepted prices were never stored; existing lines are valued at the
+    # current product price, which is what their order totals already used.
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    Product = apps.get_model('orders', 'Product')
+    price = Subquery(Product.objects.filter(sku=OuterRef('product_id')).values('price'))
+    OrderItem.objects.update(
+        amount=ExpressionWrapper(F('quantity') * price, output_field=FloatField()),
+    )
+    items = OrderItem.objects.filter(order=OuterRef('pk')).order_by().values('order')
+    Order.objects.update(
+        total_amount=Coalesce(
+            Subquery(items.annotate(total=Sum('amount')).values('total')),
+            Value(0.0),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0013_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='amount',
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(backfill_item_amounts, migrations.RunPython.noop),
+    ]
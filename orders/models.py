@@ -1,33 +1,119 @@
+import asyncio
+import contextvars
+import logging
 import re
+import uuid
+import httpx
 import requests
 
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from decimal import Decimal, InvalidOperation
-from typing import Any, Dict, Iterable
-
-from django.db import models, transaction
+from typing import Any, Dict, Iterable, List
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import (
+	Count,
+	F,
+	OuterRef,
+	Subquery,
+	Sum,
+	Value,
+)
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 
+from .cache import invalidate_orders_cache
+from .catalog import (
+	CatalogCircuitOpen,
+	CatalogUnavailable,
+	get_async_catalog_client,
+	get_catalog_breaker,
+	get_catalog_cache,
+	get_catalog_client,
+	get_catalog_fallback_config,
+	get_catalog_sync_config,
+)
+from .instrumentation import phase
 from .utils import normalize_timestamp
 
 
-FAKESTORE_PRODUCT_URL = "https://fakestoreapi.com/products/{product_id}"
+logger = logging.getLogger(__name__)
+
+PRODUCT_CATALOG_FIELDS = ("price", "title", "description", "category")
+
+
+def _order_totals() -> Dict[str, Any]:
+	items = OrderItem.objects.filter(order=OuterRef("pk")).order_by().values("order")
+	return {
+		"total_amount": Coalesce(
+			Subquery(items.annotate(total=Sum("amount")).values("total")),
+			Value(0.0),
+		),
+		"item_count": Coalesce(
+			Subquery(items.annotate(count=Sum("quantity")).values("count")),
+			Value(0),
+		),
+	}
+
+
+class OrderQuerySet(models.QuerySet):
+	def with_expected_totals(self) -> "OrderQuerySet":
+		totals = _order_totals()
+		return self.annotate(
+			expected_total_amount=totals["total_amount"],
+			expected_item_count=totals["item_count"],
+		)
+
+	def refresh_totals(self) -> int:
+		return self.update(**_order_totals(), updated_at=timezone.now())
 
 
 class Order(models.Model):
 	client = models.CharField(max_length=128)
 	created_at = models.DateTimeField(auto_now_add=True)
+	updated_at = models.DateTimeField(auto_now=True, db_index=True)
+	# Kept in step with the line items (at the prices accepted when they were
+	# written) by every write path; `manage.py check_order_totals` verifies them.
+	total_amount = models.FloatField(default=0)
+	item_count = models.PositiveIntegerField(default=0)
 	products = models.ManyToManyField(
 		"Product",
 		through="OrderItem",
 		related_name="orders",
 	)
 
+	objects = OrderQuerySet.as_manager()
+
 	class Meta:
 		ordering = ["-created_at"]
+		indexes = [
+			models.Index(
+				fields=["-created_at", "-id"],
+				name="order_created_at_id_idx",
+			),
+			models.Index(
+				fields=["client", "-created_at", "-id"],
+				name="order_client_created_idx",
+			),
+			models.Index(
+				fields=["-total_amount", "-id"],
+				name="order_total_amount_id_idx",
+			),
+		]
 
 	def __str__(self) -> str:
 		return f"Order #{self.pk} for {self.client}"
 
+	def refresh_totals(self) -> None:
+		Order.objects.filter(pk=self.pk).refresh_totals()
+		self.refresh_from_db(fields=["total_amount", "item_count", "updated_at"])
+
 
 class Product(models.Model):
 	sku = models.CharField(max_length=8, primary_key=True)
@@ -35,14 +121,20 @@ class Product(models.Model):
 	title = models.CharField(max_length=128, default="")
 	description = models.TextField(default="", blank=True)
 	category = models.CharField(max_length=32, default="", blank=True)
+	updated_at = models.DateTimeField(auto_now=True, db_index=True)
+	synced_at = models.DateTimeField(null=True, blank=True)
 
 	def __str__(self) -> str:
 		return f"{self.sku}{self.title or ''} (${self.price})"
 
 	@staticmethod
 	def ensure(item_payload: Dict[str, Any]) -> "Product":
+		return Product._sync_from_catalog(**Product._parse_item(item_payload))
+
+	@staticmethod
+	def _parse_item(item_payload: Dict[str, Any]) -> Dict[str, Any]:
 		sku = item_payload.get("sku")
-		if not sku:
+		if not sku or not isinstance(sku, str):
 			raise ValidationError({"productos": "Each product requires an SKU."})
 
 		unit_price = item_payload.get("precio_unitario")
@@ -60,28 +152,181 @@ class Product(models.Model):
 				{"productos": f"Invalid SKU format for product {sku}."}
 			) from exc
 
-		product_attrs = {
+		return {
 			"sku": sku,
 			"product_id": product_id,
 			"unit_price": unit_price,
 		}
-		return Product._sync_from_catalog(**product_attrs)
 
 	@staticmethod
-	def _sync_from_catalog(**product_attrs: Any) -> "Product":
-		sku = product_attrs["sku"]
-		product_id = product_attrs["product_id"]
-		unit_price = product_attrs["unit_price"]
+	def resolve_catalog(skus_by_product_id: Dict[int, str]) -> Dict[int, Dict[str, Any]]:
+		results = Product.resolve_catalog_results(skus_by_product_id)
+		for result in results.values():
+			if isinstance(result, Exception):
+				raise result
+		return results
+
+	@staticmethod
+	def resolve_catalog_results(
+		skus_by_product_id: Dict[int, str],
+	) -> Dict[int, Dict[str, Any] | ValidationError]:
+		results = Product._resolve_locally(skus_by_product_id)
+		remaining = {
+			product_id: sku
+			for product_id, sku in skus_by_product_id.items()
+			if product_id not in results
+		}
+		if len(remaining) <= 1:
+			results.update(
+				(product_id, Product._fetch_catalog_result(sku, product_id))
+				for product_id, sku in remaining.items()
+			)
+			return Product._apply_local_fallback(skus_by_product_id, results)
+
+		max_workers = min(
+			getattr(settings, "CATALOG_MAX_WORKERS", 8),
+			len(remaining),
+		)
+		with ThreadPoolExecutor(max_workers=max_workers) as executor:
+			# Run each lookup in a copy of this context so per-request
+			# instrumentation sees the catalog calls made on worker threads.
+			futures = {
+				product_id: executor.submit(
+					contextvars.copy_context().run,
+					Product._fetch_catalog_result,
+					sku,
+					product_id,
+				)
+				for product_id, sku in remaining.items()
+			}
+			results.update(
+				(product_id, future.result())
+				for product_id, future in futures.items()
+			)
+		return Product._apply_local_fallback(skus_by_product_id, results)
+
+	@staticmethod
+	def _resolve_locally(
+		skus_by_product_id: Dict[int, str],
+	) -> Dict[int, Dict[str, Any]]:
+		# Rows refreshed by `manage.py sync_catalog` within LOCAL_MAX_AGE seconds
+		# are trusted without asking the catalog.
+		max_age = get_catalog_sync_config()["LOCAL_MAX_AGE"]
+		if not max_age or not skus_by_product_id:
+			return {}
+		product_ids = {sku: product_id for product_id, sku in skus_by_product_id.items()}
+		payloads = Product._local_payloads(list(product_ids), max_age)
+		return {product_ids[sku]: payload for sku, payload in payloads.items()}
+
+	@staticmethod
+	def _apply_local_fallback(
+		skus_by_product_id: Dict[int, str],
+		results: Dict[int, Dict[str, Any] | ValidationError],
+	) -> Dict[int, Dict[str, Any] | ValidationError]:
+		config = get_catalog_fallback_config()
+		unavailable = {
+			skus_by_product_id[product_id]: product_id
+			for product_id, result in results.items()
+			if isinstance(result, CatalogUnavailable)
+		}
+		if not config["ENABLED"] or not unavailable:
+			return results
+
+		payloads = Product._local_payloads(list(unavailable), config["MAX_STALENESS"])
+		for sku, payload in payloads.items():
+			logger.warning(
+				f"Catalog unavailable; using local data for product {sku} "
+				f"synced at {payload['synced_at'].isoformat()}."
+			)
+			results[unavailable[sku]] = payload
+		return results
+
+	@staticmethod
+	def _local_payloads(skus: Iterable[str], max_age: float) -> Dict[str, Dict[str, Any]]:
+		fresh_after = timezone.now() - timedelta(seconds=max_age)
+		payloads = {}
+		for product in Product.objects.filter(sku__in=skus, synced_at__gte=fresh_after):
+			payload = {field: getattr(product, field) for field in PRODUCT_CATALOG_FIELDS}
+			payload["synced_at"] = product.synced_at
+			payloads[product.sku] = payload
+		return payloads
+
+	@staticmethod
+	def _fetch_catalog_result(
+		sku: str,
+		product_id: int,
+	) -> Dict[str, Any] | ValidationError:
 		try:
-			response = requests.get(
-				FAKESTORE_PRODUCT_URL.format(product_id=product_id),
-				timeout=5,
+			return Product._fetch_catalog_payload(sku, product_id)
+		except ValidationError as error:
+			return error
+
+	@staticmethod
+	def _fetch_catalog_payload(sku: str, product_id: int) -> Dict[str, Any]:
+		cache = get_catalog_cache()
+		cached = cache.get(product_id)
+		if cached is not None:
+			return cached
+
+		breaker = get_catalog_breaker()
+		if not breaker.allow():
+			raise CatalogCircuitOpen(
+				{"productos": f"Unable to fetch product {sku} from catalog."}
 			)
+		try:
+			response = get_catalog_client().get_product(product_id)
 		except requests.RequestException as exc:
-			raise ValidationError(
+			breaker.record_failure()
+			raise Product._catalog_unavailable(sku) from exc
+		except BaseException:
+			# Cancellation or an unexpected error must still end a half-open
+			# trial, or the breaker would reject every later lookup.
+			breaker.record_failure()
+			raise
+		breaker.record_response(response.status_code)
+
+		payload = Product._parse_catalog_response(sku, response)
+		cache.set(product_id, payload)
+		return payload
+
+	@staticmethod
+	async def _afetch_catalog_payload(sku: str, product_id: int) -> Dict[str, Any]:
+		cache = get_catalog_cache()
+		cached = cache.get(product_id)
+		if cached is not None:
+			return cached
+
+		breaker = get_catalog_breaker()
+		if not breaker.allow():
+			raise CatalogCircuitOpen(
 				{"productos": f"Unable to fetch product {sku} from catalog."}
-			) from exc
+			)
+		try:
+			response = await get_async_catalog_client().get_product(product_id)
+		except httpx.HTTPError as exc:
+			breaker.record_failure()
+			raise Product._catalog_unavailable(sku) from exc
+		except BaseException:
+			# Cancellation or an unexpected error must still end a half-open
+			# trial, or the breaker would reject every later lookup.
+			breaker.record_failure()
+			raise
+		breaker.record_response(response.status_code)
+
+		payload = Product._parse_catalog_response(sku, response)
+		cache.set(product_id, payload)
+		return payload
 
+	@staticmethod
+	def _catalog_unavailable(sku: str) -> CatalogUnavailable:
+		return CatalogUnavailable(
+			{"productos": f"Unable to fetch product {sku} from catalog."}
+		)
+
+	@staticmethod
+	def _parse_catalog_response(sku: str, response: Any) -> Dict[str, Any]:
+		if response.status_code >= 500:
+			raise Product._catalog_unavailable(sku)
 		if response.status_code != 200:
 			raise ValidationError(
 				{"productos": f"Product {sku} not found in external catalog."}
@@ -94,12 +339,49 @@ class Product(models.Model):
 				{"productos": "Invalid response from product catalog."}
 			) from exc
 
-		for field in ("title", "price", "description", "category"):
+		for field in PRODUCT_CATALOG_FIELDS:
 			if field not in payload:
 				raise ValidationError(
 					{"productos": "Incomplete product information received."}
 				)
 
+		return payload
+
+	@staticmethod
+	async def aresolve_catalog(
+		skus_by_product_id: Dict[int, str],
+	) -> Dict[int, Dict[str, Any]]:
+		results = await sync_to_async(Product._resolve_locally)(skus_by_product_id)
+		product_ids = [
+			product_id for product_id in skus_by_product_id if product_id not in results
+		]
+		payloads = await asyncio.gather(
+			*(
+				Product._afetch_catalog_payload(skus_by_product_id[product_id], product_id)
+				for product_id in product_ids
+			),
+			return_exceptions=True,
+		)
+		results.update(zip(product_ids, payloads))
+		if any(isinstance(result, CatalogUnavailable) for result in payloads):
+			results = await sync_to_async(Product._apply_local_fallback)(
+				skus_by_product_id,
+				results,
+			)
+		for result in results.values():
+			if isinstance(result, BaseException):
+				raise result
+		return results
+
+	@staticmethod
+	def _sync_from_catalog(**product_attrs: Any) -> "Product":
+		sku = product_attrs["sku"]
+		payload = Product._fetch_catalog_payload(sku, product_attrs["product_id"])
+		Product._check_price(sku, product_attrs["unit_price"], payload)
+		return Product._upsert_from_catalog(sku, payload)
+
+	@staticmethod
+	def _check_price(sku: str, unit_price: Any, payload: Dict[str, Any]) -> float:
 		try:
 			request_price = Decimal(str(unit_price))
 			catalog_price = Decimal(str(payload["price"]))
@@ -117,19 +399,69 @@ class Product(models.Model):
 				}
 			)
 
-		price_value = float(catalog_price)
-		defaults = {"price": price_value}
-		product, _ = Product.objects.get_or_create(sku=sku, defaults=defaults)
-		updates = {
-			"price": price_value,
-			"title": payload["title"],
-			"description": payload["description"],
-			"category": payload["category"],
-		}
-		for field, value in updates.items():
-			setattr(product, field, value)
-		product.save(update_fields=list(updates.keys()))
-		return product
+		return float(catalog_price)
+
+	@staticmethod
+	def _upsert_from_catalog(sku: str, payload: Dict[str, Any]) -> "Product":
+		return Product.sync_many({sku: payload})[sku]
+
+	@staticmethod
+	def _catalog_fields(payload: Dict[str, Any]) -> Dict[str, Any]:
+		fields = {field: payload[field] for field in PRODUCT_CATALOG_FIELDS}
+		fields["price"] = float(Decimal(str(payload["price"])))
+		return fields
+
+	@staticmethod
+	def sync_many(payloads_by_sku: Dict[str, Dict[str, Any]]) -> Dict[str, "Product"]:
+		return Product.sync_batch(payloads_by_sku)[0]
+
+	@staticmethod
+	def sync_batch(
+		payloads_by_sku: Dict[str, Dict[str, Any]],
+	) -> tuple[Dict[str, "Product"], List["Product"], List["Product"]]:
+		products = Product.objects.in_bulk(list(payloads_by_sku))
+		now = timezone.now()
+		touch_interval = timedelta(
+			seconds=get_catalog_fallback_config()["TOUCH_INTERVAL"]
+		)
+		new_products = []
+		changed_products = []
+		touched_products = []
+		for sku, payload in payloads_by_sku.items():
+			fields = Product._catalog_fields(payload)
+			# Local fallback payloads carry the time their data was last synced.
+			synced_at = payload.get("synced_at") or now
+			product = products.get(sku)
+			if product is None:
+				product = Product(sku=sku, synced_at=synced_at, **fields)
+				products[sku] = product
+				new_products.append(product)
+				continue
+			changed = False
+			for field, value in fields.items():
+				if getattr(product, field) != value:
+					setattr(product, field, value)
+					changed = True
+			stale = (
+				product.synced_at is None
+				or synced_at - product.synced_at >= touch_interval
+			)
+			if changed:
+				product.updated_at = now
+				changed_products.append(product)
+			elif stale:
+				touched_products.append(product)
+			if changed or stale:
+				product.synced_at = synced_at
+
+		if new_products:
+			Product.objects.bulk_create(new_products)
+		if changed_products or touched_products:
+			Product.objects.bulk_update(
+				[*changed_products, *touched_products],
+				[*PRODUCT_CATALOG_FIELDS, "updated_at", "synced_at"],
+			)
+		return products, new_products, changed_products
 
 
 class OrderItem(models.Model):
@@ -137,15 +469,82 @@ class OrderItem(models.Model):
 	order = models.ForeignKey(Order, on_delete=models.CASCADE)
 	product = models.ForeignKey(Product, on_delete=models.CASCADE)
 	quantity = models.PositiveIntegerField(default=1)
+	# Sum of quantity × unit price accepted by each write that added to this
+	# line, so later catalog price changes leave order totals alone.
+	amount = models.FloatField(default=0)
+
+	class Meta:
+		indexes = [
+			models.Index(
+				fields=["product", "order"],
+				name="orderitem_product_order_idx",
+			),
+		]
+
+	@classmethod
+	def from_db(cls, db, field_names, values):
+		instance = super().from_db(db, field_names, values)
+		instance._loaded_quantity = instance.__dict__.get("quantity")
+		return instance
+
+	def save(self, *args: Any, **kwargs: Any) -> None:
+		# Items saved one at a time (admin, shell) are valued at the product's
+		# current price when they are added without an amount or their
+		# quantity is edited.
+		loaded_quantity = getattr(self, "_loaded_quantity", self.quantity)
+		if not self.amount or self.quantity != loaded_quantity:
+			self.amount = float(self.quantity * self.product.price)
+			update_fields = kwargs.get("update_fields")
+			if update_fields is not None and "amount" not in update_fields:
+				kwargs["update_fields"] = [*update_fields, "amount"]
+		super().save(*args, **kwargs)
+		self._loaded_quantity = self.quantity
 
 	def __str__(self) -> str:
 		order_reference = getattr(self.order, "pk", None)
 		return f"{self.quantity} × {self.product} for order #{order_reference or '?'}"
 
 	@staticmethod
-	@transaction.atomic
 	def create_or_update_order_with_items(order_payload: Dict[str, Any]) -> Order:
-        
+		order_data = OrderItem._parse_order_payload(order_payload)
+		lines = order_data["lines"]
+
+		with phase("catalog"):
+			catalog = Product.resolve_catalog(
+				{line["product_id"]: line["sku"] for line in lines}
+			)
+		return OrderItem._commit_order(order_data, catalog)
+
+	@staticmethod
+	async def acreate_or_update_order_with_items(order_payload: Dict[str, Any]) -> Order:
+		order_data = OrderItem._parse_order_payload(order_payload)
+		lines = order_data["lines"]
+
+		with phase("catalog"):
+			catalog = await Product.aresolve_catalog(
+				{line["product_id"]: line["sku"] for line in lines}
+			)
+		return await sync_to_async(OrderItem._commit_order)(order_data, catalog)
+
+	@staticmethod
+	def _commit_order(
+		order_data: Dict[str, Any],
+		catalog: Dict[int, Dict[str, Any]],
+	) -> Order:
+		for line in order_data["lines"]:
+			Product._check_price(
+				line["sku"],
+				line["unit_price"],
+				catalog[line["product_id"]],
+			)
+
+		with phase("write"), transaction.atomic():
+			order = OrderItem._write_order(order_data, catalog)
+			invalidate_orders_cache()
+		return order
+
+	@staticmethod
+	def _parse_order_payload(order_payload: Dict[str, Any]) -> Dict[str, Any]:
 		if not isinstance(order_payload, dict):
 			raise ValidationError("Invalid payload.")
 
@@ -156,11 +555,51 @@ class OrderItem(models.Model):
 		productos: Iterable[Dict[str, Any]] = order_payload.get("productos", [])
 		if not productos:
 			raise ValidationError({"productos": "At least one product must be provided."})
+		if not isinstance(productos, list) or not all(
+			isinstance(item_payload, dict) for item_payload in productos
+		):
+			raise ValidationError({"productos": "Must be a list of products."})
+
+		fecha = order_payload.get("fecha")
+		if fecha is not None and not isinstance(fecha, str):
+			raise ValidationError({"fecha": "Invalid date format."})
+		timestamp = normalize_timestamp(fecha)
 
-		timestamp = normalize_timestamp(order_payload.get("fecha"))
+		lines = []
+		for item_payload in productos:
+			line = Product._parse_item(item_payload)
+			sku = line["sku"]
+			quantity = item_payload.get("cantidad")
+			if quantity is None:
+				message = f"Product {sku} requires quantity."
+				raise ValidationError({"productos": message})
+			try:
+				quantity_int = int(quantity)
+			except (TypeError, ValueError) as exc:
+				message = f"Invalid quantity for product {sku}."
+				raise ValidationError({"productos": message}) from exc
+			if quantity_int <= 0:
+				message = f"Quantity must be positive for product {sku}."
+				raise ValidationError({"productos": message})
+			line["quantity"] = quantity_int
+			lines.append(line)
+
+		return {
+			"id": order_payload.get("id"),
+			"client": client,
+			"timestamp": timestamp,
+			"lines": lines,
+		}
 
-		order_id = order_payload.get("id")
-		order_defaults = {"client": client}
+	@staticmethod
+	def _write_order(
+		order_data: Dict[str, Any],
+		catalog: Dict[int, Dict[str, Any]],
+		sync_products: bool = True,
+	) -> Order:
+		order_id = order_data["id"]
+		timestamp = order_data["timestamp"]
+		order_defaults = {"client": order_data["client"]}
 
 		if order_id is None:
 			order = Order.objects.create(**order_defaults)
@@ -175,32 +614,217 @@ class OrderItem(models.Model):
 			Order.objects.filter(pk=order.pk).update(created_at=timestamp)
 			order.created_at = timestamp
 
-		for item_payload in productos:
-			product = Product.ensure(item_payload)
-			quantity = item_payload.get("cantidad")
-			if quantity is None:
-				message = f"Product {product.sku} requires quantity."
-				raise ValidationError({"productos": message})
-			try:
-				quantity_int = int(quantity)
-			except (TypeError, ValueError) as exc:
-				message = f"Invalid quantity for product {product.sku}."
-				raise ValidationError({"productos": message}) from exc
-			if quantity_int <= 0:
-				message = f"Quantity must be positive for product {product.sku}."
-				raise ValidationError({"productos": message})
+		quantities: Dict[str, int] = {}
+		product_ids: Dict[str, int] = {}
+		for line in order_data["lines"]:
+			sku = line["sku"]
+			quantities[sku] = quantities.get(sku, 0) + line["quantity"]
+			product_ids[sku] = line["product_id"]
 
-			existing_item = OrderItem.objects.filter(order=order, product=product).first()
-			if existing_item:
-				existing_item.quantity += quantity_int
-				existing_item.save(update_fields=["quantity"])
-			else:
-				OrderItem.objects.create(
-					order=order,
-					product=product,
-					quantity=quantity_int,
-				)
+		if sync_products:
+			Product.sync_many(
+				{sku: catalog[product_id] for sku, product_id in product_ids.items()}
+			)
 
+		prices = {
+			sku: Decimal(str(catalog[product_id]["price"]))
+			for sku, product_id in product_ids.items()
+		}
+		OrderItem._merge_items(order, quantities, prices)
+		order.refresh_totals()
+		ClientDailySales.record(
+			client=order.client,
+			day=timezone.localdate(order.created_at),
+			orders=1 if created else 0,
+			items=sum(quantities.values()),
+			revenue=sum(
+				(prices[sku] * quantity for sku, quantity in quantities.items()),
+				Decimal(0),
+			),
+		)
 		return order
 
+	@staticmethod
+	def _merge_items(
+		order: Order,
+		quantities: Dict[str, int],
+		prices: Dict[str, Decimal],
+	) -> None:
+		existing_items = list(
+			OrderItem.objects.filter(order=order, product_id__in=quantities.keys())
+		)
+		for item in existing_items:
+			quantity = quantities[item.product_id]
+			item.quantity += quantity
+			item.amount += float(prices[item.product_id] * quantity)
+		if existing_items:
+			OrderItem.objects.bulk_update(existing_items, ["quantity", "amount"])
+
+		existing_skus = {item.product_id for item in existing_items}
+		new_items = [
+			OrderItem(
+				order=order,
+				product_id=sku,
+				quantity=quantity,
+				amount=float(prices[sku] * quantity),
+			)
+			for sku, quantity in quantities.items()
+			if sku not in existing_skus
+		]
+		if new_items:
+			OrderItem.objects.bulk_create(new_items)
+
+
+class OrderJob(models.Model):
+	class Status(models.TextChoices):
+		PENDING = "pending", "Pending"
+		PROCESSING = "processing", "Processing"
+		SUCCEEDED = "succeeded", "Succeeded"
+		FAILED = "failed", "Failed"
+
+	id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+	status = models.CharField(
+		max_length=16,
+		choices=Status.choices,
+		default=Status.PENDING,
+	)
+	payload = models.JSONField()
+	order = models.ForeignKey(
+		Order,
+		null=True,
+		blank=True,
+		on_delete=models.SET_NULL,
+		related_name="jobs",
+	)
+	errors = models.JSONField(null=True, blank=True)
+	attempts = models.PositiveIntegerField(default=0)
+	created_at = models.DateTimeField(auto_now_add=True)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	class Meta:
+		ordering = ["created_at"]
+		indexes = [
+			models.Index(
+				fields=["status", "created_at"],
+				name="orderjob_status_created_idx",
+			),
+		]
+
+	def __str__(self) -> str:
+		return f"Job {self.pk} ({self.status})"
+
+
+class IdempotencyKey(models.Model):
+	class Status(models.TextChoices):
+		IN_PROGRESS = "in_progress", "In progress"
+		COMPLETED = "completed", "Completed"
+
+	key = models.CharField(max_length=255, primary_key=True)
+	fingerprint = models.CharField(max_length=64)
+	status = models.CharField(
+		max_length=16,
+		choices=Status.choices,
+		default=Status.IN_PROGRESS,
+	)
+	response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+	response_body = models.JSONField(null=True, blank=True)
+	response_headers = models.JSONField(default=dict, blank=True)
+	created_at = models.DateTimeField(auto_now_add=True)
+	updated_at = models.DateTimeField(auto_now=True)
+	expires_at = models.DateTimeField(db_index=True)
+
+	class Meta:
+		ordering = ["created_at"]
+
+	def __str__(self) -> str:
+		return f"Idempotency key {self.key} ({self.status})"
+
 
+class ClientDailySales(models.Model):
+	client = models.CharField(max_length=128)
+	day = models.DateField()
+	order_count = models.PositiveIntegerField(default=0)
+	item_count = models.PositiveIntegerField(default=0)
+	revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+	class Meta:
+		ordering = ["day", "client"]
+		constraints = [
+			models.UniqueConstraint(
+				fields=["day", "client"],
+				name="clientdailysales_day_client_uniq",
+			),
+		]
+
+	def __str__(self) -> str:
+		return f"{self.client} on {self.day}: {self.revenue}"
+
+	@staticmethod
+	def record(
+		client: str,
+		day: Any,
+		orders: int,
+		items: int,
+		revenue: Decimal,
+	) -> None:
+		increments = {
+			"order_count": F("order_count") + orders,
+			"item_count": F("item_count") + items,
+			"revenue": F("revenue") + revenue,
+		}
+		if ClientDailySales.objects.filter(client=client, day=day).update(**increments):
+			return
+		try:
+			with transaction.atomic():
+				ClientDailySales.objects.create(
+					client=client,
+					day=day,
+					order_count=orders,
+					item_count=items,
+					revenue=revenue,
+				)
+		except IntegrityError:
+			# Another writer created the row first.
+			ClientDailySales.objects.filter(client=client, day=day).update(**increments)
+
+	@staticmethod
+	def rebuild(batch_size: int = 1000) -> int:
+		rows = (
+			Order.objects.annotate(day=TruncDate("created_at"))
+			.values("client", "day")
+			.annotate(
+				orders=Count("id", distinct=True),
+				items=Coalesce(Sum("orderitem__quantity"), 0),
+				amount=Coalesce(Sum("orderitem__amount"), Value(0.0)),
+			)
+			.order_by("day", "client")
+		)
+		with transaction.atomic():
+			ClientDailySales.objects.all().delete()
+			batch = []
+			total = 0
+			for row in rows.iterator(chunk_size=batch_size):
+				batch.append(
+					ClientDailySales(
+						client=row["client"],
+						day=row["day"],
+						order_count=row["orders"],
+						item_count=row["items"],
+						revenue=Decimal(str(round(row["amount"], 2))),
+					)
+				)
+				if len(batch) >= batch_size:
+					ClientDailySales.objects.bulk_create(batch)
+					total += len(batch)
+					batch = []
+			ClientDailySales.objects.bulk_create(batch)
+			total += len(batch)
+		return total
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def _refresh_order_totals(*, instance: OrderItem, **kwargs: Any) -> None:
+	# Bulk writes in _write_order refresh totals themselves; this covers
+	# items saved one at a time (admin, shell).
+	Order.objects.filter(pk=instance.order_id).refresh_totals()
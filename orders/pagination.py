@@ -0,0 +1,149 @@
+import base64
+import binascii
+import json
+
+from typing import Any, Dict, List, Optional, Sequence
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Model, Q, QuerySet
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.urls import replace_query_param
+
+
+DEFAULT_ORDERS_PAGE_SIZE = 50
+DEFAULT_ORDERS_MAX_PAGE_SIZE = 500
+
+
+class KeysetPagination:
+	cursor_query_param = "cursor"
+	page_size_query_param = "page_size"
+
+	def __init__(self, ordering: Sequence[str] = ("-created_at", "-id")) -> None:
+		self.ordering = tuple(ordering)
+		self.page_size = getattr(settings, "ORDERS_PAGE_SIZE", DEFAULT_ORDERS_PAGE_SIZE)
+		self.max_page_size = getattr(
+			settings, "ORDERS_MAX_PAGE_SIZE", DEFAULT_ORDERS_MAX_PAGE_SIZE
+		)
+
+	def paginate_queryset(self, queryset: QuerySet, request) -> List[Any]:
+		self.request = request
+		self.model = queryset.model
+		page_size = self._get_page_size(request)
+		position, reverse = self._decode_cursor(
+			request.query_params.get(self.cursor_query_param)
+		)
+
+		ordering = self._reversed_ordering() if reverse else self.ordering
+		queryset = queryset.order_by(*ordering)
+		if position is not None:
+			queryset = queryset.filter(self._seek_filter(ordering, position))
+
+		rows = list(queryset[: page_size + 1])
+		has_more = len(rows) > page_size
+		rows = rows[:page_size]
+		if reverse:
+			rows.reverse()
+
+		self.next_position = self.previous_position = None
+		if rows:
+			if reverse:
+				has_next, has_previous = True, has_more
+			else:
+				has_next, has_previous = has_more, position is not None
+			if has_next:
+				self.next_position = self._position(rows[-1])
+			if has_previous:
+				self.previous_position = self._position(rows[0])
+		return rows
+
+	def get_links(self) -> Dict[str, Optional[str]]:
+		return {
+			"next": self._link(self.next_position, reverse=False),
+			"previous": self._link(self.previous_position, reverse=True),
+		}
+
+	def _get_page_size(self, request) -> int:
+		raw = request.query_params.get(self.page_size_query_param)
+		if raw is None:
+			return self.page_size
+		try:
+			page_size = int(raw)
+		except ValueError as exc:
+			raise ValidationError(
+				{self.page_size_query_param: "A positive integer is required."}
+			) from exc
+		if page_size <= 0:
+			raise ValidationError(
+				{self.page_size_query_param: "A positive integer is required."}
+			)
+		return min(page_size, self.max_page_size)
+
+	def _field_names(self) -> List[str]:
+		return [field.lstrip("-") for field in self.ordering]
+
+	def _reversed_ordering(self) -> tuple:
+		return tuple(
+			field[1:] if field.startswith("-") else f"-{field}"
+			for field in self.ordering
+		)
+
+	def _position(self, row: Model | Dict[str, Any]) -> List[Any]:
+		if isinstance(row, dict):
+			return [row[name] for name in self._field_names()]
+		return [getattr(row, name) for name in self._field_names()]
+
+	def _seek_filter(self, ordering: Sequence[str], position: List[Any]) -> Q:
+		seek = Q()
+		for index in reversed(range(len(ordering))):
+			field = ordering[index]
+			name = field.lstrip("-")
+			lookup = "lt" if field.startswith("-") else "gt"
+			condition = Q(**{f"{name}__{lookup}": position[index]})
+			if index < len(ordering) - 1:
+				condition |= Q(**{name: position[index]}) & seek
+			seek = condition
+		return seek
+
+	def _encode_cursor(self, position: List[Any], reverse: bool) -> str:
+		values = [
+			value.isoformat() if hasattr(value, "isoformat") else str(value)
+			for value in position
+		]
+		raw = json.dumps({"p": values, "r": reverse}, separators=(",", ":"))
+		return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+	def _decode_cursor(self, cursor: Optional[str]) -> tuple:
+		if not cursor:
+			return None, False
+		try:
+			padded = cursor + "=" * (-len(cursor) % 4)
+			data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+			values = data["p"]
+			reverse = bool(data.get("r", False))
+			names = self._field_names()
+			if len(values) != len(names):
+				raise ValueError("Cursor does not match ordering.")
+			position = [
+				self.model._meta.get_field(name).to_python(value)
+				for name, value in zip(names, values)
+			]
+		except (
+			binascii.Error,
+			UnicodeDecodeError,
+			ValueError,
+			TypeError,
+			KeyError,
+			DjangoValidationError,
+		) as exc:
+			raise ValidationError({self.cursor_query_param: "Invalid cursor."}) from exc
+		if any(value is None for value in position):
+			raise ValidationError({self.cursor_query_param: "Invalid cursor."})
+		return position, reverse
+
+	def _link(self, position: Optional[List[Any]], reverse: bool) -> Optional[str]:
+		if position is None:
+			return None
+		url = self.request.build_absolute_uri()
+		cursor = self._encode_cursor(position, reverse)
+		return replace_query_param(url, self.cursor_query_param, cursor)
@@ -0,0 +1,69 @@
+import cProfile
+import json
+import re
+import time
+import uuid
+
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+from django.conf import settings
+from django.utils import timezone
+
+
+DEFAULT_ORDERS_PROFILER = {
+	"ENABLED": False,
+	"DIRECTORY": "profiles",
+	"HEADER": "X-Profile",
+	"QUERY_PARAM": "profile",
+}
+
+
+def get_profiler_config() -> Dict[str, Any]:
+	return {
+		**DEFAULT_ORDERS_PROFILER,
+		**getattr(settings, "ORDERS_PROFILER", {}),
+	}
+
+
+def profile_directory() -> Path:
+	return Path(get_profiler_config()["DIRECTORY"])
+
+
+def save_profile(
+	profile: cProfile.Profile,
+	metadata: Dict[str, Any],
+) -> str:
+	directory = profile_directory()
+	directory.mkdir(parents=True, exist_ok=True)
+	slug = re.sub(r"[^a-zA-Z0-9]+", "-", metadata["path"]).strip("-") or "root"
+	profile_id = (
+		f"{time.strftime('%Y%m%dT%H%M%S')}-{metadata['method'].lower()}-{slug}"
+		f"-{uuid.uuid4().hex[:8]}"
+	)
+	profile.dump_stats(directory / f"{profile_id}.prof")
+	metadata = {"id": profile_id, "created_at": timezone.now().isoformat(), **metadata}
+	(directory / f"{profile_id}.json").write_text(json.dumps(metadata, indent=2))
+	return profile_id
+
+
+def iter_profiles() -> Iterator[Dict[str, Any]]:
+	directory = profile_directory()
+	if not directory.is_dir():
+		return
+	for path in sorted(directory.glob("*.json")):
+		try:
+			yield json.loads(path.read_text())
+		except (OSError, ValueError):
+			continue
+
+
+def profile_path(profile_id: str) -> Path:
+	return profile_directory() / f"{profile_id}.prof"
+
+
+def summarize_queries(queries: List[Dict[str, Any]]) -> Dict[str, Any]:
+	return {
+		"count": len(queries),
+		"seconds": sum(float(query["time"]) for query in queries),
+	}
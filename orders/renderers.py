@@ -0,0 +1,17 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class NDJSONRenderer(BaseRenderer):
+	media_type = "application/x-ndjson"
+	format = "ndjson"
+	charset = "utf-8"
+
+	def render(self, data, accepted_media_type=None, renderer_context=None):
+		# Exports are streamed by the view; this covers the other responses
+		# negotiated to NDJSON (304s, errors) as a single line.
+		if data is None:
+			return b""
+		return f"{json.dumps(data, cls=JSONEncoder)}\n".encode(self.charset)
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import random
+import time
+
+from typing import Any, Callable
+
+from django.conf import settings
+from django.db import OperationalError
+
+from . import metrics
+from .catalog import CatalogCircuitOpen, CatalogUnavailable
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ORDERS_RETRY = {
+	"MAX_ATTEMPTS": 4,
+	"BASE_DELAY": 0.1,
+	"MAX_DELAY": 2.0,
+}
+
+
+def transient_reason(error: BaseException) -> str | None:
+	if isinstance(error, CatalogUnavailable):
+		return "catalog_unavailable"
+	if isinstance(error, OperationalError) and "database is locked" in str(error):
+		return "database_locked"
+	return None
+
+
+def is_transient(error: BaseException) -> bool:
+	return transient_reason(error) is not None
+
+
+class RetryPolicy:
+	def __init__(
+		self,
+		max_attempts: int = 4,
+		base_delay: float = 0.1,
+		max_delay: float = 2.0,
+		sleep: Callable[[float], None] = time.sleep,
+		jitter: Callable[[float, float], float] = random.uniform,
+	) -> None:
+		self.max_attempts = max(1, max_attempts)
+		self.base_delay = base_delay
+		self.max_delay = max_delay
+		self._sleep = sleep
+		self._jitter = jitter
+
+	@classmethod
+	def from_settings(cls, **kwargs: Any) -> "RetryPolicy":
+		config = {**DEFAULT_ORDERS_RETRY, **getattr(settings, "ORDERS_RETRY", {})}
+		return cls(
+			max_attempts=config["MAX_ATTEMPTS"],
+			base_delay=config["BASE_DELAY"],
+			max_delay=config["MAX_DELAY"],
+			**kwargs,
+		)
+
+	def delay(self, attempt: int) -> float:
+		ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+		return self._jitter(0, ceiling)
+
+	def _should_retry(
+		self,
+		error: BaseException,
+		attempt: int,
+		operation: str,
+	) -> float | None:
+		reason = transient_reason(error)
+		if reason is None:
+			return None
+		if isinstance(error, CatalogCircuitOpen):
+			# The breaker already decided the catalog is down; waiting here
+			# would only hold the request until it reopens.
+			logger.warning(f"Not retrying {operation}: catalog circuit is open.")
+			return None
+		if attempt >= self.max_attempts:
+			metrics.increment(
+				"orders_retries_exhausted_total",
+				operation=operation,
+				reason=reason,
+			)
+			logger.error(f"All {attempt} attempts of {operation} failed: {error}")
+			return None
+		delay = self.delay(attempt)
+		metrics.increment("orders_retries_total", operation=operation, reason=reason)
+		logger.warning(
+			f"Attempt {attempt} of {operation} failed ({reason}): {error}. "
+			f"Retrying in {delay:.2f}s..."
+		)
+		return delay
+
+	def call(
+		self,
+		func: Callable[..., Any],
+		*args: Any,
+		operation: str = "call",
+		**kwargs: Any,
+	) -> Any:
+		attempt = 1
+		while True:
+			try:
+				return func(*args, **kwargs)
+			except Exception as error:
+				delay = self._should_retry(error, attempt, operation)
+				if delay is None:
+					raise
+			self._sleep(delay)
+			attempt += 1
+
+	async def acall(
+		self,
+		func: Callable[..., Any],
+		*args: Any,
+		operation: str = "call",
+		**kwargs: Any,
+	) -> Any:
+		attempt = 1
+		while True:
+			try:
+				return await func(*args, **kwargs)
+			except Exception as error:
+				delay = self._should_retry(error, attempt, operation)
+				if delay is None:
+					raise
+			await asyncio.sleep(delay)
+			attempt += 1
@@ -1,17 +1,34 @@
 from rest_framework import serializers
 
-from .models import Order
+from .models import ClientDailySales, Order, OrderJob
 
 
-class OrderSerializer(serializers.ModelSerializer):
-    products = serializers.SerializerMethodField()
+class OrderSummarySerializer(serializers.ModelSerializer):
     total_amount = serializers.SerializerMethodField()
+    item_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Order
-        fields = ["id", "client", "created_at", "products", "total_amount"]
+        fields = ["id", "client", "created_at", "total_amount", "item_count"]
         read_only_fields = ["id", "created_at"]
 
+    def get_total_amount(self, order):
+        return round(float(order.total_amount), 2)
+
+
+class OrderSerializer(OrderSummarySerializer):
+    products = serializers.SerializerMethodField()
+
+    class Meta(OrderSummarySerializer.Meta):
+        fields = [
+            "id",
+            "client",
+            "created_at",
+            "products",
+            "total_amount",
+            "item_count",
+        ]
+
     def get_products(self, order):
         items = order.orderitem_set.all()
         return [
@@ -24,7 +41,23 @@ class OrderSerializer(serializers.ModelSerializer):
             for item in items
         ]
 
-    def get_total_amount(self, order):
-        items = order.orderitem_set.all()
-        total = sum(item.product.price * item.quantity for item in items)
-        return round(float(total), 2)
+
+class OrderJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OrderJob
+        fields = ["id", "status", "attempts", "order", "errors", "created_at", "updated_at"]
+        read_only_fields = fields
+
+
+class ClientDailySalesSerializer(serializers.ModelSerializer):
+    revenue = serializers.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        coerce_to_string=False,
+        read_only=True,
+    )
+
+    class Meta:
+        model = ClientDailySales
+        fields = ["client", "day", "order_count", "item_count", "revenue"]
+        read_only_fields = fields
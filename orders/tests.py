@@ -1,14 +1,74 @@
+import asyncio
 import json
+import tempfile
+import threading
+import uuid
+import httpx
+import requests
 
-from datetime import datetime
-from unittest.mock import MagicMock, patch
+from datetime import datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import AsyncMock, MagicMock, patch
 
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils.dateparse import parse_datetime
 from django.utils import timezone
+from rest_framework.exceptions import ValidationError
 
-from .models import Order, OrderItem, Product
+from . import metrics
+from .catalog import (
+	CatalogCache,
+	CatalogClient,
+	CatalogUnavailable,
+	CircuitBreaker,
+	get_catalog_breaker,
+	get_catalog_cache,
+	iter_json_array,
+)
+from .cache import bump_orders_version
+from .idempotency import request_fingerprint
+from .listing import ORDER_LIST_FIELDS, serialize_orders
+from .models import (
+	ClientDailySales,
+	IdempotencyKey,
+	Order,
+	OrderItem,
+	OrderJob,
+	Product,
+)
+from .retry import RetryPolicy
+from .serializers import OrderSerializer
+
+
+CATALOG_GET = "orders.catalog.requests.Session.get"
+ASYNC_CATALOG_GET = "orders.catalog.AsyncCatalogClient.get_product"
+
+# Keep the suite off the shared on-disk cache: entries left by a previous run
+# (or a running dev server) would be served to these tests.
+_test_cache = override_settings(
+	CACHES={
+		"default": {
+			"BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+			"LOCATION": "pedidos-tests",
+		}
+	}
+)
+
+
+def setUpModule():
+	_test_cache.enable()
+
+
+def tearDownModule():
+	_test_cache.disable()
 
 
 def _successful_catalog_response(*, price: int, title: str) -> MagicMock:
@@ -23,61 +83,1538 @@ def _successful_catalog_response(*, price: int, title: str) -> MagicMock:
 	return response
 
 
-class OrderModelTests(TestCase):
-	def test_creates_order_with_client_and_timestamp(self):
-		Order.objects.filter(client="Acme Corp").delete()
-		order = Order.objects.create(client="Acme Corp")
+def _catalog_by_product_id(responses: dict[int, MagicMock]):
+	def fake_get(url, *args, **kwargs):
+		product_id = int(url.rstrip("/").rsplit("/", 1)[-1])
+		return responses[product_id]
+
+	return fake_get
+
+
+class OrderModelTests(TestCase):
+	def test_creates_order_with_client_and_timestamp(self):
+		Order.objects.filter(client="Acme Corp").delete()
+		order = Order.objects.create(client="Acme Corp")
+
+		self.assertEqual(order.client, "Acme Corp")
+		self.assertIsNotNone(order.created_at)
+
+
+class ProductModelTests(TestCase):
+	def test_creates_product_with_sku_and_price(self):
+		product, _ = Product.objects.update_or_create(
+			sku="LOREM1",
+			defaults={
+				"price": 150,
+				"title": "Lorem Ipsum",
+				"description": "Sample description",
+				"category": "Category A",
+			},
+		)
+
+		self.assertEqual(product.sku, "LOREM1")
+		self.assertEqual(product.price, 150)
+		self.assertEqual(product.title, "Lorem Ipsum")
+		self.assertEqual(product.description, "Sample description")
+		self.assertEqual(product.category, "Category A")
+
+
+	def test_sync_many_writes_only_new_and_changed_products(self):
+		Product.objects.create(
+			sku="P050",
+			price=10,
+			title="Product P050",
+			description="",
+			category="General",
+			synced_at=timezone.now(),
+		)
+		Product.objects.create(
+			sku="P051",
+			price=10,
+			title="Product P051",
+			description="",
+			category="General",
+			synced_at=timezone.now(),
+		)
+		payloads = {
+			sku: {
+				"title": f"Product {sku}",
+				"price": price,
+				"description": "",
+				"category": "General",
+			}
+			for sku, price in (("P050", 10), ("P051", 12), ("P052", 15))
+		}
+
+		with CaptureQueriesContext(connection) as context:
+			products = Product.sync_many(payloads)
+
+		statements = [query["sql"].split()[:2] for query in context]
+		self.assertEqual([verb for verb, _ in statements].count("SELECT"), 1)
+		self.assertEqual(statements.count(["INSERT", "INTO"]), 1)
+		self.assertEqual(statements.count(["UPDATE", '"orders_product"']), 1)
+		# Order totals keep the prices they were written at.
+		self.assertEqual(statements.count(["UPDATE", '"orders_order"']), 0)
+		update_sql = next(
+			query["sql"]
+			for query in context
+			if query["sql"].startswith('UPDATE "orders_product"')
+		)
+		self.assertIn("P051", update_sql)
+		self.assertNotIn("P050", update_sql)
+		self.assertEqual(Product.objects.get(sku="P051").price, 12)
+		self.assertEqual(products["P052"].price, 15)
+
+		with CaptureQueriesContext(connection) as context:
+			Product.sync_many(payloads)
+
+		self.assertEqual(len(context), 1)
+
+
+class OrderListingTests(TestCase):
+	def test_serialize_orders_matches_order_serializer(self):
+		products = [
+			Product.objects.create(sku=sku, price=price, title=f"Product {sku}")
+			for sku, price in (("P080", 1.25), ("P081", 3))
+		]
+		order = Order.objects.create(client="Zeta GmbH")
+		OrderItem.objects.create(order=order, product=products[0], quantity=3)
+		OrderItem.objects.create(order=order, product=products[1], quantity=1)
+		Order.objects.create(client="Empty Ltd")
+
+		orders = Order.objects.order_by("-created_at", "-id")
+		expected = OrderSerializer(
+			orders.prefetch_related("orderitem_set__product"),
+			many=True,
+		).data
+
+		with self.assertNumQueries(2):
+			lean = serialize_orders(orders.values(*ORDER_LIST_FIELDS))
+
+		self.assertEqual(json.dumps(lean), json.dumps(expected))
+
+
+class OrderTotalsTests(TestCase):
+	def test_totals_follow_items_but_not_price_changes(self):
+		product = Product.objects.create(sku="P090", price=2, title="Product P090")
+		order = Order.objects.create(client="Theta SA")
+		item = OrderItem.objects.create(order=order, product=product, quantity=3)
+
+		order.refresh_from_db()
+		self.assertEqual((order.total_amount, order.item_count), (6.0, 3))
+
+		Product.sync_many(
+			{
+				"P090": {
+					"title": "Product P090",
+					"price": 2.5,
+					"description": "",
+					"category": "",
+				}
+			}
+		)
+		order.refresh_from_db()
+		self.assertEqual(order.total_amount, 6.0)
+
+		item.delete()
+		order.refresh_from_db()
+		self.assertEqual((order.total_amount, order.item_count), (0.0, 0))
+
+	def test_editing_item_quantity_revalues_the_line(self):
+		product = Product.objects.create(sku="P093", price=10, title="Product P093")
+		order = Order.objects.create(client="Lambda SA")
+		OrderItem.objects.create(order=order, product=product, quantity=2)
+
+		item = OrderItem.objects.get(order=order, product=product)
+		item.quantity = 5
+		item.save()
+
+		order.refresh_from_db()
+		self.assertEqual((order.total_amount, order.item_count), (50.0, 5))
+
+		item = OrderItem.objects.get(order=order, product=product)
+		item.save()
+		self.assertEqual(OrderItem.objects.get(pk=item.pk).amount, 50.0)
+
+	@override_settings(CATALOG_CACHE={"ENABLED": False})
+	def test_totals_use_prices_accepted_by_each_write(self):
+		def write(price, quantity):
+			with patch(CATALOG_GET) as mock_get:
+				mock_get.return_value = _successful_catalog_response(
+					price=price,
+					title="Product P092",
+				)
+				return OrderItem.create_or_update_order_with_items(
+					{
+						"id": 92,
+						"cliente": "Kappa SA",
+						"productos": [
+							{"sku": "P092", "cantidad": quantity, "precio_unitario": price},
+						],
+					}
+				)
+
+		first = write(10, 2)
+		updated_at = first.updated_at
+		order = write(12, 1)
+
+		self.assertEqual((order.total_amount, order.item_count), (32.0, 3))
+		self.assertGreater(order.updated_at, updated_at)
+		self.assertEqual(ClientDailySales.objects.get().revenue, Decimal("32.00"))
+		ClientDailySales.rebuild()
+		self.assertEqual(ClientDailySales.objects.get().revenue, Decimal("32.00"))
+		output = StringIO()
+		call_command("check_order_totals", stdout=output)
+		self.assertIn("All order totals match.", output.getvalue())
+
+	def test_check_order_totals_reports_and_fixes_drift(self):
+		product = Product.objects.create(sku="P091", price=5, title="Product P091")
+		order = Order.objects.create(client="Iota SA")
+		OrderItem.objects.create(order=order, product=product, quantity=2)
+		Order.objects.filter(pk=order.pk).update(total_amount=1, item_count=1)
+
+		with self.assertRaises(CommandError):
+			call_command("check_order_totals", stdout=StringIO())
+
+		output = StringIO()
+		call_command("check_order_totals", "--fix", stdout=output)
+		self.assertIn("Fixed 1 order(s).", output.getvalue())
+		order.refresh_from_db()
+		self.assertEqual((order.total_amount, order.item_count), (10.0, 2))
+
+		output = StringIO()
+		call_command("check_order_totals", stdout=output)
+		self.assertIn("All order totals match.", output.getvalue())
+
+
+class OrderItemTests(TestCase):
+	def test_links_order_and_product_with_quantity(self):
+		order = Order.objects.create(client="Beta LLC")
+		product, _ = Product.objects.update_or_create(
+			sku="LOREM2",
+			defaults={
+				"price": 250,
+				"title": "Product P",
+				"description": "Product P description",
+				"category": "Category B",
+			},
+		)
+
+		order_item = OrderItem.objects.create(
+			order=order,
+			product=product,
+			quantity=3,
+		)
+
+		self.assertEqual(order_item.pk, (order.pk, product.pk))
+		self.assertEqual(order_item.quantity, 3)
+		self.assertIn(product, order.products.all())
+		through_model = order.products.through
+		item = through_model.objects.get(order=order, product=product)
+		self.assertEqual(item.quantity, 3)
+
+
+@override_settings(CATALOG_CACHE={"ENABLED": False})
+class CatalogResolutionTests(TestCase):
+	def test_resolves_distinct_products_concurrently(self):
+		barrier = threading.Barrier(2, timeout=5)
+		responses = {
+			1: _successful_catalog_response(price=10, title="Product P001"),
+			2: _successful_catalog_response(price=20, title="Product P002"),
+		}
+
+		def fake_get(url, *args, **kwargs):
+			barrier.wait()
+			return _catalog_by_product_id(responses)(url)
+
+		with patch(CATALOG_GET, side_effect=fake_get) as mock_get:
+			catalog = Product.resolve_catalog({1: "P001", 2: "P002"})
+
+		self.assertEqual(mock_get.call_count, 2)
+		self.assertEqual(catalog[1]["title"], "Product P001")
+		self.assertEqual(catalog[2]["title"], "Product P002")
+
+	def test_duplicate_skus_are_fetched_once(self):
+		payload = {
+			"cliente": "ACME Corp",
+			"productos": [
+				{"sku": "P030", "cantidad": 1, "precio_unitario": 10},
+				{"sku": "P030", "cantidad": 2, "precio_unitario": 10},
+			],
+		}
+
+		with patch(CATALOG_GET) as mock_get:
+			mock_get.return_value = _successful_catalog_response(
+				price=10,
+				title="Product P030",
+			)
+			order = OrderItem.create_or_update_order_with_items(payload)
+
+		self.assertEqual(mock_get.call_count, 1)
+		item = OrderItem.objects.get(order=order, product_id="P030")
+		self.assertEqual(item.quantity, 3)
+
+	def test_line_items_are_written_with_constant_query_count(self):
+		order = Order.objects.create(client="ACME Corp")
+		for sku in ("P040", "P041"):
+			Product.objects.create(sku=sku, price=10, title=f"Product {sku}")
+		OrderItem.objects.create(order=order, product_id="P040", quantity=1)
+		catalog = {
+			product_id: {
+				"title": f"Product P0{product_id}",
+				"price": 10,
+				"description": "",
+				"category": "General",
+			}
+			for product_id in range(40, 46)
+		}
+
+		def order_data(skus):
+			return {
+				"id": order.pk,
+				"client": "ACME Corp",
+				"timestamp": None,
+				"lines": [
+					{"sku": sku, "product_id": int(sku[1:]), "quantity": 2}
+					for sku in skus
+				],
+			}
+
+		with CaptureQueriesContext(connection) as small:
+			OrderItem._write_order(order_data(["P040", "P041"]), catalog)
+		with CaptureQueriesContext(connection) as large:
+			OrderItem._write_order(
+				order_data(["P040", "P042", "P043", "P044", "P045", "P042"]),
+				catalog,
+			)
+
+		def item_queries(context):
+			return [query for query in context if "orders_orderitem" in query["sql"]]
+
+		self.assertEqual(len(item_queries(small)), len(item_queries(large)))
+		quantities = dict(
+			OrderItem.objects.filter(order=order).values_list("product_id", "quantity")
+		)
+		self.assertEqual(quantities["P040"], 5)
+		self.assertEqual(quantities["P041"], 2)
+		self.assertEqual(quantities["P042"], 4)
+		self.assertEqual(quantities["P045"], 2)
+
+	def test_invalid_quantity_is_rejected_before_catalog_lookup(self):
+		payload = {
+			"cliente": "ACME Corp",
+			"productos": [
+				{"sku": "P031", "cantidad": 1, "precio_unitario": 10},
+				{"sku": "P032", "cantidad": 0, "precio_unitario": 10},
+			],
+		}
+
+		with patch(CATALOG_GET) as mock_get:
+			with self.assertRaises(ValidationError):
+				OrderItem.create_or_update_order_with_items(payload)
+
+		mock_get.assert_not_called()
+		self.assertFalse(Order.objects.filter(client="ACME Corp").exists())
+
+
+class _CatalogStandInHandler(BaseHTTPRequestHandler):
+	protocol_version = "HTTP/1.1"
+	prices = {1: 10, 2: 20, 3: 30}
+
+	def do_GET(self):
+		if self.path.rstrip("/") == "/products":
+			body = json.dumps(
+				[
+					{
+						"id": product_id,
+						"title": f"Product {product_id}",
+						"price": price,
+						"description": "",
+						"category": "General",
+						"rating": {"rate": 4.1, "count": 120},
+					}
+					for product_id, price in self.prices.items()
+				]
+			).encode()
+		else:
+			product_id = int(self.path.rstrip("/").rsplit("/", 1)[-1])
+			body = json.dumps(
+				{
+					"title": f"Product {product_id}",
+					"price": 10,
+					"description": "",
+					"category": "General",
+				}
+			).encode()
+		self.send_response(200)
+		self.send_header("Content-Type", "application/json")
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, format, *args):
+		pass
+
+
+class CatalogClientTests(TestCase):
+	def setUp(self):
+		self.server = ThreadingHTTPServer(("127.0.0.1", 0), _CatalogStandInHandler)
+		thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+		thread.start()
+		host, port = self.server.server_address
+		self.catalog = CatalogClient(
+			product_url=f"http://{host}:{port}/products/{{product_id}}",
+			pool_size=2,
+		)
+
+	def tearDown(self):
+		self.catalog.close()
+		self.server.shutdown()
+		self.server.server_close()
+
+	def test_reuses_connections_across_requests(self):
+		for product_id in (1, 2, 3):
+			response = self.catalog.get_product(product_id)
+			self.assertEqual(response.status_code, 200)
+			self.assertEqual(response.json()["title"], f"Product {product_id}")
+
+		stats = self.catalog.stats()
+		self.assertEqual(stats["requests"], 3)
+		self.assertEqual(stats["connections_opened"], 1)
+		self.assertEqual(stats["connections_reused"], 2)
+
+
+class CatalogSyncTests(TestCase):
+	def setUp(self):
+		self.server = ThreadingHTTPServer(("127.0.0.1", 0), _CatalogStandInHandler)
+		thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+		thread.start()
+		host, port = self.server.server_address
+		settings = self.settings(
+			CATALOG_CLIENT={"PRODUCTS_URL": f"http://{host}:{port}/products"},
+		)
+		settings.enable()
+		self.addCleanup(settings.disable)
+
+	def tearDown(self):
+		self.server.shutdown()
+		self.server.server_close()
+
+	def _sync(self, *args):
+		out = StringIO()
+		call_command("sync_catalog", *args, stdout=out)
+		return out.getvalue()
+
+	def test_parses_json_array_across_chunk_boundaries(self):
+		data = json.dumps([{"id": 1, "title": "a], b"}, 12345, [1, 2]])
+		for size in (1, 3, len(data)):
+			chunks = [data[i : i + size] for i in range(0, len(data), size)]
+			self.assertEqual(list(iter_json_array(chunks)), json.loads(data))
+
+	def test_upserts_every_product_in_batches(self):
+		Product.objects.create(sku="P002", price=15, title="Product 2")
+
+		with CaptureQueriesContext(connection) as context:
+			output = self._sync("--batch-size", "2")
+
+		self.assertIn("2 created, 1 updated, 0 unchanged", output)
+		self.assertIn("0 created, 0 updated, 3 unchanged", self._sync())
+		prices = dict(Product.objects.values_list("sku", "price"))
+		self.assertEqual(prices, {"P001": 10, "P002": 20, "P003": 30})
+		inserts = [query for query in context if query["sql"].startswith("INSERT")]
+		self.assertEqual(len(inserts), 2)
+
+	def test_since_skips_recently_synced_products(self):
+		self._sync()
+
+		output = self._sync("--since", "01:00:00")
+
+		self.assertIn("0 created, 0 updated, 0 unchanged, 3 skipped", output)
+
+	@override_settings(CATALOG_SYNC={"LOCAL_MAX_AGE": 3600})
+	def test_orders_use_fresh_local_products_without_the_network(self):
+		self._sync()
+		payload = {
+			"cliente": "ACME Corp",
+			"productos": [{"sku": "P002", "cantidad": 1, "precio_unitario": 20}],
+		}
+
+		with patch(CATALOG_GET) as mock_get:
+			order = OrderItem.create_or_update_order_with_items(payload)
+
+		mock_get.assert_not_called()
+		self.assertTrue(OrderItem.objects.filter(order=order, product_id="P002").exists())
+
+
+def _async_catalog_by_product_id(prices: dict[int, float]):
+	async def fake_get_product(product_id):
+		return httpx.Response(
+			200,
+			json={
+				"title": f"Product P{product_id:03d}",
+				"price": prices[product_id],
+				"description": "",
+				"category": "General",
+			},
+		)
+
+	return fake_get_product
+
+
+async def _post_async_orders(async_client, count: int, **headers):
+	# Returns the responses and the peak number of catalog lookups in flight.
+	catalog = _async_catalog_by_product_id({1: 10})
+	in_flight = 0
+	peak = 0
+
+	async def slow_catalog(product_id):
+		nonlocal in_flight, peak
+		in_flight += 1
+		peak = max(peak, in_flight)
+		await asyncio.sleep(0.05)
+		in_flight -= 1
+		return await catalog(product_id)
+
+	async def post(order_id):
+		payload = {
+			"id": order_id,
+			"cliente": "ACME Corp",
+			"productos": [{"sku": "P001", "cantidad": 1, "precio_unitario": 10}],
+		}
+		return await async_client.post(
+			reverse("orders:orders-async"),
+			data=json.dumps(payload),
+			content_type="application/json",
+			**headers,
+		)
+
+	with patch(ASYNC_CATALOG_GET, side_effect=slow_catalog):
+		responses = await asyncio.gather(*(post(order_id) for order_id in range(1, count + 1)))
+	return responses, peak
+
+
+@override_settings(
+	CATALOG_CACHE={"ENABLED": False},
+	ORDERS_RESPONSE_CACHE={"ENABLED": False},
+)
+class AsyncOrderViewTests(TestCase):
+	def test_async_endpoint_creates_order(self):
+		payload = {
+			"id": 321,
+			"cliente": "ACME Corp",
+			"productos": [
+				{"sku": "P001", "cantidad": 3, "precio_unitario": 10},
+				{"sku": "P002", "cantidad": 1, "precio_unitario": 20.5},
+			],
+		}
+
+		with patch(ASYNC_CATALOG_GET, new_callable=AsyncMock) as mock_get:
+			mock_get.side_effect = _async_catalog_by_product_id({1: 10, 2: 20.5})
+			response = self.client.post(
+				reverse("orders:orders-async"),
+				data=json.dumps(payload),
+				content_type="application/json",
+			)
+
+		self.assertEqual(response.status_code, 201)
+		self.assertEqual(mock_get.await_count, 2)
+		body = response.json()["order"]
+		self.assertEqual(body["id"], 321)
+		self.assertEqual(body["total_amount"], 50.5)
+		items = OrderItem.objects.filter(order_id=321)
+		self.assertEqual(
+			dict(items.values_list("product_id", "quantity")),
+			{"P001": 3, "P002": 1},
+		)
+
+	def test_async_endpoint_rejects_price_mismatch(self):
+		payload = {
+			"cliente": "ACME Corp",
+			"productos": [
+				{"sku": "P010", "cantidad": 1, "precio_unitario": 10},
+			],
+		}
+
+		with patch(ASYNC_CATALOG_GET, new_callable=AsyncMock) as mock_get:
+			mock_get.side_effect = _async_catalog_by_product_id({10: 11})
+			response = self.client.post(
+				reverse("orders:orders-async"),
+				data=json.dumps(payload),
+				content_type="application/json",
+			)
+
+		self.assertEqual(response.status_code, 400)
+		message = response.json()["errors"]["productos"]
+		self.assertIn("Unit price for product P010 must match 11", message)
+		self.assertFalse(Order.objects.exists())
+
+	def test_async_client_is_closed_when_not_served_by_asgi(self):
+		payload = {
+			"cliente": "ACME Corp",
+			"productos": [{"sku": "P001", "cantidad": 1, "precio_unitario": 10}],
+		}
+
+		with patch(ASYNC_CATALOG_GET, new_callable=AsyncMock) as mock_get, patch(
+			"orders.catalog.AsyncCatalogClient.aclose",
+			new_callable=AsyncMock,
+		) as mock_aclose:
+			mock_get.side_effect = _async_catalog_by_product_id({1: 10})
+			response = self.client.post(
+				reverse("orders:orders-async"),
+				data=json.dumps(payload),
+				content_type="application/json",
+			)
+
+		self.assertEqual(response.status_code, 201)
+		mock_aclose.assert_awaited_once()
+
+	def test_async_endpoint_only_accepts_post(self):
+		response = self.client.get(reverse("orders:orders-async"))
+
+		self.assertEqual(response.status_code, 405)
+
+
+@override_settings(CATALOG_CACHE={"ENABLED": False})
+class ClientSalesRollupTests(TestCase):
+	def _create(self, payload):
+		responses = {
+			80: _successful_catalog_response(price=10, title="Product P080"),
+			81: _successful_catalog_response(price=2.5, title="Product P081"),
+		}
+		with patch(CATALOG_GET, side_effect=_catalog_by_product_id(responses)):
+			return OrderItem.create_or_update_order_with_items(payload)
+
+	def _rollup(self):
+		return list(
+			ClientDailySales.objects.values_list(
+				"client", "day", "order_count", "item_count", "revenue"
+			)
+		)
+
+	def test_rollup_is_updated_as_orders_are_written(self):
+		order = self._create(
+			{
+				"cliente": "ACME Corp",
+				"fecha": "2025-03-01T10:00:00",
+				"productos": [{"sku": "P080", "cantidad": 2, "precio_unitario": 10}],
+			}
+		)
+		self._create(
+			{
+				"id": order.pk,
+				"cliente": "ACME Corp",
+				"productos": [
+					{"sku": "P080", "cantidad": 1, "precio_unitario": 10},
+					{"sku": "P081", "cantidad": 4, "precio_unitario": 2.5},
+				],
+			}
+		)
+		self._create(
+			{
+				"cliente": "ACME Corp",
+				"fecha": "2025-03-01T18:00:00",
+				"productos": [{"sku": "P081", "cantidad": 1, "precio_unitario": 2.5}],
+			}
+		)
+
+		march_first = datetime(2025, 3, 1).date()
+		self.assertEqual(
+			self._rollup(),
+			[("ACME Corp", march_first, 2, 8, Decimal("42.50"))],
+		)
+
+		ClientDailySales.objects.update(order_count=0)
+		output = StringIO()
+		call_command("rebuild_sales_rollup", stdout=output)
+
+		self.assertIn("Rebuilt 1 rollup row(s)", output.getvalue())
+		self.assertEqual(
+			self._rollup(),
+			[("ACME Corp", march_first, 2, 8, Decimal("42.50"))],
+		)
+
+	def test_sales_endpoint_filters_by_client_and_day(self):
+		for client, day in (
+			("ACME Corp", "2025-03-01"),
+			("ACME Corp", "2025-03-02"),
+			("Gamma Inc", "2025-03-02"),
+		):
+			ClientDailySales.objects.create(
+				client=client,
+				day=day,
+				order_count=1,
+				item_count=3,
+				revenue=Decimal("12.50"),
+			)
+
+		response = self.client.get(
+			reverse("orders:orders-sales"),
+			{"client": "ACME Corp", "start": "2025-03-02"},
+		)
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(
+			response.json()["sales"],
+			[
+				{
+					"client": "ACME Corp",
+					"day": "2025-03-02",
+					"order_count": 1,
+					"item_count": 3,
+					"revenue": 12.5,
+				}
+			],
+		)
+		response = self.client.get(reverse("orders:orders-sales"), {"end": "March"})
+		self.assertEqual(response.status_code, 400)
+
+
+@override_settings(
+	CATALOG_CACHE={"ENABLED": False},
+	ORDERS_RESPONSE_CACHE={"ENABLED": False},
+	ORDERS_BULK_BATCH_SIZE=2,
+)
+class OrdersBulkTests(TestCase):
+	def _post(self, payload):
+		return self.client.post(
+			reverse("orders:orders-bulk"),
+			data=json.dumps(payload),
+			content_type="application/json",
+		)
+
+	def test_bulk_submission_reports_per_order_results(self):
+		payloads = [
+			{
+				"id": 500,
+				"cliente": "ACME Corp",
+				"productos": [
+					{"sku": "P001", "cantidad": 1, "precio_unitario": 10},
+					{"sku": "P002", "cantidad": 2, "precio_unitario": 20},
+				],
+			},
+			{"cliente": "", "productos": []},
+			{
+				"id": 501,
+				"cliente": "Beta LLC",
+				"productos": [{"sku": "P001", "cantidad": 4, "precio_unitario": 10}],
+			},
+			{
+				"id": 502,
+				"cliente": "Gamma Inc",
+				"productos": [{"sku": "P002", "cantidad": 1, "precio_unitario": 99}],
+			},
+			{
+				"id": 503,
+				"cliente": "Delta SA",
+				"productos": [{"sku": "P404", "cantidad": 1, "precio_unitario": 1}],
+			},
+			{
+				"id": 500,
+				"cliente": "ACME Corp",
+				"productos": [{"sku": "P002", "cantidad": 3, "precio_unitario": 20}],
+			},
+		]
+		not_found = MagicMock(status_code=404)
+
+		with patch(CATALOG_GET) as mock_get:
+			mock_get.side_effect = _catalog_by_product_id(
+				{
+					1: _successful_catalog_response(price=10, title="Product P001"),
+					2: _successful_catalog_response(price=20, title="Product P002"),
+					404: not_found,
+				}
+			)
+			response = self._post(payloads)
+
+		self.assertEqual(mock_get.call_count, 3)
+		self.assertEqual(response.status_code, 200)
+		body = response.json()
+		self.assertEqual(body["created"], 3)
+		self.assertEqual(body["failed"], 3)
+		statuses = [result["status"] for result in body["results"]]
+		self.assertEqual(statuses, [201, 400, 201, 400, 400, 201])
+		self.assertIn("cliente", body["results"][1]["errors"])
+		self.assertIn("must match 20", body["results"][3]["errors"]["productos"])
+		self.assertIn("not found", body["results"][4]["errors"]["productos"])
+
+		merged = body["results"][5]["order"]
+		self.assertEqual(merged["id"], 500)
+		self.assertEqual(merged["total_amount"], 110.0)
+		self.assertEqual(body["results"][2]["order"]["total_amount"], 40.0)
+		self.assertFalse(Order.objects.filter(pk__in=[502, 503]).exists())
+
+	def test_bulk_submission_requires_a_list(self):
+		response = self._post({"cliente": "ACME Corp"})
+
+		self.assertEqual(response.status_code, 400)
+
+	def test_malformed_orders_fail_only_their_own_result(self):
+		payloads = [
+			{"cliente": "ACME Corp", "productos": "abc"},
+			{"cliente": "ACME Corp", "productos": [1]},
+			{"cliente": "ACME Corp", "productos": [{"sku": 1, "cantidad": 1}]},
+			{
+				"cliente": "ACME Corp",
+				"fecha": 123,
+				"productos": [{"sku": "P001", "cantidad": 1, "precio_unitario": 10}],
+			},
+			{
+				"id": 504,
+				"cliente": "ACME Corp",
+				"productos": [{"sku": "P001", "cantidad": 1, "precio_unitario": 10}],
+			},
+		]
+
+		with patch(CATALOG_GET) as mock_get:
+			mock_get.return_value = _successful_catalog_response(
+				price=10,
+				title="Product P001",
+			)
+			response = self._post(payloads)
+
+		self.assertEqual(response.status_code, 200)
+		results = response.json()["results"]
+		self.assertEqual(
+			[result["status"] for result in results],
+			[400, 400, 400, 400, 201],
+		)
+		self.assertIn("fecha", results[3]["errors"])
+
+	@override_settings(ORDERS_BULK_BATCH_SIZE=1)
+	def test_failed_batch_does_not_fail_the_request(self):
+		payloads = [
+			{
+				"id": 505 + offset,
+				"cliente": "ACME Corp",
+				"productos": [{"sku": "P001", "cantidad": 1, "precio_unitario": 10}],
+			}
+			for offset in range(3)
+		]
+		sync_many = Product.sync_many
+		calls = []
+
+		def locked_second_batch(payloads):
+			calls.append(payloads)
+			if len(calls) == 2:
+				raise OperationalError("database is locked")
+			return sync_many(payloads)
+
+		with (
+			patch(CATALOG_GET) as mock_get,
+			patch("orders.bulk.Product.sync_many", side_effect=locked_second_batch),
+		):
+			mock_get.return_value = _successful_catalog_response(
+				price=10,
+				title="Product P001",
+			)
+			response = self._post(payloads)
+
+		self.assertEqual(response.status_code, 200)
+		body = response.json()
+		self.assertEqual(
+			[result["status"] for result in body["results"]],
+			[201, 503, 201],
+		)
+		self.assertEqual(body["results"][1]["error"], "Database is busy.")
+		self.assertEqual(
+			sorted(Order.objects.values_list("pk", flat=True)),
+			[505, 507],
+		)
+
+	def test_catalog_outage_is_reported_as_unavailable(self):
+		get_catalog_breaker().record_success()
+		payloads = [
+			{
+				"id": 508,
+				"cliente": "ACME Corp",
+				"productos": [{"sku": "P061", "cantidad": 1, "precio_unitario": 10}],
+			},
+		]
+
+		with patch(CATALOG_GET) as mock_get:
+			mock_get.side_effect = requests.ConnectionError("connection refused")
+			response = self._post(payloads)
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.json()["results"][0]["status"], 503)
+		self.assertFalse(Order.objects.filter(pk=508).exists())
+
+
+@override_settings(
+	CATALOG_CACHE={"ENABLED": False},
+	ORDERS_RESPONSE_CACHE={"ENABLED": False},
+)
+class OrderJobTests(TestCase):
+	payload = {
+		"id": 400,
+		"cliente": "ACME Corp",
+		"productos": [
+			{"sku": "P001", "cantidad": 2, "precio_unitario": 10},
+		],
+	}
+
+	def _post(self, payload):
+		return self.client.post(
+			reverse("orders:orders"),
+			data=json.dumps(payload),
+			content_type="application/json",
+			HTTP_PREFER="respond-async",
+		)
+
+	def test_queued_order_is_accepted_without_catalog_calls(self):
+		with patch(CATALOG_GET) as mock_get:
+			response = self._post(self.payload)
+
+		mock_get.assert_not_called()
+		self.assertEqual(response.status_code, 202)
+		job = response.json()["job"]
+		self.assertEqual(job["status"], "pending")
+		self.assertTrue(response["Location"].endswith(f"/orders/jobs/{job['id']}/"))
+		self.assertFalse(Order.objects.filter(pk=400).exists())
+
+		status_response = self.client.get(
+			reverse("orders:order-job", kwargs={"job_id": job["id"]})
+		)
+		self.assertEqual(status_response.status_code, 200)
+		self.assertEqual(status_response.json()["job"]["status"], "pending")
+
+	def test_queued_order_with_invalid_shape_is_rejected(self):
+		response = self._post({"cliente": "ACME Corp", "productos": []})
+
+		self.assertEqual(response.status_code, 400)
+		self.assertFalse(OrderJob.objects.exists())
+
+	def test_queued_order_with_malformed_fields_is_rejected(self):
+		for payload in (
+			{"cliente": "ACME Corp", "productos": "abc"},
+			{"cliente": "ACME Corp", "productos": [1]},
+			{**self.payload, "fecha": 123},
+		):
+			with self.subTest(payload=payload):
+				response = self._post(payload)
+
+				self.assertEqual(response.status_code, 400)
+				self.assertIn("errors", response.json())
+		self.assertFalse(OrderJob.objects.exists())
+
+	def test_worker_processes_queued_orders(self):
+		accepted = self._post(self.payload).json()["job"]
+		rejected = self._post(
+			{
+				"cliente": "ACME Corp",
+				"productos": [{"sku": "P002", "cantidad": 1, "precio_unitario": 99}],
+			}
+		).json()["job"]
+
+		with patch(CATALOG_GET) as mock_get:
+			mock_get.side_effect = _catalog_by_product_id(
+				{
+					1: _successful_catalog_response(price=10, title="Product P001"),
+					2: _successful_catalog_response(price=20, title="Product P002"),
+				}
+			)
+			call_command("process_order_jobs", once=True, stdout=StringIO())
+
+		accepted_job = OrderJob.objects.get(pk=accepted["id"])
+		self.assertEqual(accepted_job.status, OrderJob.Status.SUCCEEDED)
+		self.assertEqual(accepted_job.order_id, 400)
+		item = OrderItem.objects.get(order_id=400, product_id="P001")
+		self.assertEqual(item.quantity, 2)
+
+		rejected_job = OrderJob.objects.get(pk=rejected["id"])
+		self.assertEqual(rejected_job.status, OrderJob.Status.FAILED)
+		self.assertIn("productos", rejected_job.errors)
+
+	def test_unknown_job_returns_404(self):
+		response = self.client.get(
+			reverse("orders:order-job", kwargs={"job_id": uuid.uuid4()})
+		)
+
+		self.assertEqual(response.status_code, 404)
+
+
+@override_settings(
+	CATALOG_CACHE={"ENABLED": False},
+	ORDERS_RESPONSE_CACHE={"ENABLED": False},
+	ORDERS_RETRY={"MAX_ATTEMPTS": 3, "BASE_DELAY": 0, "MAX_DELAY": 0},
+	CATALOG_CIRCUIT_BREAKER={"FAILURE_THRESHOLD": 100},
+)
+class OrderRetryTests(TestCase):
+	payload = {
+		"cliente": "ACME Corp",
+		"productos": [{"sku": "P001", "cantidad": 1, "precio_unitario": 10}],
+	}
+
+	def setUp(self):
+		metrics.reset()
+
+	def _post(self, payload):
+		return self.client.post(
+			reverse("orders:orders"),
+			data=json.dumps(payload),
+			content_type="application/json",
+		)
+
+	def test_permanent_errors_are_not_retried(self):
+		with patch(CATALOG_GET) as mock_get:
+			mock_get.return_value = _successful_catalog_response(
+				price=11,
+				title="Product P001",
+			)
+			response = self._post(self.payload)
+
+		self.assertEqual(response.status_code, 400)
+		self.assertEqual(mock_get.call_count, 1)
+		self.assertEqual(metrics.counters(), {})
+
+	def test_catalog_outage_is_retried(self):
+		with patch(CATALOG_GET) as mock_get:
+			mock_get.side_effect = [
+				requests.ConnectionError("connection reset"),
+				MagicMock(status_code=503),
+				_successful_catalog_response(price=10, title="Product P001"),
+			]
+			response = self._post(self.payload)
+
+		self.assertEqual(response.status_code, 201)
+		self.assertEqual(mock_get.call_count, 3)
+		retries = metrics.counter_value(
+			"orders_retries_total",
+			operation="create_order",
+			reason="catalog_unavailable",
+		)
+		self.assertEqual(retries, 2)
+
+	def test_exhausted_catalog_retries_return_service_unavailable(self):
+		with patch(CATALOG_GET) as mock_get:
+			mock_get.side_effect = requests.Timeout("read timed out")
+			response = self._post(self.payload)
+
+		self.assertEqual(response.status_code, 503)
+		self.assertEqual(response["Retry-After"], "1")
+		self.assertEqual(mock_get.call_count, 3)
+		message = response.json()["errors"]["productos"]
+		self.assertIn("Unable to fetch product P001", message)
+		exhausted = metrics.counter_value(
+			"orders_retries_exhausted_total",
+			operation="create_order",
+			reason="catalog_unavailable",
+		)
+		self.assertEqual(exhausted, 1)
+
+	@override_settings(
+		ORDERS_RETRY={"MAX_ATTEMPTS": 5, "BASE_DELAY": 0, "MAX_DELAY": 0},
+		CATALOG_CIRCUIT_BREAKER={"FAILURE_THRESHOLD": 2, "RESET_TIMEOUT": 30},
+	)
+	def test_open_circuit_is_not_retried(self):
+		with patch(CATALOG_GET) as mock_get:
+			mock_get.side_effect = requests.ConnectionError("connection refused")
+			response = self._post(self.payload)
+
+		self.assertEqual(response.status_code, 503)
+		self.assertEqual(response["Retry-After"], "30")
+		self.assertEqual(mock_get.call_count, 2)
+		labels = {"operation": "create_order", "reason": "catalog_unavailable"}
+		self.assertEqual(metrics.counter_value("orders_retries_total", **labels), 2)
+		self.assertEqual(metrics.counter_value("orders_retries_exhausted_total", **labels), 0)
+
+	def test_async_endpoint_returns_service_unavailable(self):
+		with patch(ASYNC_CATALOG_GET, new_callable=AsyncMock) as mock_get:
+			mock_get.side_effect = httpx.ConnectError("connection refused")
+			response = self.client.post(
+				reverse("orders:orders-async"),
+				data=json.dumps(self.payload),
+				content_type="application/json",
+			)
+
+		self.assertEqual(response.status_code, 503)
+		self.assertEqual(mock_get.await_count, 3)
+		self.assertIn("Unable to fetch product P001", response.json()["errors"]["productos"])
+
+	def test_catalog_lookups_are_not_retried_by_the_transport(self):
+		client = CatalogClient()
+		self.addCleanup(client.close)
+
+		self.assertEqual(client.session.get_adapter("https://x").max_retries.total, 0)
+		self.assertEqual(client.sync_session.get_adapter("https://x").max_retries.total, 2)
+
+	def test_locked_database_is_retried(self):
+		commit_order = OrderItem._commit_order
+		outcomes = [OperationalError("database is locked")]
+
+		def flaky_commit(*args, **kwargs):
+			if outcomes:
+				raise outcomes.pop()
+			return commit_order(*args, **kwargs)
+
+		with patch(CATALOG_GET) as mock_get, patch.object(
+			OrderItem,
+			"_commit_order",
+			side_effect=flaky_commit,
+		):
+			mock_get.return_value = _successful_catalog_response(
+				price=10,
+				title="Product P001",
+			)
+			response = self._post(self.payload)
+
+		self.assertEqual(response.status_code, 201)
+		retries = metrics.counter_value(
+			"orders_retries_total",
+			operation="create_order",
+			reason="database_locked",
+		)
+		self.assertEqual(retries, 1)
+
+	def test_backoff_grows_exponentially_up_to_max_delay(self):
+		policy = RetryPolicy(
+			max_attempts=5,
+			base_delay=0.5,
+			max_delay=3,
+			jitter=lambda low, high: high,
+		)
+
+		delays = [policy.delay(attempt) for attempt in range(1, 6)]
+		self.assertEqual(delays, [0.5, 1, 2, 3, 3])
+
+
+class CircuitBreakerTests(TestCase):
+	def setUp(self):
+		self.now = 0.0
+		self.breaker = CircuitBreaker(
+			failure_threshold=2,
+			reset_timeout=30,
+			clock=lambda: self.now,
+		)
+
+	def test_opens_after_consecutive_failures(self):
+		self.breaker.record_failure()
+		self.breaker.record_success()
+		self.breaker.record_failure()
+		self.assertTrue(self.breaker.allow())
+
+		self.breaker.record_response(503)
+		self.assertFalse(self.breaker.allow())
+		self.assertEqual(self.breaker.stats()["state"], CircuitBreaker.OPEN)
+		self.assertEqual(self.breaker.stats()["rejected"], 1)
+
+	def test_half_open_allows_a_single_trial(self):
+		self.breaker.record_failure()
+		self.breaker.record_failure()
+		self.now = 30
+
+		self.assertTrue(self.breaker.allow())
+		self.assertFalse(self.breaker.allow())
+		self.breaker.record_failure()
+		self.assertFalse(self.breaker.allow())
+
+		self.now = 60
+		self.assertTrue(self.breaker.allow())
+		self.breaker.record_response(200)
+		self.assertEqual(self.breaker.stats()["state"], CircuitBreaker.CLOSED)
+		self.assertTrue(self.breaker.allow())
+
+	def test_unreported_trial_expires_after_reset_timeout(self):
+		self.breaker.record_failure()
+		self.breaker.record_failure()
+		self.now = 30
+		self.assertTrue(self.breaker.allow())
+
+		self.now = 59
+		self.assertFalse(self.breaker.allow())
+		self.now = 60
+		self.assertTrue(self.breaker.allow())
+
+
+@override_settings(
+	CATALOG_CACHE={"ENABLED": False},
+	CATALOG_CIRCUIT_BREAKER={"FAILURE_THRESHOLD": 2, "RESET_TIMEOUT": 60},
+	CATALOG_FALLBACK={"ENABLED": True, "MAX_STALENESS": 3600},
+)
+class CatalogOutageTests(TestCase):
+	payload = {
+		"cliente": "ACME Corp",
+		"productos": [{"sku": "P060", "cantidad": 1, "precio_unitario": 10}],
+	}
+
+	def setUp(self):
+		get_catalog_breaker().record_success()
+
+	def test_open_circuit_fails_fast_without_calling_catalog(self):
+		with patch(CATALOG_GET) as mock_get:
+			mock_get.side_effect = requests.ConnectionError("connection refused")
+			for _ in range(3):
+				with self.assertRaises(CatalogUnavailable):
+					Product.resolve_catalog({60: "P060"})
+
+		self.assertEqual(mock_get.call_count, 2)
+		self.assertEqual(get_catalog_breaker().stats()["state"], CircuitBreaker.OPEN)
+
+	async def test_cancelled_trial_does_not_leave_circuit_half_open(self):
+		breaker = get_catalog_breaker()
+		breaker.record_failure()
+		breaker.record_failure()
+		breaker.opened_at -= 60
+		started = asyncio.Event()
+
+		async def hang(product_id):
+			started.set()
+			await asyncio.sleep(10)
+
+		with patch(ASYNC_CATALOG_GET, side_effect=hang):
+			trial = asyncio.ensure_future(Product._afetch_catalog_payload("P060", 60))
+			await started.wait()
+			trial.cancel()
+			with self.assertRaises(asyncio.CancelledError):
+				await trial
+
+		self.assertEqual(breaker.stats()["state"], CircuitBreaker.OPEN)
+		breaker.opened_at -= 60
+		self.assertTrue(breaker.allow())
+
+	def test_recently_synced_product_is_served_locally(self):
+		synced_at = timezone.now() - timedelta(minutes=5)
+		Product.objects.create(
+			sku="P060",
+			price=10,
+			title="Product P060",
+			synced_at=synced_at,
+		)
+
+		with patch(CATALOG_GET) as mock_get:
+			mock_get.return_value = MagicMock(status_code=503)
+			order = OrderItem.create_or_update_order_with_items(self.payload)
+
+		self.assertTrue(OrderItem.objects.filter(order=order, product_id="P060").exists())
+		self.assertEqual(Product.objects.get(sku="P060").synced_at, synced_at)
+
+	def test_stale_product_is_not_served_locally(self):
+		Product.objects.create(
+			sku="P060",
+			price=10,
+			title="Product P060",
+			synced_at=timezone.now() - timedelta(hours=2),
+		)
+
+		with patch(CATALOG_GET) as mock_get:
+			mock_get.return_value = MagicMock(status_code=503)
+			with self.assertRaises(CatalogUnavailable):
+				OrderItem.create_or_update_order_with_items(self.payload)
+
+		self.assertFalse(Order.objects.filter(client="ACME Corp").exists())
 
-		self.assertEqual(order.client, "Acme Corp")
-		self.assertIsNotNone(order.created_at)
 
+@override_settings(
+	CATALOG_CACHE={"ENABLED": False},
+	ORDERS_RESPONSE_CACHE={"ENABLED": False},
+)
+class RequestMetricsTests(TestCase):
+	def setUp(self):
+		metrics.reset()
 
-class ProductModelTests(TestCase):
-	def test_creates_product_with_sku_and_price(self):
-		product, _ = Product.objects.update_or_create(
-			sku="LOREM1",
-			defaults={
-				"price": 150,
-				"title": "Lorem Ipsum",
-				"description": "Sample description",
-				"category": "Category A",
-			},
+	def test_histogram_is_rendered_in_prometheus_format(self):
+		metrics.observe("job_seconds", 0.3, buckets=(0.1, 0.5), queue="default")
+		metrics.observe("job_seconds", 2, buckets=(0.1, 0.5), queue="default")
+		metrics.increment("jobs_total", queue='a "b"')
+
+		text = metrics.render_prometheus()
+
+		self.assertIn("# TYPE job_seconds histogram", text)
+		self.assertIn('job_seconds_bucket{queue="default",le="0.1"} 0', text)
+		self.assertIn('job_seconds_bucket{queue="default",le="0.5"} 1', text)
+		self.assertIn('job_seconds_bucket{queue="default",le="+Inf"} 2', text)
+		self.assertIn('job_seconds_sum{queue="default"} 2.3', text)
+		self.assertIn('job_seconds_count{queue="default"} 2', text)
+		self.assertIn('jobs_total{queue="a \\"b\\""} 1', text)
+
+	def test_post_records_database_catalog_and_serialization_timings(self):
+		payload = {
+			"cliente": "ACME Corp",
+			"productos": [{"sku": "P001", "cantidad": 1, "precio_unitario": 10}],
+		}
+		with patch(CATALOG_GET) as mock_get:
+			mock_get.return_value = _successful_catalog_response(
+				price=10,
+				title="Product P001",
+			)
+			response = self.client.post(
+				reverse("orders:orders"),
+				data=json.dumps(payload),
+				content_type="application/json",
+			)
+
+		self.assertEqual(response.status_code, 201)
+		timing = response["Server-Timing"]
+		self.assertIn('catalog;desc="1 calls"', timing)
+		self.assertRegex(timing, r'db;desc="[1-9]\d* queries"')
+		labels = {"method": "POST", "route": "orders/"}
+		self.assertEqual(
+			metrics.histogram("http_request_duration_seconds", status=201, **labels)[
+				"count"
+			],
+			1,
+		)
+		self.assertEqual(
+			metrics.histogram("http_request_catalog_calls", **labels)["sum"],
+			1,
+		)
+		self.assertGreater(
+			metrics.histogram("http_request_serialization_duration_seconds", **labels)[
+				"sum"
+			],
+			0,
+		)
+		self.assertEqual(
+			metrics.histogram("orders_phase_duration_seconds", phase="write")["count"],
+			1,
 		)
 
-		self.assertEqual(product.sku, "LOREM1")
-		self.assertEqual(product.price, 150)
-		self.assertEqual(product.title, "Lorem Ipsum")
-		self.assertEqual(product.description, "Sample description")
-		self.assertEqual(product.category, "Category A")
+		text = self.client.get(reverse("metrics")).content.decode()
+		self.assertIn(
+			'http_request_duration_seconds_count{method="POST",route="orders/",'
+			'status="201"} 1',
+			text,
+		)
+		self.assertIn('catalog_request_duration_seconds_count{outcome="ok"} 1', text)
+		self.assertIn('catalog_circuit_state{state="closed"} 1', text)
+		self.assertIn('order_jobs{status="pending"} 0', text)
 
+	@override_settings(CATALOG_CACHE={"ENABLED": True})
+	def test_catalog_cache_stats_are_valid_prometheus_samples(self):
+		get_catalog_cache().set("P001", {"price": 10})
+		get_catalog_cache().get("P001")
 
-class OrderItemTests(TestCase):
-	def test_links_order_and_product_with_quantity(self):
-		order = Order.objects.create(client="Beta LLC")
-		product, _ = Product.objects.update_or_create(
-			sku="LOREM2",
-			defaults={
-				"price": 250,
-				"title": "Product P",
-				"description": "Product P description",
-				"category": "Category B",
-			},
+		text = self.client.get(reverse("metrics")).content.decode()
+
+		self.assertIn("# TYPE catalog_cache_enabled gauge", text)
+		self.assertIn("catalog_cache_enabled 1", text)
+		self.assertIn("# TYPE catalog_cache_hits_total counter", text)
+		self.assertIn("catalog_cache_hits_total 1", text)
+		self.assertIn("# TYPE catalog_cache_size gauge", text)
+		self.assertNotIn("True", text)
+
+
+	@override_settings(
+		CATALOG_CACHE={"ENABLED": False},
+		ORDERS_RESPONSE_CACHE={"ENABLED": False},
+	)
+	async def test_async_view_stays_on_the_event_loop(self):
+		responses, peak = await _post_async_orders(self.async_client, 5)
+
+		self.assertEqual([response.status_code for response in responses], [201] * 5)
+		self.assertIn("Server-Timing", responses[0])
+		self.assertGreater(peak, 1)
+
+class ProfilerMiddlewareTests(TestCase):
+	def setUp(self):
+		directory = tempfile.TemporaryDirectory()
+		self.addCleanup(directory.cleanup)
+		self.directory = directory.name
+		settings_override = override_settings(
+			ORDERS_PROFILER={"ENABLED": True, "DIRECTORY": self.directory}
 		)
+		settings_override.enable()
+		self.addCleanup(settings_override.disable)
+		Order.objects.create(client="ACME Corp")
 
-		order_item = OrderItem.objects.create(
-			order=order,
-			product=product,
-			quantity=3,
+	def _login_staff(self):
+		user = get_user_model().objects.create_user(
+			"ops",
+			password="secret",
+			is_staff=True,
 		)
+		self.client.force_login(user)
 
-		self.assertEqual(order_item.pk, (order.pk, product.pk))
-		self.assertEqual(order_item.quantity, 3)
-		self.assertIn(product, order.products.all())
-		through_model = order.products.through
-		item = through_model.objects.get(order=order, product=product)
-		self.assertEqual(item.quantity, 3)
+	def test_staff_request_with_flag_is_profiled(self):
+		self._login_staff()
+
+		response = self.client.get(reverse("orders:orders"), {"profile": "1"})
+
+		self.assertEqual(response.status_code, 200)
+		profile_id = response["X-Profile-Id"]
+		with open(f"{self.directory}/{profile_id}.json") as metadata_file:
+			metadata = json.load(metadata_file)
+		self.assertEqual(metadata["method"], "GET")
+		self.assertEqual(metadata["url"], "/orders/?profile=1")
+		self.assertEqual(metadata["status"], 200)
+		self.assertEqual(metadata["payload_bytes"], len(response.content))
+		self.assertEqual(metadata["user"], "ops")
+		self.assertGreater(metadata["queries"]["count"], 0)
+		self.assertEqual(len(metadata["queries"]["log"]), metadata["queries"]["count"])
+
+		out = StringIO()
+		call_command("list_profiles", stdout=out)
+		self.assertIn(profile_id, out.getvalue())
+		out = StringIO()
+		call_command("list_profiles", profile_id, "--limit", "5", stdout=out)
+		self.assertIn("GET /orders/?profile=1", out.getvalue())
+		self.assertIn("function calls", out.getvalue())
+
+	def test_flag_is_ignored_for_anonymous_users(self):
+		response = self.client.get(reverse("orders:orders"), HTTP_X_PROFILE="1")
+
+		self.assertEqual(response.status_code, 200)
+		self.assertNotIn("X-Profile-Id", response)
+
+	def test_requests_without_flag_are_not_profiled(self):
+		self._login_staff()
+
+		response = self.client.get(reverse("orders:orders"))
+
+		self.assertNotIn("X-Profile-Id", response)
+		out = StringIO()
+		call_command("list_profiles", stdout=out)
+		self.assertIn("No profiles", out.getvalue())
+
+	@override_settings(
+		DEBUG=True,
+		CATALOG_CACHE={"ENABLED": False},
+		ORDERS_RESPONSE_CACHE={"ENABLED": False},
+	)
+	async def test_async_views_are_not_profiled(self):
+		responses, peak = await _post_async_orders(
+			self.async_client,
+			3,
+			headers={"X-Profile": "1"},
+		)
+
+		self.assertEqual([response.status_code for response in responses], [201] * 3)
+		self.assertNotIn("X-Profile-Id", responses[0])
+		self.assertGreater(peak, 1)
+
+	def test_unknown_profile_is_an_error(self):
+		with self.assertRaises(CommandError):
+			call_command("list_profiles", "missing")
+
+
+class CatalogCacheTests(TestCase):
+	def setUp(self):
+		self.now = 0.0
+		self.cache = CatalogCache(ttl=10, max_size=2, clock=lambda: self.now)
+
+	def test_returns_cached_value_until_ttl_expires(self):
+		self.cache.set(1, {"price": 10})
+
+		self.assertEqual(self.cache.get(1), {"price": 10})
+		self.now = 10
+		self.assertIsNone(self.cache.get(1))
+
+		stats = self.cache.stats()
+		self.assertEqual(stats["hits"], 1)
+		self.assertEqual(stats["misses"], 1)
+		self.assertEqual(stats["expirations"], 1)
+		self.assertEqual(stats["size"], 0)
+
+	def test_evicts_least_recently_used_entry(self):
+		self.cache.set(1, "one")
+		self.cache.set(2, "two")
+		self.cache.get(1)
+		self.cache.set(3, "three")
+
+		self.assertEqual(self.cache.get(1), "one")
+		self.assertIsNone(self.cache.get(2))
+		self.assertEqual(self.cache.get(3), "three")
+		self.assertEqual(self.cache.stats()["evictions"], 1)
+
+	def test_disabled_cache_never_stores(self):
+		cache = CatalogCache(ttl=10, max_size=2, enabled=False)
+		cache.set(1, "one")
+
+		self.assertIsNone(cache.get(1))
+		self.assertEqual(cache.stats()["size"], 0)
+
+	@override_settings(CATALOG_CACHE={"ENABLED": True, "TTL": 60, "MAX_SIZE": 8})
+	def test_repeated_sku_is_fetched_once(self):
+		payload = {
+			"cliente": "ACME Corp",
+			"productos": [
+				{"sku": "P020", "cantidad": 1, "precio_unitario": 10},
+			],
+		}
+
+		with patch(CATALOG_GET) as mock_get:
+			mock_get.return_value = _successful_catalog_response(
+				price=10,
+				title="Product P020",
+			)
+			for _ in range(2):
+				response = self.client.post(
+					reverse("orders:orders"),
+					data=json.dumps(payload),
+					content_type="application/json",
+				)
+				self.assertEqual(response.status_code, 201)
+
+		self.assertEqual(mock_get.call_count, 1)
+		self.assertEqual(get_catalog_cache().stats()["hits"], 1)
+
+
+@override_settings(
+	CATALOG_CACHE={"ENABLED": False},
+	ORDERS_RESPONSE_CACHE={"ENABLED": True, "TIMEOUT": 60},
+)
+class OrdersResponseCacheTests(TestCase):
+	def setUp(self):
+		cache.clear()
+
+	def test_repeat_reads_are_served_from_cache(self):
+		Order.objects.create(client="Cached Co")
+		url = reverse("orders:orders")
+
+		first = self.client.get(url)
+		with self.assertNumQueries(0):
+			second = self.client.get(url)
+
+		self.assertEqual(first.json(), second.json())
+		self.assertNotEqual(
+			self.client.get(url, {"summary": "true"}).json(),
+			first.json(),
+		)
+
+	def test_order_write_invalidates_cache_on_commit(self):
+		url = reverse("orders:orders")
+		self.assertEqual(self.client.get(url).json()["orders"], [])
+
+		payload = {
+			"cliente": "ACME Corp",
+			"productos": [
+				{"sku": "P090", "cantidad": 1, "precio_unitario": 10},
+			],
+		}
+		with patch(CATALOG_GET) as mock_get:
+			mock_get.return_value = _successful_catalog_response(
+				price=10,
+				title="Product P090",
+			)
+			with self.captureOnCommitCallbacks(execute=True) as callbacks:
+				OrderItem.create_or_update_order_with_items(payload)
+
+		self.assertTrue(callbacks)
+		orders = self.client.get(url).json()["orders"]
+		self.assertEqual([order["client"] for order in orders], ["ACME Corp"])
+
+	def test_write_committed_during_read_is_not_hidden_by_cache(self):
+		Order.objects.create(client="old")
+		url = reverse("orders:orders")
 
+		def write_during_read(rows, **kwargs):
+			serialized = serialize_orders(rows, **kwargs)
+			Order.objects.create(client="new")
+			bump_orders_version()
+			return serialized
 
+		with patch("orders.views.serialize_orders", side_effect=write_during_read):
+			stale = self.client.get(url).json()["orders"]
+
+		self.assertEqual([order["client"] for order in stale], ["old"])
+		orders = self.client.get(url).json()["orders"]
+		self.assertEqual({order["client"] for order in orders}, {"old", "new"})
+
+
+@override_settings(
+	CATALOG_CACHE={"ENABLED": False},
+	ORDERS_RESPONSE_CACHE={"ENABLED": False},
+)
 class OrderViewTests(TestCase):
 	def test_orders_endpoint_returns_orders(self):
 		Order.objects.create(client="Gamma Inc")
@@ -95,12 +1632,258 @@ class OrderViewTests(TestCase):
 		self.assertIn("total_amount", order_payload)
 		self.assertEqual(order_payload["total_amount"], 0.0)
 
+	def test_orders_endpoint_filters_by_client_date_and_sku(self):
+		Product.objects.create(sku="P070", price=10, title="Product P070")
+		Product.objects.create(sku="P071", price=5, title="Product P071")
+		january = timezone.make_aware(datetime(2025, 1, 15, 12, 0))
+		orders = {
+			name: Order.objects.create(client=client)
+			for name, client in (
+				("acme_old", "ACME Corp"),
+				("acme_new", "ACME Corp"),
+				("gamma", "Gamma Inc"),
+			)
+		}
+		Order.objects.filter(pk=orders["acme_old"].pk).update(created_at=january)
+		OrderItem.objects.create(order=orders["acme_new"], product_id="P070", quantity=1)
+		OrderItem.objects.create(order=orders["acme_new"], product_id="P071", quantity=2)
+		OrderItem.objects.create(order=orders["gamma"], product_id="P071", quantity=1)
+
+		def ids(**params):
+			response = self.client.get(reverse("orders:orders"), params)
+			self.assertEqual(response.status_code, 200)
+			return [order["id"] for order in response.json()["orders"]]
+
+		self.assertEqual(
+			ids(client="ACME Corp"),
+			[orders["acme_new"].pk, orders["acme_old"].pk],
+		)
+		self.assertEqual(
+			ids(created_after="2025-01-01", created_before="2025-02-01"),
+			[orders["acme_old"].pk],
+		)
+		self.assertEqual(ids(sku="P070"), [orders["acme_new"].pk])
+
+		response = self.client.get(reverse("orders:orders"), {"sku": "P070"})
+		self.assertEqual(response.json()["orders"][0]["total_amount"], 20.0)
+
+	def test_orders_endpoint_sorts_by_stored_total(self):
+		Product.objects.create(sku="P072", price=4, title="Product P072")
+		orders = [Order.objects.create(client=f"Client {index}") for index in range(3)]
+		for order, quantity in zip(orders, (2, 5, 1)):
+			OrderItem.objects.create(order=order, product_id="P072", quantity=quantity)
+
+		with CaptureQueriesContext(connection) as context:
+			response = self.client.get(
+				reverse("orders:orders"),
+				{"ordering": "-total_amount", "summary": "true", "page_size": 2},
+			)
+
+		body = response.json()
+		self.assertEqual(
+			[order["total_amount"] for order in body["orders"]],
+			[20.0, 8.0],
+		)
+		list_sql = next(
+			query["sql"] for query in context if "LIMIT" in query["sql"]
+		)
+		self.assertNotIn("JOIN", list_sql)
+		response = self.client.get(body["next"])
+		self.assertEqual(response.json()["orders"][0]["total_amount"], 4.0)
+
+		response = self.client.get(reverse("orders:orders"), {"ordering": "client"})
+		self.assertEqual(response.status_code, 400)
+
+	def test_orders_endpoint_rejects_invalid_date_filter(self):
+		response = self.client.get(reverse("orders:orders"), {"created_after": "soon"})
+
+		self.assertEqual(response.status_code, 400)
+		self.assertIn("created_after", response.json()["errors"])
+
+	def test_order_filters_use_indexes(self):
+		client_plan = Order.objects.filter(client="ACME Corp").order_by(
+			"-created_at", "-id"
+		).explain()
+		sku_plan = OrderItem.objects.filter(product_id="P070").values("order_id").explain()
+
+		self.assertIn("order_client_created_idx", client_plan)
+		self.assertIn("orderitem_product_order_idx", sku_plan)
+
+	@override_settings(ORDERS_PAGE_SIZE=2)
+	def test_orders_endpoint_paginates_with_cursors(self):
+		created_at = timezone.make_aware(datetime(2025, 1, 1, 12, 0))
+		orders = [Order.objects.create(client=f"Client {index}") for index in range(5)]
+		Order.objects.filter(pk__in=[order.pk for order in orders[1:4]]).update(
+			created_at=created_at
+		)
+		Order.objects.filter(pk=orders[0].pk).update(
+			created_at=created_at - timezone.timedelta(days=1)
+		)
+		expected = [orders[4].pk, orders[3].pk, orders[2].pk, orders[1].pk, orders[0].pk]
+
+		seen = []
+		pages = []
+		url = reverse("orders:orders")
+		while url:
+			response = self.client.get(url)
+			self.assertEqual(response.status_code, 200)
+			body = response.json()
+			pages.append(body)
+			seen.extend(order["id"] for order in body["orders"])
+			url = body["next"]
+
+		self.assertEqual(seen, expected)
+		self.assertEqual([len(page["orders"]) for page in pages], [2, 2, 1])
+		self.assertIsNone(pages[0]["previous"])
+
+		response = self.client.get(pages[2]["previous"])
+		body = response.json()
+		self.assertEqual([order["id"] for order in body["orders"]], expected[2:4])
+		response = self.client.get(body["previous"])
+		body = response.json()
+		self.assertEqual([order["id"] for order in body["orders"]], expected[:2])
+		self.assertIsNone(body["previous"])
+
+	def test_orders_endpoint_rejects_invalid_cursor(self):
+		response = self.client.get(reverse("orders:orders"), {"cursor": "not-a-cursor"})
+
+		self.assertEqual(response.status_code, 400)
+		self.assertIn("cursor", response.json()["errors"])
+
+	def test_orders_endpoint_summary_skips_item_expansion(self):
+		products = [
+			Product.objects.create(sku=sku, price=price, title=f"Product {sku}")
+			for sku, price in (("P070", 2.5), ("P071", 4))
+		]
+		order = Order.objects.create(client="Delta SA")
+		OrderItem.objects.create(order=order, product=products[0], quantity=2)
+		OrderItem.objects.create(order=order, product=products[1], quantity=3)
+		Order.objects.create(client="Empty Ltd")
+
+		with self.assertNumQueries(2):
+			response = self.client.get(reverse("orders:orders"), {"summary": "true"})
+
+		self.assertEqual(response.status_code, 200)
+		orders = {item["client"]: item for item in response.json()["orders"]}
+		self.assertNotIn("products", orders["Delta SA"])
+		self.assertEqual(orders["Delta SA"]["total_amount"], 17.0)
+		self.assertEqual(orders["Delta SA"]["item_count"], 5)
+		self.assertEqual(orders["Empty Ltd"]["total_amount"], 0.0)
+		self.assertEqual(orders["Empty Ltd"]["item_count"], 0)
+
+	def test_orders_endpoint_answers_not_modified_for_matching_etag(self):
+		Order.objects.create(client="Eta Ltd")
+		url = reverse("orders:orders")
+
+		response = self.client.get(url)
+		etag = response["ETag"]
+		self.assertTrue(etag.startswith('"'))
+
+		with self.assertNumQueries(1):
+			not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(not_modified.status_code, 304)
+		self.assertEqual(not_modified["ETag"], etag)
+
+		other_page = self.client.get(url, {"page_size": 1}, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(other_page.status_code, 200)
+
+		Order.objects.create(client="Theta Ltd")
+		modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(modified.status_code, 200)
+		self.assertNotEqual(modified["ETag"], etag)
+
+	def test_etag_changes_when_product_price_changes(self):
+		product = Product.objects.create(sku="P061", price=1, title="Product P061")
+		order = Order.objects.create(client="Iota Ltd")
+		OrderItem.objects.create(order=order, product=product, quantity=1)
+		url = reverse("orders:orders")
+		etag = self.client.get(url)["ETag"]
+
+		Product.sync_many(
+			{
+				"P061": {
+					"title": "Product P061",
+					"price": 2,
+					"description": "",
+					"category": "",
+				}
+			}
+		)
+
+		response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, 200)
+		order_data = response.json()["orders"][0]
+		self.assertEqual(order_data["products"][0]["price"], 2.0)
+		self.assertEqual(order_data["total_amount"], 1.0)
+
+	def test_export_answers_not_modified_for_matching_etag(self):
+		Order.objects.create(client="Kappa Ltd")
+		url = reverse("orders:orders-export")
+		etag = self.client.get(url)["ETag"]
+
+		response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+		self.assertEqual(response.status_code, 304)
+
+	@override_settings(ORDERS_EXPORT_CHUNK_SIZE=2)
+	def test_export_streams_all_orders_as_json(self):
+		product = Product.objects.create(sku="P060", price=2.5, title="Product P060")
+		orders = [Order.objects.create(client=f"Client {index}") for index in range(5)]
+		OrderItem.objects.create(order=orders[0], product=product, quantity=4)
+
+		response = self.client.get(reverse("orders:orders-export"))
+
+		self.assertEqual(response.status_code, 200)
+		self.assertTrue(response.streaming)
+		body = json.loads(b"".join(response.streaming_content))
+		self.assertEqual(len(body["orders"]), 5)
+		exported = {order["id"]: order for order in body["orders"]}
+		self.assertEqual(exported[orders[0].pk]["total_amount"], 10.0)
+		self.assertEqual(exported[orders[0].pk]["products"][0]["sku"], "P060")
+
+	def test_ndjson_export_answers_not_modified_for_matching_etag(self):
+		Order.objects.create(client="Kappa Ltd")
+		url = reverse("orders:orders-export")
+		etag = self.client.get(url, HTTP_ACCEPT="application/x-ndjson")["ETag"]
+
+		response = self.client.get(
+			url,
+			HTTP_ACCEPT="application/x-ndjson",
+			HTTP_IF_NONE_MATCH=etag,
+		)
+		rejected = self.client.post(url, HTTP_ACCEPT="application/x-ndjson")
+
+		self.assertEqual(response.status_code, 304)
+		self.assertEqual(response.content, b"")
+		self.assertEqual(rejected.status_code, 405)
+		self.assertIn("detail", json.loads(rejected.content))
+
+	def test_export_streams_ndjson(self):
+		for index in range(3):
+			Order.objects.create(client=f"Client {index}")
+
+		response = self.client.get(
+			reverse("orders:orders-export"),
+			HTTP_ACCEPT="application/x-ndjson",
+		)
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response["Content-Type"], "application/x-ndjson")
+		lines = b"".join(response.streaming_content).decode().splitlines()
+		self.assertEqual(len(lines), 3)
+		self.assertEqual(
+			{json.loads(line)["client"] for line in lines},
+			{"Client 0", "Client 1", "Client 2"},
+		)
+
 	def test_orders_endpoint_creates_order(self):
-		with patch("orders.models.requests.get") as mock_get:
-			mock_get.side_effect = [
-				_successful_catalog_response(price=10, title="Product P001"),
-				_successful_catalog_response(price=20, title="Product P002"),
-			]
+		with patch(CATALOG_GET) as mock_get:
+			mock_get.side_effect = _catalog_by_product_id(
+				{
+					1: _successful_catalog_response(price=10, title="Product P001"),
+					2: _successful_catalog_response(price=20, title="Product P002"),
+				}
+			)
 
 			payload = {
 				"id": 123,
@@ -158,11 +1941,13 @@ class OrderViewTests(TestCase):
 		self.assertEqual(order.created_at, parsed_fecha)
 
 	def test_orders_endpoint_merges_products_for_existing_order(self):
-		with patch("orders.models.requests.get") as mock_get:
-			mock_get.side_effect = [
-				_successful_catalog_response(price=10, title="Product P001"),
-				_successful_catalog_response(price=20, title="Product P002"),
-			]
+		with patch(CATALOG_GET) as mock_get:
+			mock_get.side_effect = _catalog_by_product_id(
+				{
+					1: _successful_catalog_response(price=10, title="Product P001"),
+					2: _successful_catalog_response(price=20, title="Product P002"),
+				}
+			)
 
 			initial_payload = {
 				"id": 200,
@@ -184,11 +1969,13 @@ class OrderViewTests(TestCase):
 		order = Order.objects.get(pk=200)
 		original_created_at = order.created_at
 
-		with patch("orders.models.requests.get") as mock_get:
-			mock_get.side_effect = [
-				_successful_catalog_response(price=30, title="Product P003"),
-				_successful_catalog_response(price=10, title="Product P001"),
-			]
+		with patch(CATALOG_GET) as mock_get:
+			mock_get.side_effect = _catalog_by_product_id(
+				{
+					3: _successful_catalog_response(price=30, title="Product P003"),
+					1: _successful_catalog_response(price=10, title="Product P001"),
+				}
+			)
 
 			update_payload = {
 				"id": 200,
@@ -249,7 +2036,7 @@ class OrderViewTests(TestCase):
 			],
 		}
 
-		with patch("orders.models.requests.get") as mock_get:
+		with patch(CATALOG_GET) as mock_get:
 			mock_get.return_value = _successful_catalog_response(
 				price=11,
 				title="Product P010",
@@ -276,7 +2063,7 @@ class OrderViewTests(TestCase):
 			],
 		}
 
-		with patch("orders.models.requests.get") as mock_get:
+		with patch(CATALOG_GET) as mock_get:
 			response_mock = MagicMock()
 			response_mock.status_code = 200
 			response_mock.json.return_value = {
@@ -300,3 +2087,202 @@ class OrderViewTests(TestCase):
 		through_model = order.products.through
 		item = through_model.objects.get(order=order, product=product)
 		self.assertEqual(item.quantity, 1)
+
+
+class IdempotencyKeyTests(TestCase):
+	def setUp(self):
+		get_catalog_cache().clear()
+		self.payload = {
+			"id": 500,
+			"cliente": "ACME Corp",
+			"productos": [{"sku": "P001", "cantidad": 2, "precio_unitario": 10}],
+		}
+
+	def _post(self, payload, key="retry-1"):
+		return self.client.post(
+			reverse("orders:orders"),
+			data=json.dumps(payload),
+			content_type="application/json",
+			HTTP_IDEMPOTENCY_KEY=key,
+		)
+
+	@override_settings(CATALOG_CACHE={"ENABLED": False})
+	def test_retry_replays_stored_response_without_reexecuting(self):
+		with patch(CATALOG_GET) as mock_get:
+			mock_get.return_value = _successful_catalog_response(
+				price=10,
+				title="Product P001",
+			)
+			first = self._post(self.payload)
+			second = self._post(self.payload)
+
+		self.assertEqual(first.status_code, 201)
+		self.assertEqual(second.status_code, 201)
+		self.assertEqual(second.json(), first.json())
+		self.assertEqual(second["Idempotent-Replayed"], "true")
+		self.assertNotIn("Idempotent-Replayed", first)
+		self.assertEqual(mock_get.call_count, 1)
+		self.assertEqual(OrderItem.objects.get(order_id=500).quantity, 2)
+
+	def test_different_body_with_same_key_is_rejected(self):
+		with patch(CATALOG_GET) as mock_get:
+			mock_get.return_value = _successful_catalog_response(
+				price=10,
+				title="Product P001",
+			)
+			self._post(self.payload)
+			response = self._post({**self.payload, "cliente": "Other"})
+
+		self.assertEqual(response.status_code, 422)
+		self.assertIn("Idempotency-Key", response.json()["errors"])
+
+	def test_validation_errors_are_replayed(self):
+		invalid = {"productos": []}
+		with patch(CATALOG_GET) as mock_get:
+			first = self._post(invalid)
+			second = self._post(invalid)
+
+		self.assertEqual(first.status_code, 400)
+		self.assertEqual(second.status_code, 400)
+		self.assertEqual(second.json(), first.json())
+		self.assertEqual(second["Idempotent-Replayed"], "true")
+		mock_get.assert_not_called()
+
+	def test_server_errors_release_the_key(self):
+		with patch(
+			"orders.views.OrderItem.create_or_update_order_with_items",
+			side_effect=RuntimeError("boom"),
+		):
+			response = self._post(self.payload)
+
+		self.assertEqual(response.status_code, 500)
+		self.assertFalse(IdempotencyKey.objects.exists())
+
+	@override_settings(
+		CATALOG_CACHE={"ENABLED": False},
+		ORDERS_RETRY={"MAX_ATTEMPTS": 1},
+		CATALOG_CIRCUIT_BREAKER={"FAILURE_THRESHOLD": 100},
+	)
+	def test_catalog_outage_is_not_replayed_after_recovery(self):
+		with patch(CATALOG_GET) as mock_get:
+			mock_get.side_effect = requests.ConnectionError("connection refused")
+			outage = self._post(self.payload)
+
+		self.assertEqual(outage.status_code, 503)
+		self.assertFalse(IdempotencyKey.objects.exists())
+
+		with patch(CATALOG_GET) as mock_get:
+			mock_get.return_value = _successful_catalog_response(
+				price=10,
+				title="Product P001",
+			)
+			recovered = self._post(self.payload)
+
+		self.assertEqual(recovered.status_code, 201)
+		self.assertNotIn("Idempotent-Replayed", recovered)
+		self.assertEqual(mock_get.call_count, 1)
+
+	def test_duplicate_waits_for_in_flight_request(self):
+		record = IdempotencyKey.objects.create(
+			key="retry-1",
+			fingerprint=request_fingerprint(self.payload),
+			expires_at=timezone.now() + timedelta(hours=1),
+		)
+
+		def finish_in_flight(seconds):
+			record.status = IdempotencyKey.Status.COMPLETED
+			record.response_status = 201
+			record.response_body = {"order": {"id": 500}}
+			record.save()
+
+		with patch("orders.idempotency.time.sleep", side_effect=finish_in_flight) as sleep:
+			with patch(CATALOG_GET) as mock_get:
+				response = self._post(self.payload)
+
+		self.assertEqual(sleep.call_count, 1)
+		self.assertEqual(response.status_code, 201)
+		self.assertEqual(response.json(), {"order": {"id": 500}})
+		mock_get.assert_not_called()
+
+	def _reclaim_key(self):
+		# What a waiter does once the in-flight request outlives LOCK_TIMEOUT.
+		IdempotencyKey.objects.filter(key="retry-1").delete()
+		IdempotencyKey.objects.create(
+			key="retry-1",
+			fingerprint=request_fingerprint(self.payload),
+			expires_at=timezone.now() + timedelta(hours=1),
+		)
+
+	@override_settings(CATALOG_CACHE={"ENABLED": False})
+	def test_slow_request_does_not_overwrite_reclaimed_key(self):
+		create = OrderItem.create_or_update_order_with_items
+
+		def slow_create(payload):
+			self._reclaim_key()
+			return create(payload)
+
+		with (
+			patch(CATALOG_GET) as mock_get,
+			patch(
+				"orders.views.OrderItem.create_or_update_order_with_items",
+				side_effect=slow_create,
+			),
+		):
+			mock_get.return_value = _successful_catalog_response(
+				price=10,
+				title="Product P001",
+			)
+			response = self._post(self.payload)
+
+		self.assertEqual(response.status_code, 201)
+		record = IdempotencyKey.objects.get()
+		self.assertEqual(record.status, IdempotencyKey.Status.IN_PROGRESS)
+		self.assertIsNone(record.response_status)
+
+	def test_failed_request_does_not_release_reclaimed_key(self):
+		def slow_failure(payload):
+			self._reclaim_key()
+			raise RuntimeError("boom")
+
+		with patch(
+			"orders.views.OrderItem.create_or_update_order_with_items",
+			side_effect=slow_failure,
+		):
+			response = self._post(self.payload)
+
+		self.assertEqual(response.status_code, 500)
+		self.assertEqual(
+			IdempotencyKey.objects.get().status,
+			IdempotencyKey.Status.IN_PROGRESS,
+		)
+
+	@override_settings(ORDERS_IDEMPOTENCY={"WAIT_TIMEOUT": 0})
+	def test_duplicate_gets_conflict_when_in_flight_request_is_slow(self):
+		IdempotencyKey.objects.create(
+			key="retry-1",
+			fingerprint=request_fingerprint(self.payload),
+			expires_at=timezone.now() + timedelta(hours=1),
+		)
+
+		response = self._post(self.payload)
+
+		self.assertEqual(response.status_code, 409)
+		self.assertEqual(response["Retry-After"], "1")
+
+	def test_expired_keys_are_purged(self):
+		IdempotencyKey.objects.create(
+			key="old",
+			fingerprint="x",
+			expires_at=timezone.now() - timedelta(seconds=1),
+		)
+		IdempotencyKey.objects.create(
+			key="new",
+			fingerprint="x",
+			expires_at=timezone.now() + timedelta(hours=1),
+		)
+
+		out = StringIO()
+		call_command("purge_idempotency_keys", stdout=out)
+
+		self.assertIn("Purged 1", out.getvalue())
+		self.assertEqual(list(IdempotencyKey.objects.values_list("key", flat=True)), ["new"])
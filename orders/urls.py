@@ -1,10 +1,22 @@
 from django.urls import path
 
-from .views import Orders
+from .views import (
+    ClientSalesSummary,
+    OrderJobStatus,
+    Orders,
+    OrdersBulk,
+    OrdersExport,
+    create_order_async,
+)
 
 
 app_name = "orders"
 
 urlpatterns = [
     path("", Orders.as_view(), name="orders"),
+    path("export/", OrdersExport.as_view(), name="orders-export"),
+    path("async/", create_order_async, name="orders-async"),
+    path("bulk/", OrdersBulk.as_view(), name="orders-bulk"),
+    path("sales/", ClientSalesSummary.as_view(), name="orders-sales"),
+    path("jobs/<uuid:job_id>/", OrderJobStatus.as_view(), name="order-job"),
 ]
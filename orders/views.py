@@ -1,36 +1,137 @@
+import json
 import logging
+import math
 
-from django.db.models import Prefetch
+from typing import Any, Dict, Iterator
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Prefetch
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
 from rest_framework import status
 from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework.views import APIView
 
-from .models import Order, OrderItem
-from .serializers import OrderSerializer
+from . import metrics
+from .bulk import submit_orders
+from .cache import (
+	cache_orders_response,
+	etag_matches,
+	get_cached_orders_response,
+	orders_etag,
+	orders_response_key,
+)
+from .catalog import (
+	CatalogUnavailable,
+	CircuitBreaker,
+	close_async_catalog_client,
+	get_catalog_breaker,
+	get_catalog_cache,
+	get_catalog_client,
+)
+from .filters import filter_orders, filter_sales, order_ordering
+from .idempotency import IDEMPOTENCY_HEADER, run_idempotent
+from .instrumentation import serialization
+from .listing import ORDER_LIST_FIELDS, serialize_orders
+from .jobs import enqueue_order
+from .models import ClientDailySales, Order, OrderItem, OrderJob
+from .pagination import KeysetPagination
+from .renderers import NDJSONRenderer
+from .retry import RetryPolicy, is_transient
+from .serializers import (
+	ClientDailySalesSerializer,
+	OrderJobSerializer,
+	OrderSerializer,
+)
 
 
 logger = logging.getLogger(__name__)
 
 
+def _orders_with_items():
+	return Order.objects.prefetch_related(
+		Prefetch(
+			"orderitem_set",
+			queryset=OrderItem.objects.select_related("product"),
+		)
+	)
+
+
+def _serialize_order(order_id: int):
+	order = _orders_with_items().get(pk=order_id)
+	with serialization():
+		return OrderSerializer(order).data
+
+
+def _flag(request, name: str) -> bool:
+	return request.query_params.get(name, "").lower() in ("1", "true", "yes")
+
+
+def _unavailable(error: Exception) -> Dict[str, Any]:
+	# Transient failures that outlasted the retries: tell the client to come
+	# back later instead of reporting a bad payload.
+	logger.warning(f"Order not created, dependency unavailable: {error}")
+	if isinstance(error, CatalogUnavailable):
+		body = {"errors": error.detail}
+		retry_after = get_catalog_breaker().retry_after()
+	else:
+		body = {"error": "Database is busy."}
+		retry_after = 0
+	return {
+		"data": body,
+		"status": status.HTTP_503_SERVICE_UNAVAILABLE,
+		"headers": {"Retry-After": str(max(1, math.ceil(retry_after)))},
+	}
+
+
+def _prefers_async(request) -> bool:
+	preferences = {
+		token.strip().lower()
+		for token in request.headers.get("Prefer", "").split(",")
+	}
+	if "respond-async" in preferences:
+		return True
+	return getattr(settings, "ORDERS_ASYNC_INGESTION", False)
+
+
 class Orders(APIView):
 	
 	def get(self, request):
 		try:
-			queryset = (
-				Order.objects.all()
-				.order_by("-created_at")
-				.prefetch_related(
-					Prefetch(
-						"orderitem_set",
-						queryset=OrderItem.objects.select_related("product"),
-					)
-				)
+			cache_key = orders_response_key(request)
+			cached = get_cached_orders_response(cache_key)
+			if cached is not None:
+				return self._conditional_response(request, cached["data"], cached["etag"])
+
+			etag = orders_etag(request)
+			if etag_matches(request, etag):
+				return self._not_modified(etag)
+
+			queryset = filter_orders(
+				Order.objects.values(*ORDER_LIST_FIELDS),
+				request.query_params,
 			)
-			serializer = OrderSerializer(queryset, many=True)
+			paginator = KeysetPagination(ordering=order_ordering(request.query_params))
+			page = paginator.paginate_queryset(queryset, request)
+			orders = serialize_orders(
+				page,
+				include_products=not _flag(request, "summary"),
+			)
+			data = {"orders": orders, **paginator.get_links()}
+			cache_orders_response(cache_key, data, etag)
+			return self._conditional_response(request, data, etag)
+		except ValidationError as error:
 			return Response(
-				data={"orders": serializer.data},
-				status=status.HTTP_200_OK,
+				{"errors": error.detail},
+				status=status.HTTP_400_BAD_REQUEST,
 			)
 		except Exception:
 			logger.exception("Failed to list orders")
@@ -39,42 +140,275 @@ class Orders(APIView):
 				status=status.HTTP_500_INTERNAL_SERVER_ERROR,
 			)
 	
-	def post(self, request, attempts=0):
-		__max_attempts = 4
+	@staticmethod
+	def _not_modified(etag: str) -> Response:
+		return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+	@classmethod
+	def _conditional_response(cls, request, data, etag: str) -> Response:
+		if etag_matches(request, etag):
+			return cls._not_modified(etag)
+		return Response(data=data, status=status.HTTP_200_OK, headers={"ETag": etag})
+
+	def post(self, request):
+		key = request.headers.get(IDEMPOTENCY_HEADER)
+		if key is None:
+			return self._create(request)
+		return run_idempotent(key, request.data, lambda: self._create(request))
+
+	def _create(self, request) -> Response:
+		if _prefers_async(request):
+			return self._enqueue(request)
+
+		order_id = request.data.get("id") if isinstance(request.data, dict) else None
+		logger.info(f"Creating order with id {order_id or '?'}")
 		try:
-			try:
-				logger.info(
-        			f"Attempt {attempts + 1} to create order with id {request.data.get('id') or '?'}"
-           		)
-				order = OrderItem.create_or_update_order_with_items(request.data)
-				serializer = OrderSerializer(order)
-				logger.info(f"Order {order.pk} created successfully.")
-				
-				return Response(
-					data={"order": serializer.data},
-					status=status.HTTP_201_CREATED,
-				)	
-			
-			except Exception as error:
-				attempts += 1
-				if attempts < __max_attempts:
-					logger.warning(
-						f"Attempt {attempts} to create order failed: {error}. Retrying..."
-					)
-					return self.post(request, attempts=attempts)
-				else:
-					logger.error(f"All {__max_attempts} attempts to create order failed.")
-					raise error
-		
+			order = RetryPolicy.from_settings().call(
+				OrderItem.create_or_update_order_with_items,
+				request.data,
+				operation="create_order",
+			)
+			data = _serialize_order(order.pk)
+			logger.info(f"Order {order.pk} created successfully.")
+
+			return Response(
+				data={"order": data},
+				status=status.HTTP_201_CREATED,
+			)
+
 		except ValidationError as error:
+			if is_transient(error):
+				return Response(**_unavailable(error))
 			logger.warning(f"Validation error when creating order: {error}")
 			return Response(
 				{"errors": error.detail},
 				status=status.HTTP_400_BAD_REQUEST,
 			)
 		except Exception as error:
+			if is_transient(error):
+				return Response(**_unavailable(error))
 			logger.exception(f"Failed to create order: {error}")
 			return Response(
 				{"error": "Error creating order."},
 				status=status.HTTP_500_INTERNAL_SERVER_ERROR,
 			)
+
+	@staticmethod
+	def _enqueue(request) -> Response:
+		try:
+			job = enqueue_order(request.data)
+		except ValidationError as error:
+			logger.warning(f"Validation error when queueing order: {error}")
+			return Response(
+				{"errors": error.detail},
+				status=status.HTTP_400_BAD_REQUEST,
+			)
+
+		logger.info(f"Order queued as job {job.pk}.")
+		location = reverse("orders:order-job", kwargs={"job_id": job.pk})
+		return Response(
+			data={"job": OrderJobSerializer(job).data},
+			status=status.HTTP_202_ACCEPTED,
+			headers={
+				"Location": request.build_absolute_uri(location),
+				"Preference-Applied": "respond-async",
+			},
+		)
+
+
+class OrdersBulk(APIView):
+
+	def post(self, request):
+		payloads = request.data
+		if isinstance(payloads, dict):
+			payloads = payloads.get("orders")
+		if not isinstance(payloads, list) or not payloads:
+			return Response(
+				{"errors": "Expected a non-empty list of orders."},
+				status=status.HTTP_400_BAD_REQUEST,
+			)
+
+		max_orders = getattr(settings, "ORDERS_BULK_MAX_ORDERS", 5000)
+		if len(payloads) > max_orders:
+			return Response(
+				{"errors": f"At most {max_orders} orders can be submitted at once."},
+				status=status.HTTP_400_BAD_REQUEST,
+			)
+
+		try:
+			results = submit_orders(payloads)
+		except Exception as error:
+			logger.exception(f"Failed to submit order batch: {error}")
+			return Response(
+				{"error": "Error creating orders."},
+				status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+			)
+
+		created = sum(
+			1 for result in results if result["status"] == status.HTTP_201_CREATED
+		)
+		logger.info(f"Bulk submission: {created} of {len(results)} orders created.")
+		return Response(
+			data={
+				"created": created,
+				"failed": len(results) - created,
+				"results": results,
+			},
+			status=status.HTTP_200_OK,
+		)
+
+
+class OrderJobStatus(APIView):
+
+	def get(self, request, job_id):
+		job = get_object_or_404(OrderJob, pk=job_id)
+		return Response(
+			data={"job": OrderJobSerializer(job).data},
+			status=status.HTTP_200_OK,
+		)
+
+
+class ClientSalesSummary(APIView):
+
+	def get(self, request):
+		try:
+			queryset = filter_sales(ClientDailySales.objects.all(), request.query_params)
+			paginator = KeysetPagination(ordering=("day", "client"))
+			page = paginator.paginate_queryset(queryset, request)
+		except ValidationError as error:
+			return Response(
+				{"errors": error.detail},
+				status=status.HTTP_400_BAD_REQUEST,
+			)
+		return Response(
+			data={
+				"sales": ClientDailySalesSerializer(page, many=True).data,
+				**paginator.get_links(),
+			},
+			status=status.HTTP_200_OK,
+		)
+
+
+class OrdersExport(APIView):
+	renderer_classes = [JSONRenderer, NDJSONRenderer]
+
+	def get(self, request):
+		etag = orders_etag(request)
+		if etag_matches(request, etag):
+			return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+		chunk_size = getattr(settings, "ORDERS_EXPORT_CHUNK_SIZE", 500)
+		orders = _orders_with_items().order_by("-created_at", "-id")
+		rows = (
+			json.dumps(OrderSerializer(order).data, cls=JSONEncoder)
+			for order in orders.iterator(chunk_size=chunk_size)
+		)
+		if request.accepted_renderer.format == "ndjson":
+			content = (f"{row}\n" for row in rows)
+		else:
+			content = self._json_array(rows)
+		return StreamingHttpResponse(
+			content,
+			content_type=request.accepted_renderer.media_type,
+			headers={"ETag": etag},
+		)
+
+	@staticmethod
+	def _json_array(rows: Iterator[str]) -> Iterator[str]:
+		yield '{"orders": ['
+		for index, row in enumerate(rows):
+			yield f",{row}" if index else row
+		yield "]}"
+
+
+MONOTONIC_STATS = {
+	"hits",
+	"misses",
+	"evictions",
+	"expirations",
+	"requests",
+	"connections_opened",
+	"connections_reused",
+}
+
+
+@require_GET
+def metrics_endpoint(request):
+	for prefix, stats in (
+		("catalog_cache", get_catalog_cache().stats()),
+		("catalog_client", get_catalog_client().stats()),
+	):
+		for name, value in stats.items():
+			if name in MONOTONIC_STATS:
+				metrics.set_counter(f"{prefix}_{name}_total", value)
+			else:
+				metrics.set_gauge(f"{prefix}_{name}", value)
+	breaker = get_catalog_breaker().stats()
+	for state in (CircuitBreaker.CLOSED, CircuitBreaker.HALF_OPEN, CircuitBreaker.OPEN):
+		metrics.set_gauge(
+			"catalog_circuit_state",
+			1 if breaker["state"] == state else 0,
+			state=state,
+		)
+	metrics.set_counter("catalog_circuit_opened_total", breaker["times_opened"])
+	metrics.set_counter("catalog_circuit_rejected_total", breaker["rejected"])
+	jobs = dict(
+		OrderJob.objects.order_by()
+		.values_list("status")
+		.annotate(count=Count("pk"))
+	)
+	for job_status in OrderJob.Status.values:
+		metrics.set_gauge("order_jobs", jobs.get(job_status, 0), status=job_status)
+	return HttpResponse(
+		metrics.render_prometheus(),
+		content_type="text/plain; version=0.0.4; charset=utf-8",
+	)
+
+
+@csrf_exempt
+@require_POST
+async def create_order_async(request):
+	try:
+		return await _create_order_async(request)
+	finally:
+		if not isinstance(request, ASGIRequest):
+			# Outside ASGI every call runs on a new event loop (async_to_sync),
+			# so the loop's client can never be reused; close its sockets now.
+			await close_async_catalog_client()
+
+
+async def _create_order_async(request):
+	try:
+		payload = json.loads(request.body or b"{}")
+	except ValueError:
+		return JsonResponse(
+			{"errors": "Invalid JSON body."},
+			status=status.HTTP_400_BAD_REQUEST,
+		)
+
+	try:
+		order = await RetryPolicy.from_settings().acall(
+			OrderItem.acreate_or_update_order_with_items,
+			payload,
+			operation="create_order_async",
+		)
+		data = await sync_to_async(_serialize_order)(order.pk)
+	except ValidationError as error:
+		if is_transient(error):
+			return JsonResponse(**_unavailable(error))
+		logger.warning(f"Validation error when creating order: {error}")
+		return JsonResponse(
+			{"errors": error.detail},
+			status=status.HTTP_400_BAD_REQUEST,
+		)
+	except Exception as error:
+		if is_transient(error):
+			return JsonResponse(**_unavailable(error))
+		logger.exception(f"Failed to create order: {error}")
+		return JsonResponse(
+			{"error": "Error creating order."},
+			status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+		)
+
+	logger.info(f"Order {order.pk} created successfully.")
+	return JsonResponse({"order": data}, status=status.HTTP_201_CREATED)
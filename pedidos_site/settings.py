@@ -45,6 +45,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'orders.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -52,6 +53,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'orders.middleware.ProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'pedidos_site.urls'
@@ -77,13 +79,175 @@ WSGI_APPLICATION = 'pedidos_site.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite is tuned for concurrent writers (several gunicorn workers or queue
+# threads): WAL lets readers run alongside the single writer, synchronous=NORMAL
+# is safe across application crashes in WAL mode, and `timeout` makes a writer
+# wait up to that many seconds for the lock instead of failing with "database
+# is locked". IMMEDIATE transactions take the write lock when they begin, so
+# writers queue up behind each other instead of failing on a read-to-write lock
+# upgrade. Connections are kept open for CONN_MAX_AGE seconds.
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+
+# External product catalog
+# Lookups share one pooled keep-alive session and are not retried by the
+# client (order creation retries them through ORDERS_RETRY, and the circuit
+# breaker counts every attempt). RETRIES and BACKOFF_FACTOR apply to the
+# product list downloaded by sync_catalog, retried on connection errors and
+# 502/503/504 responses.
+
+CATALOG_CLIENT = {
+    'PRODUCT_URL': 'https://fakestoreapi.com/products/{product_id}',
+    'PRODUCTS_URL': 'https://fakestoreapi.com/products',
+    'POOL_SIZE': 16,
+    'CONNECT_TIMEOUT': 3.05,
+    'READ_TIMEOUT': 5,
+    'RETRIES': 2,
+    'BACKOFF_FACTOR': 0.1,
+}
+
+# Catalog payloads are cached in-process per product id. Set ENABLED to False
+# (or TTL to 0) to hit the catalog on every lookup.
+
+CATALOG_CACHE = {
+    'ENABLED': True,
+    'TTL': 60,
+    'MAX_SIZE': 1024,
+}
+
+# After FAILURE_THRESHOLD consecutive failed lookups (connection errors or
+# 5xx) the catalog is not called for RESET_TIMEOUT seconds; a single trial
+# lookup then decides whether to close the circuit again.
+
+CATALOG_CIRCUIT_BREAKER = {
+    'FAILURE_THRESHOLD': 5,
+    'RESET_TIMEOUT': 30,
+}
+
+# When ENABLED and the catalog is unavailable, products synced within the last
+# MAX_STALENESS seconds are served from the local Product table. Unchanged
+# products have their synced_at refreshed at most every TOUCH_INTERVAL seconds.
+
+CATALOG_FALLBACK = {
+    'ENABLED': False,
+    'MAX_STALENESS': 3600,
+    'TOUCH_INTERVAL': 300,
+}
+
+# `python manage.py sync_catalog` downloads the whole catalog from PRODUCTS_URL
+# and upserts BATCH_SIZE products per transaction, naming them with SKU_FORMAT.
+# Products synced within the last LOCAL_MAX_AGE seconds are then used by the
+# order path without calling the catalog (0 always asks the catalog).
+
+CATALOG_SYNC = {
+    'SKU_FORMAT': 'P{product_id:03d}',
+    'BATCH_SIZE': 500,
+    'LOCAL_MAX_AGE': 0,
+}
+
+# Upper bound on concurrent catalog lookups while resolving one order.
+CATALOG_MAX_WORKERS = 8
+
+
+# Orders API
+# GET /orders/ is keyset-paginated on (created_at, id). Clients may ask for a
+# different page size with ?page_size=, capped at ORDERS_MAX_PAGE_SIZE.
+
+ORDERS_PAGE_SIZE = 50
+ORDERS_MAX_PAGE_SIZE = 500
+
+# GET /orders/export/ streams every order, reading this many rows (and their
+# line items) per chunk.
+ORDERS_EXPORT_CHUNK_SIZE = 500
+
+# POST /orders/bulk/ accepts up to ORDERS_BULK_MAX_ORDERS orders and writes
+# them in transactions of ORDERS_BULK_BATCH_SIZE orders each.
+ORDERS_BULK_MAX_ORDERS = 5000
+ORDERS_BULK_BATCH_SIZE = 100
+
+
+# Order creation retries only transient failures (catalog unreachable or
+# answering 5xx, SQLite "database is locked") with exponential backoff and
+# full jitter. Validation errors are returned immediately.
+ORDERS_RETRY = {
+    'MAX_ATTEMPTS': 4,
+    'BASE_DELAY': 0.1,
+    'MAX_DELAY': 2.0,
+}
+
+
+# Queued ingestion
+# POST /orders/ with `Prefer: respond-async` only validates the payload shape,
+# stores it as an OrderJob and answers 202. Set ORDERS_ASYNC_INGESTION to queue
+# every POST. Jobs are processed by `python manage.py process_order_jobs`;
+# unexpected failures are retried up to ORDERS_JOB_MAX_ATTEMPTS times.
+
+ORDERS_ASYNC_INGESTION = False
+ORDERS_JOB_MAX_ATTEMPTS = 3
+
+
+# Idempotency keys
+# POST /orders/ with an `Idempotency-Key` header stores its response for TTL
+# seconds and replays it for repeats of the same request. A duplicate that
+# arrives while the first is still running polls every POLL_INTERVAL seconds
+# for up to WAIT_TIMEOUT, then gets 409. Keys left in progress for
+# LOCK_TIMEOUT seconds (a crashed worker) can be claimed again. Expired keys
+# are removed by `python manage.py purge_idempotency_keys`.
+
+ORDERS_IDEMPOTENCY = {
+    'TTL': 24 * 60 * 60,
+    'WAIT_TIMEOUT': 10.0,
+    'POLL_INTERVAL': 0.05,
+    'LOCK_TIMEOUT': 60.0,
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# The cache must be shared by every process that writes orders or products:
+# the web workers, process_order_jobs and sync_catalog bump the response
+# cache version here. A per-process backend such as LocMemCache would keep
+# serving stale GET /orders/ responses after writes made elsewhere.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
     }
 }
 
+# GET /orders/ responses are cached per query string and dropped whenever an
+# order, line item or product write commits.
+ORDERS_RESPONSE_CACHE = {
+    'ENABLED': True,
+    'ALIAS': 'default',
+    'TIMEOUT': 30,
+}
+
+# Profile a single sync request under cProfile by sending the X-Profile
+# header or the ?profile query flag. Only honoured for staff users unless
+# DEBUG is on. Off by default: when ENABLED is False the middleware removes
+# itself at startup, and async requests always pass straight through.
+ORDERS_PROFILER = {
+    'ENABLED': False,
+    'DIRECTORY': BASE_DIR / 'profiles',
+    'HEADER': 'X-Profile',
+    'QUERY_PARAM': 'profile',
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators